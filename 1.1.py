@@ -3,6 +3,9 @@ from tkinter import ttk, messagebox, simpledialog
 import sqlite3
 import datetime
 
+from migraciones import VERSION_CENTAVOS, version_esquema
+import motor_ahorro
+
 # ====== COLORES ======
 BG_COLOR = "#f4f9f9"
 FRAME_COLOR = "#dff6f0"
@@ -17,8 +20,23 @@ BUTTON_COLORS = {
 }
 
 # ====== BASE DE DATOS ======
+def comprobar_version(conn):
+    # Una base ya migrada por proyecto.py guarda centavos enteros, saldos acumulados y la versión
+    # de cada plan; esta ventana escribe pesos en REAL, así que no la abre
+    if version_esquema(conn) < VERSION_CENTAVOS:
+        return
+    conn.close()
+    raiz = tk.Tk()
+    raiz.withdraw()
+    messagebox.showerror("Base no compatible",
+                         "ahorros.db ya tiene el formato de la aplicación nueva (montos en centavos).\n"
+                         "Ábrela con proyecto.py.")
+    raiz.destroy()
+    raise SystemExit(1)
+
 def crear_base():
     conn = sqlite3.connect("ahorros.db")
+    comprobar_version(conn)
     cur = conn.cursor()
     cur.execute("""
         CREATE TABLE IF NOT EXISTS usuarios (
@@ -145,17 +163,18 @@ def abrir_ventana_principal(nombre_usuario, usuario_id):
             otros = float(otros_entry.get())
             ahorrado = float(ahorrado_entry.get())
 
-            gastos_totales = comida + transporte + otros
-            disponible = ingreso - gastos_totales
-            if disponible <= 0:
+            r = motor_ahorro.calcular(meta, plazo, ingreso, comida, transporte, otros, ahorrado)
+            if r.estado == motor_ahorro.ESTADO_PLAZO_INVALIDO:
+                resultado_label.config(text="⚠️ El plazo debe ser mayor que 0.")
+                progress["value"] = 0; alerta_label.config(text="", fg="red"); faltante_label.config(text=""); return
+            if r.disponible <= 0:
                 resultado_label.config(text="⚠️ No puedes ahorrar: tus gastos superan tus ingresos.")
                 progress["value"] = 0; alerta_label.config(text="", fg="red"); faltante_label.config(text=""); return
 
-            aporte_necesario = (meta - ahorrado) / plazo
-            aporte_sugerido_label.config(text=f"${aporte_necesario:.2f}/mes")
+            aporte_sugerido_label.config(text=f"${r.aporte_necesario:.2f}/mes")
             resultado_label.config(text=f"✅ Puedes alcanzar tu meta en {plazo} meses.")
-            progress["value"] = (ahorrado / meta) * 100
-            faltante = meta - ahorrado
+            progress["value"] = r.progreso
+            faltante = r.faltante
             faltante_label.config(text=f"💸 Te faltan ${faltante:.2f}" if faltante > 0 else "✅ Meta alcanzada.")
 
         except ValueError:
@@ -274,8 +293,9 @@ def abrir_ventana_principal(nombre_usuario, usuario_id):
         if messagebox.askyesno("Confirmar", "¿Deseas borrar todos los datos de este usuario?"):
             conn = sqlite3.connect("ahorros.db")
             cur = conn.cursor()
+            # Primero los registros de los planes de este usuario (y solo de este usuario)
+            cur.execute("DELETE FROM ahorros_mensuales WHERE plan_id IN (SELECT id FROM planes_ahorro WHERE usuario_id=?)", (usuario_id,))
             cur.execute("DELETE FROM planes_ahorro WHERE usuario_id=?", (usuario_id,))
-            cur.execute("DELETE FROM ahorros_mensuales WHERE plan_id NOT NULL")
             conn.commit(); conn.close()
             messagebox.showinfo("Éxito", "Datos borrados correctamente.")
             ventana.destroy(); mostrar_login()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# base_datos.py
+# Conexión compartida a SQLite para el planificador de ahorros.
+# Se abre una sola vez por sesión y la usan todas las ventanas y diálogos.
+# Varias copias de la aplicación pueden compartir el mismo archivo: las escrituras que leen
+# y luego escriben usan transaccion(inmediata=True) y reintentar() ante bloqueos o conflictos.
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from migraciones import aplicar_migraciones
+import trazas
+
+DB_FILE = "ahorros.db" # Nombre del archivo de la base de datos
+
+# ====== AJUSTES DE SQLITE ======
+BUSY_TIMEOUT_MS = 5000      # Espera máxima si otro proceso tiene el bloqueo
+CACHE_SENTENCIAS = 256      # Sentencias preparadas que se guardan por conexión
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",      # ~16 MB de caché de páginas
+    "PRAGMA mmap_size=268435456",    # 256 MB mapeados en memoria
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",        # Necesario para ON DELETE CASCADE
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+)
+
+# ====== REINTENTOS ======
+REINTENTOS = 6              # Intentos totales antes de rendirse
+ESPERA_INICIAL = 0.02       # Segundos; se duplica en cada reintento (con algo de azar)
+ESPERA_MAXIMA = 1.0
+
+
+class ConflictoEscritura(Exception):
+    """Otra conexión modificó la fila entre la lectura y la escritura (control optimista)."""
+
+
+class ConexionDB:
+    """Conexión persistente con sentencias preparadas en caché y tiempos por consulta."""
+
+    def __init__(self, ruta=DB_FILE, migrar=True):
+        self.ruta = ruta
+        # sqlite3 guarda las sentencias preparadas por texto SQL (cached_statements),
+        # así que reutilizar el mismo texto evita volver a compilarlas.
+        self.conn = sqlite3.connect(
+            ruta,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=CACHE_SENTENCIAS,
+            check_same_thread=False,
+        )
+        self._lock = threading.RLock()
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        if migrar:
+            aplicar_migraciones(self.conn)
+        self.tiempos = {} # sql -> [veces, segundos_totales, segundos_max]
+        self.trazador = trazas.trazador() # None salvo con AHORROS_TRAZAS=1 (ver trazas.py)
+
+    # ====== CONSULTAS ======
+    def ejecutar(self, sql, params=()):
+        with self._lock:
+            inicio = time.perf_counter()
+            cur = self.conn.execute(sql, params)
+            self._registrar(sql, time.perf_counter() - inicio, params, cur.rowcount)
+            return cur
+
+    def uno(self, sql, params=()):
+        with self._lock:
+            inicio = time.perf_counter()
+            row = self.conn.execute(sql, params).fetchone()
+            self._registrar(sql, time.perf_counter() - inicio, params, 0 if row is None else 1)
+            return row
+
+    def ejecutar_muchos(self, sql, filas):
+        # filas puede ser un generador: executemany lo consume sin materializarlo
+        with self._lock:
+            inicio = time.perf_counter()
+            cur = self.conn.executemany(sql, filas)
+            self._registrar(sql, time.perf_counter() - inicio, filas, cur.rowcount)
+            return cur
+
+    def todos(self, sql, params=()):
+        with self._lock:
+            inicio = time.perf_counter()
+            rows = self.conn.execute(sql, params).fetchall()
+            self._registrar(sql, time.perf_counter() - inicio, params, len(rows))
+            return rows
+
+    @contextmanager
+    def transaccion(self, inmediata=False):
+        # Confirma al salir del bloque o revierte si hubo una excepción.
+        # inmediata=True toma el bloqueo de escritura al empezar (BEGIN IMMEDIATE): la espera por
+        # otro escritor ocurre ahí, con busy_timeout, y no a mitad de la transacción, donde SQLite
+        # ya no puede esperar y responde "database is locked".
+        with self._lock:
+            try:
+                if inmediata and not self.conn.in_transaction:
+                    self.conn.execute("BEGIN IMMEDIATE")
+                yield self
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+
+    # ====== TIEMPOS ======
+    def _registrar(self, sql, segundos, params=(), filas=None):
+        if self.trazador is not None:
+            self.trazador.registrar(self.conn, sql, params, None if filas == -1 else filas, segundos)
+        t = self.tiempos.get(sql)
+        if t is None:
+            self.tiempos[sql] = [1, segundos, segundos]
+        else:
+            t[0] += 1
+            t[1] += segundos
+            if segundos > t[2]:
+                t[2] = segundos
+
+    def estadisticas(self):
+        # Lista de (sql, veces, ms_total, ms_promedio, ms_max) ordenada por tiempo total
+        filas = [
+            (sql, n, total * 1000, total * 1000 / n, maximo * 1000)
+            for sql, (n, total, maximo) in self.tiempos.items()
+        ]
+        filas.sort(key=lambda f: f[2], reverse=True)
+        return filas
+
+    def cerrar(self):
+        with self._lock:
+            self.conn.close()
+
+
+def es_bloqueo(error):
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
+
+def reintentar(funcion, *args, intentos=REINTENTOS, espera=ESPERA_INICIAL, **kwargs):
+    # Repite funcion(*args) si falla por bloqueo de la base o por ConflictoEscritura,
+    # con espera exponencial y azar para que los procesos no vuelvan a chocar a la vez
+    for intento in range(1, intentos + 1):
+        try:
+            return funcion(*args, **kwargs)
+        except (sqlite3.OperationalError, ConflictoEscritura) as e:
+            if intento == intentos or not (isinstance(e, ConflictoEscritura) or es_bloqueo(e)):
+                raise
+        time.sleep(min(espera * 2 ** (intento - 1), ESPERA_MAXIMA) * random.uniform(0.5, 1.5))
+
+
+# ====== CONEXIONES COMPARTIDAS ======
+_conexiones = {}
+_conexiones_lock = threading.Lock()
+
+def obtener_conexion(ruta=DB_FILE):
+    # Una única conexión por archivo durante toda la sesión
+    with _conexiones_lock:
+        db = _conexiones.get(ruta)
+        if db is None:
+            db = ConexionDB(ruta)
+            _conexiones[ruta] = db
+        return db
+
+def cerrar_conexiones():
+    with _conexiones_lock:
+        for db in _conexiones.values():
+            db.cerrar()
+        _conexiones.clear()
+
+
+# ====== POOL DE CONEXIONES ======
+class PoolConexiones:
+    """Unas pocas ConexionDB sobre el mismo archivo, prestadas de a una por hilo (servidor_api.py)."""
+
+    def __init__(self, ruta=DB_FILE, tamano=4):
+        self.ruta = ruta
+        self.tamano = tamano
+        self._libres = queue.LifoQueue() # La última devuelta tiene la caché de páginas más caliente
+        for i in range(tamano):
+            # Solo la primera migra; las demás ya abren el esquema al día
+            self._libres.put(ConexionDB(ruta, migrar=(i == 0)))
+
+    @contextmanager
+    def conexion(self):
+        # Espera si todas están prestadas; con un hilo por conexión nunca ocurre
+        db = self._libres.get()
+        try:
+            yield db
+        finally:
+            self._libres.put(db)
+
+    def cerrar(self):
+        for _ in range(self.tamano):
+            self._libres.get().cerrar()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# benchmark_ahorros.py
+# Mide las rutas reales de la ventana principal de proyecto.py (cargar_ultimo_plan, finalizar_mes,
+# actualizar_grafico, ver_historial, exportar_datos y borrar_datos_usuario) sobre bases generadas
+# con generador_datos.py de 10^3 a 10^7 registros mensuales. La GUI corre con la plataforma
+# "offscreen" de Qt y los diálogos se contestan solos. El resultado se guarda en JSON para
+# comparar entre versiones.
+#
+# Uso:
+#   python benchmark_ahorros.py --salida resultados.json
+#   python benchmark_ahorros.py --escalas 1000 100000 10000000 --repeticiones 3
+#   python benchmark_ahorros.py --salida nuevo.json --comparar anterior.json
+#   python benchmark_ahorros.py --estres-cierres 16     N procesos cierran meses del mismo plan a la vez
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+
+from PyQt6.QtCore import QThreadPool, PYQT_VERSION_STR
+from PyQt6.QtWidgets import QApplication, QDialog, QFileDialog, QInputDialog, QMessageBox
+
+import base_datos
+import generador_datos
+import tareas
+from cache_plan import CachePlan, MesYaCerrado
+from dinero import Dinero
+from saldos import saldo_actual
+
+ESCALAS = [10**3, 10**4, 10**5, 10**6]  # 10**7 se pide explícitamente: generarla tarda varios minutos
+REPETICIONES = 5
+DIRECTORIO = "benchmark_datos"
+
+
+# ====== DATOS ======
+def _dimensiones(filas):
+    # Unos 200 meses por plan y 3 planes por usuario en promedio (con cola larga)
+    planes = max(10, filas // 200)
+    return max(5, planes // 3), planes
+
+def preparar_base(directorio, filas, semilla, regenerar=False):
+    # La plantilla generada se reutiliza entre corridas; cada corrida trabaja sobre una copia
+    os.makedirs(directorio, exist_ok=True)
+    plantilla = os.path.join(directorio, f"plantilla_{filas}_{semilla}.db")
+    if regenerar and os.path.exists(plantilla):
+        os.remove(plantilla)
+    if not os.path.exists(plantilla):
+        usuarios, planes = _dimensiones(filas)
+        inicio = time.perf_counter()
+        generador_datos.generar(plantilla, usuarios, planes, filas, semilla)
+        base_datos.cerrar_conexiones() # Checkpoint del WAL: la plantilla queda en un solo archivo
+        print(f"  generada en {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+
+    trabajo = os.path.join(directorio, f"escala_{filas}")
+    os.makedirs(trabajo, exist_ok=True)
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(os.path.join(trabajo, base_datos.DB_FILE + sufijo)):
+            os.remove(os.path.join(trabajo, base_datos.DB_FILE + sufijo))
+    shutil.copyfile(plantilla, os.path.join(trabajo, base_datos.DB_FILE))
+    return trabajo
+
+def usuarios_mas_pesados(db, cantidad):
+    # Usuarios cuyo último plan (el que abre la ventana) tiene más meses registrados
+    return db.todos("""
+        SELECT u.id, u.nombre, p.plan_id,
+               (SELECT COUNT(*) FROM ahorros_mensuales WHERE plan_id = p.plan_id) AS n
+        FROM (SELECT usuario_id, MAX(id) AS plan_id FROM planes_ahorro GROUP BY usuario_id) p
+        JOIN usuarios u ON u.id = p.usuario_id
+        ORDER BY n DESC LIMIT ?
+    """, (cantidad,))
+
+
+# ====== QT SIN PANTALLA ======
+def _contestar_dialogos():
+    # Los diálogos modales se reemplazan por respuestas fijas para no bloquear la medición
+    QMessageBox.information = staticmethod(lambda *a, **k: QMessageBox.StandardButton.Ok)
+    QMessageBox.warning = staticmethod(lambda *a, **k: QMessageBox.StandardButton.Ok)
+    QMessageBox.critical = staticmethod(lambda *a, **k: QMessageBox.StandardButton.Ok)
+    QMessageBox.question = staticmethod(lambda *a, **k: QMessageBox.StandardButton.Yes)
+    QInputDialog.getDouble = staticmethod(lambda *a, **k: (k.get("value", 0.0), True))
+    QDialog.exec = lambda self: QDialog.DialogCode.Rejected
+
+def _esperar(app):
+    # Hasta que las tareas en segundo plano terminaron y sus resultados llegaron a la GUI
+    while True:
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+        if not tareas._activas:
+            break
+    app.processEvents()
+
+def _medir(app, accion, repeticiones, preparar=None):
+    muestras = []
+    for i in range(repeticiones):
+        if preparar:
+            preparar(i)
+        inicio = time.perf_counter()
+        accion(i)
+        _esperar(app)
+        muestras.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "repeticiones": len(muestras),
+        "mediana_ms": statistics.median(muestras),
+        "min_ms": min(muestras),
+        "max_ms": max(muestras),
+    }
+
+
+# ====== ESCENARIOS ======
+def medir_escala(app, proyecto, filas, repeticiones, semilla, regenerar):
+    print(f"Escala {filas} filas", file=sys.stderr)
+    directorio = preparar_base(DIRECTORIO, filas, semilla, regenerar)
+    anterior = os.getcwd()
+    os.chdir(directorio) # La ventana abre "ahorros.db" del directorio actual
+    resultados = []
+    try:
+        db = base_datos.obtener_conexion()
+        pesados = usuarios_mas_pesados(db, repeticiones + 1)
+        usuario_id, nombre, plan_id, filas_plan = pesados[0]
+        # El plan medido debe tener meses por cerrar durante todas las repeticiones
+        with db.transaccion():
+            db.ejecutar("UPDATE planes_ahorro SET plazo = MAX(plazo, mes_actual + ?) WHERE id=?", (repeticiones, plan_id))
+
+        ventana = proyecto.MainWindow(nombre, usuario_id)
+        _esperar(app) # Carga inicial: importa matplotlib y dibuja la serie por primera vez
+
+        def invalidar_grafico(_i):
+            if ventana.grafico is not None:
+                ventana.grafico._estado = None # Fuerza el redibujo completo
+
+        def registrar(operacion, medicion, filas_operacion=filas_plan):
+            medicion.update({"escala": filas, "operacion": operacion, "filas_plan": filas_operacion})
+            resultados.append(medicion)
+            print(f"  {operacion:22s} {medicion['mediana_ms']:10.2f} ms", file=sys.stderr)
+
+        registrar("cargar_ultimo_plan", _medir(app, lambda i: ventana.cargar_ultimo_plan(), repeticiones, invalidar_grafico))
+        registrar("actualizar_grafico", _medir(app, lambda i: ventana.actualizar_grafico(), repeticiones, invalidar_grafico))
+        registrar("finalizar_mes", _medir(app, lambda i: ventana.finalizar_mes(), repeticiones))
+        registrar("ver_historial", _medir(app, lambda i: ventana.ver_historial(), repeticiones))
+
+        destino = os.path.abspath("exportacion.csv")
+        QFileDialog.getSaveFileName = staticmethod(lambda *a, **k: (destino, ""))
+        registrar("exportar_datos", _medir(app, lambda i: ventana.exportar_datos(), repeticiones))
+        ventana.close()
+        ventana.deleteLater()
+
+        # Borrar es destructivo: cada repetición usa otro de los usuarios más pesados
+        victimas = pesados[1:] or pesados
+        ventanas = []
+        def abrir(i):
+            u_id, u_nombre, _, _ = victimas[i % len(victimas)]
+            ventanas.append(proyecto.MainWindow(u_nombre, u_id))
+            _esperar(app)
+        medicion = _medir(app, lambda i: ventanas[-1].borrar_datos_usuario(), min(repeticiones, len(victimas)), abrir)
+        registrar("borrar_datos_usuario", medicion, victimas[0][3])
+        for v in ventanas:
+            v.deleteLater()
+        _esperar(app)
+    finally:
+        base_datos.cerrar_conexiones()
+        os.chdir(anterior)
+    return resultados
+
+
+# ====== ESTRÉS DE ESCRITURA ======
+def _cerrador(ruta, plan_id, cierres, barrera, resultados):
+    # Proceso hijo: hace lo mismo que finalizar_mes en una ventana (leer el plan, esperar la
+    # respuesta del diálogo, escribir) contra el mismo archivo que los demás procesos
+    db = base_datos.ConexionDB(ruta)
+    cache = CachePlan(db)
+    cache.cargar(plan_id)
+    barrera.wait()
+    cerrados, conflictos, errores = [], 0, []
+    while len(cerrados) < cierres:
+        mes = cache.plan.mes_actual
+        time.sleep(random.uniform(0, 0.01)) # El diálogo modal abierto
+        try:
+            cache.registrar_aporte(Dinero(10000), datetime.date.today().isoformat(), mes)
+            cerrados.append(mes)
+        except MesYaCerrado:
+            conflictos += 1 # Otra ventana lo cerró: se ofrece el mes siguiente
+        except sqlite3.OperationalError as e:
+            errores.append(str(e))
+            break
+    db.cerrar()
+    resultados.put((cerrados, conflictos, errores))
+
+def estres_cierres(procesos, cierres_por_proceso=1):
+    # Comprueba que N cierres concurrentes sobre un plan dejan exactamente N meses, sin huecos ni repetidos
+    directorio = os.path.join(DIRECTORIO, "estres")
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, base_datos.DB_FILE)
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    esperados = procesos * cierres_por_proceso
+    db = base_datos.ConexionDB(ruta)
+    with db.transaccion():
+        usuario_id = db.ejecutar("INSERT INTO usuarios (nombre, contrasena) VALUES ('estres', '')").lastrowid
+        plan_id = db.ejecutar("""
+            INSERT INTO planes_ahorro (usuario_id, meta, plazo, ingreso, comida, transporte, otros, ahorrado, ahorrado_inicial, mes_actual, fecha_inicio)
+            VALUES (?, ?, ?, 100000, 0, 0, 0, 0, 0, 1, ?)
+        """, (usuario_id, esperados * 100000, esperados * 2, datetime.date.today().isoformat())).lastrowid
+
+    contexto = multiprocessing.get_context("spawn")
+    barrera = contexto.Barrier(procesos)
+    cola = contexto.Queue()
+    hijos = [contexto.Process(target=_cerrador, args=(ruta, plan_id, cierres_por_proceso, barrera, cola))
+             for _ in range(procesos)]
+    inicio = time.perf_counter()
+    for h in hijos:
+        h.start()
+    salidas = [cola.get() for _ in hijos]
+    for h in hijos:
+        h.join()
+    segundos = time.perf_counter() - inicio
+
+    meses = [r[0] for r in db.todos("SELECT mes FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes", (plan_id,))]
+    mes_actual, ahorrado, version = db.uno("SELECT mes_actual, ahorrado, version FROM planes_ahorro WHERE id=?", (plan_id,))
+    errores = [e for s in salidas for e in s[2]]
+    problemas = []
+    if meses != list(range(1, esperados + 1)):
+        problemas.append(f"meses registrados {len(meses)} (esperados {esperados}, sin repetir)")
+    if mes_actual != esperados + 1:
+        problemas.append(f"mes_actual {mes_actual} (esperado {esperados + 1})")
+    # En centavos: tiene que cuadrar exacto
+    if ahorrado != esperados * 10000 or saldo_actual(db, plan_id) != ahorrado:
+        problemas.append(f"ahorrado {Dinero(ahorrado)} (esperado {Dinero(esperados * 10000)})")
+    if errores:
+        problemas.append(f"{len(errores)} errores de bloqueo: {errores[0]}")
+    db.cerrar()
+
+    print(f"{procesos} procesos x {cierres_por_proceso} cierres en {segundos:.2f} s: {len(meses)} meses, "
+          f"versión {version}, {sum(s[1] for s in salidas)} meses ya cerrados por otro (reintentados)")
+    for p in problemas:
+        print(f"  FALLA: {p}")
+    return not problemas
+
+
+# ====== INFORME ======
+def _version_codigo():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def comparar(actual, anterior):
+    previos = {(r["escala"], r["operacion"]): r for r in anterior["resultados"]}
+    print(f"Comparación con {anterior.get('version') or 'la corrida anterior'}:")
+    print(f"{'escala':>10} {'operación':22s} {'antes ms':>10} {'ahora ms':>10} {'cambio':>8}")
+    for r in actual["resultados"]:
+        previo = previos.get((r["escala"], r["operacion"]))
+        if not previo:
+            continue
+        cambio = r["mediana_ms"] / previo["mediana_ms"] if previo["mediana_ms"] else float("inf")
+        print(f"{r['escala']:>10} {r['operacion']:22s} {previo['mediana_ms']:10.2f} {r['mediana_ms']:10.2f} {cambio:7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de proyecto.py sobre bases sintéticas")
+    parser.add_argument("--escalas", type=int, nargs="+", default=ESCALAS, help="Registros mensuales por base")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--regenerar", action="store_true", help="Volver a generar las bases aunque existan")
+    parser.add_argument("--salida", default="benchmark_resultados.json")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--estres-cierres", type=int, metavar="N", help="Solo la prueba de N cierres concurrentes")
+    parser.add_argument("--cierres-por-proceso", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.estres_cierres:
+        sys.exit(0 if estres_cierres(args.estres_cierres, args.cierres_por_proceso) else 1)
+
+    app = QApplication(sys.argv)
+    _contestar_dialogos()
+    import proyecto
+    proyecto.volver_al_login = lambda ventana: ventana.close() # Tras borrar el usuario se volvería al login
+
+    resultados = []
+    for filas in args.escalas:
+        resultados.extend(medir_escala(app, proyecto, filas, args.repeticiones, args.semilla, args.regenerar))
+
+    informe = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "version": _version_codigo(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "pyqt": PYQT_VERSION_STR,
+        "plataforma": platform.platform(),
+        "semilla": args.semilla,
+        "resultados": resultados,
+    }
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.salida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(informe, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# borrado.py
+# Borrado de usuarios en dos pasos:
+#   1. marcar_borrado: el usuario desaparece al instante (borrado_en con fecha y nombre liberado).
+#   2. purgar_usuario: los registros se eliminan físicamente en transacciones cortas, por bloques,
+#      para no retener el bloqueo de escritura durante segundos con usuarios muy pesados.
+# Si la aplicación se cierra a mitad de una purga, purgar_pendientes la termina en la próxima sesión.
+#
+# Uso:
+#   python borrado.py --usuario 7        marca y purga un usuario
+#   python borrado.py --pendientes       termina las purgas que quedaron a medias
+import argparse
+import datetime
+import time
+
+from base_datos import DB_FILE, obtener_conexion
+
+FILAS_POR_BLOQUE = 2000   # Registros mensuales borrados por transacción
+PAUSA_ENTRE_BLOQUES = 0.005 # Respiro para que otros escritores tomen el bloqueo
+
+
+# ====== BORRADO LÓGICO ======
+def marcar_borrado(db, usuario_id):
+    # El nombre se libera (UNIQUE admite varios NULL) para que pueda volver a registrarse
+    with db.transaccion():
+        cur = db.ejecutar(
+            "UPDATE usuarios SET borrado_en=?, nombre=NULL WHERE id=? AND borrado_en IS NULL",
+            (datetime.datetime.now().isoformat(timespec="seconds"), usuario_id),
+        )
+    return cur.rowcount > 0
+
+
+# ====== PURGA FÍSICA ======
+def purgar_usuario(db, usuario_id, filas_por_bloque=FILAS_POR_BLOQUE, pausa=PAUSA_ENTRE_BLOQUES,
+                   progreso=None, cancelado=None):
+    # Devuelve los registros mensuales eliminados. cancelado() permite cortar entre bloques:
+    # lo ya borrado queda borrado y el resto se purga en otra pasada.
+    borradas = 0
+    while True:
+        with db.transaccion():
+            cur = db.ejecutar("""
+                DELETE FROM ahorros_mensuales WHERE id IN (
+                    SELECT a.id FROM planes_ahorro p
+                    JOIN ahorros_mensuales a ON a.plan_id = p.id
+                    WHERE p.usuario_id = ? LIMIT ?)
+            """, (usuario_id, filas_por_bloque))
+        borradas += cur.rowcount
+        if progreso:
+            progreso(borradas)
+        if cur.rowcount < filas_por_bloque:
+            break
+        if cancelado and cancelado():
+            return borradas
+        time.sleep(pausa)
+
+    # Sin registros mensuales, los planes y el usuario caen juntos por ON DELETE CASCADE
+    with db.transaccion():
+        db.ejecutar("DELETE FROM usuarios WHERE id=?", (usuario_id,))
+    return borradas
+
+def purgar_pendientes(db, progreso=None, cancelado=None):
+    # Purga todos los usuarios marcados como borrados; devuelve (usuarios, registros)
+    pendientes = [r[0] for r in db.todos("SELECT id FROM usuarios WHERE borrado_en IS NOT NULL ORDER BY id")]
+    total = 0
+    for usuario_id in pendientes:
+        if cancelado and cancelado():
+            break
+        total += purgar_usuario(db, usuario_id, progreso=progreso, cancelado=cancelado)
+    return len(pendientes), total
+
+def borrar_usuario(db, usuario_id, **opciones):
+    # Borrado completo en primer plano (línea de comandos)
+    marcar_borrado(db, usuario_id)
+    return purgar_usuario(db, usuario_id, **opciones)
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Borra usuarios y purga sus registros por bloques")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--usuario", type=int, help="Id del usuario a borrar")
+    grupo.add_argument("--pendientes", action="store_true", help="Terminar las purgas pendientes")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--bloque", type=int, default=FILAS_POR_BLOQUE)
+    args = parser.parse_args()
+
+    db = obtener_conexion(args.db)
+    if args.pendientes:
+        usuarios, registros = purgar_pendientes(db)
+        print(f"{usuarios} usuarios purgados ({registros} registros mensuales)")
+    else:
+        registros = borrar_usuario(db, args.usuario, filas_por_bloque=args.bloque)
+        print(f"Usuario {args.usuario} borrado ({registros} registros mensuales)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# cache_plan.py
+# Caché en memoria del plan activo de la ventana: la fila de planes_ahorro y su serie de acumulados.
+# Se lee una vez y las escrituras hechas a través de la caché la actualizan en el lugar,
+# así que los botones no vuelven a consultar la base para leer.
+# Si otra conexión (otra ventana, otro proceso, cierre_mes.py...) confirma cambios en el archivo,
+# PRAGMA data_version cambia y la caché se vuelve a leer en el siguiente acceso.
+# Las escrituras van en transacciones BEGIN IMMEDIATE cortas y comprueban planes_ahorro.version,
+# así dos copias de la aplicación no pueden cerrar el mismo mes ni pisarse el saldo.
+# El plan es un modelo.Plan y su historial una modelo.SerieMensual (columnas en centavos).
+from collections import namedtuple
+
+from base_datos import ConflictoEscritura, reintentar
+from dinero import CERO, Dinero, centavos
+from modelo import CAMPOS, Plan, SerieMensual
+import motor_ahorro
+from proyeccion import SIN_SUPUESTOS
+from saldos import registrar_aporte, saldo_actual
+
+# Lo que se lee de una vez (puede ser en un hilo de trabajo) y se entrega a CachePlan.establecer
+DatosPlan = namedtuple("DatosPlan", ["plan", "serie", "version"])
+
+
+class MesYaCerrado(Exception):
+    """El mes que se quería cerrar ya lo cerró otra sesión sobre el mismo archivo."""
+
+    def __init__(self, mes):
+        super().__init__(f"El mes {mes} ya fue cerrado en otra sesión")
+        self.mes = mes
+
+
+# ====== LECTURA ======
+def version_datos(db):
+    # Cambia cada vez que OTRA conexión confirma una escritura en el archivo
+    return db.uno("PRAGMA data_version")[0]
+
+def leer_plan(db, plan_id, con_serie=True):
+    version = version_datos(db)
+    row = db.uno(f"SELECT {', '.join(CAMPOS)} FROM planes_ahorro WHERE id=?", (plan_id,))
+    if not row:
+        return None
+    # ahorrado sale del índice de acumulados, no de la columna desnormalizada
+    plan = Plan.desde_fila(plan_id, row)
+    plan.ahorrado = Dinero(saldo_actual(db, plan_id))
+    serie = None
+    if con_serie:
+        serie = SerieMensual.desde_filas(
+            db.todos("SELECT mes, monto, fecha FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes, id", (plan_id,)))
+    return DatosPlan(plan, serie, version)
+
+def leer_ultimo_plan(db, usuario_id):
+    row = db.uno("SELECT id FROM planes_ahorro WHERE usuario_id=? ORDER BY id DESC LIMIT 1", (usuario_id,))
+    return leer_plan(db, row[0]) if row else None
+
+
+# ====== CACHÉ ======
+class CachePlan:
+    def __init__(self, db):
+        self.db = db
+        self._plan = None
+        self._serie = None   # Se lee recién cuando alguien pide la serie
+        self._version = None
+
+    def establecer(self, datos):
+        if datos is None:
+            self.olvidar()
+            return
+        self._plan = datos.plan
+        self._serie = datos.serie
+        self._version = datos.version
+
+    def cargar(self, plan_id, con_serie=False):
+        self.establecer(leer_plan(self.db, plan_id, con_serie))
+
+    def olvidar(self):
+        self._plan = None
+        self._serie = None
+        self._version = None
+
+    def _vigente(self):
+        # Una consulta a un PRAGMA en memoria (no lee tablas); si otro escribió, se relee todo
+        if self._plan is not None and version_datos(self.db) != self._version:
+            self.cargar(self._plan.id, con_serie=self._serie is not None)
+
+    # ====== LECTURAS DESDE MEMORIA ======
+    @property
+    def plan_id(self):
+        return self._plan.id if self._plan else None
+
+    @property
+    def plan(self):
+        self._vigente()
+        return self._plan
+
+    def serie(self):
+        self._vigente()
+        if self._plan is not None and self._serie is None:
+            self.cargar(self._plan.id, con_serie=True)
+        return self._serie if self._serie is not None else SerieMensual()
+
+    def acumulados(self):
+        # En pesos (float), listos para el gráfico
+        return [c / 100 for c in self.serie().acumulados()]
+
+    def primera_fecha(self):
+        return self.serie().primera_fecha()
+
+    # ====== ESCRITURAS ======
+    def registrar_aporte(self, monto, fecha, mes=None):
+        # Cierra el mes 'mes' (por defecto el mes en curso) con un aporte en Dinero;
+        # devuelve (acumulado, plan actualizado).
+        # Si mientras tanto otra sesión cerró ese mes lanza MesYaCerrado y la caché queda al día.
+        if mes is None:
+            mes = self._plan.mes_actual
+        return reintentar(self._registrar_aporte, monto, fecha, mes)
+
+    def _registrar_aporte(self, monto, fecha, mes):
+        with self.db.transaccion(inmediata=True):
+            # Con el bloqueo de escritura tomado, lo leído ya no puede cambiar hasta confirmar
+            self._vigente()
+            p = self._plan
+            if p.mes_actual != mes:
+                raise MesYaCerrado(mes)
+            acumulado = registrar_aporte(self.db, p.id, p.mes_actual, centavos(monto), fecha)
+            ahorrado = p.ahorrado_inicial + Dinero(acumulado)
+            estado = motor_ahorro.estado_plan(p.meta, p.plazo, ahorrado, p.mes_actual + 1)
+            cur = self.db.ejecutar(
+                "UPDATE planes_ahorro SET ahorrado=?, mes_actual=?, estado=?, version=version+1 WHERE id=? AND version=?",
+                (ahorrado, p.mes_actual + 1, estado, p.id, p.version))
+            if cur.rowcount != 1:
+                # Escrito por esta misma conexión desde otro lado: data_version no lo refleja
+                self._version = None
+                raise ConflictoEscritura(p.id)
+        self._plan = p._replace(ahorrado=ahorrado, mes_actual=p.mes_actual + 1, estado=estado, version=p.version + 1)
+        if self._serie is not None:
+            self._serie.agregar(mes, centavos(monto), fecha)
+        return Dinero(acumulado), self._plan
+
+    def limpiar(self):
+        # Borra los registros mensuales y deja el plan como recién creado sin ahorro
+        p = self._plan
+        def limpiar():
+            with self.db.transaccion(inmediata=True):
+                self.db.ejecutar("DELETE FROM ahorros_mensuales WHERE plan_id=?", (p.id,))
+                self.db.ejecutar("UPDATE planes_ahorro SET ahorrado=0, ahorrado_inicial=0, mes_actual=1, estado='activo', "
+                                 "version=version+1 WHERE id=?", (p.id,))
+                return self.db.uno("SELECT version FROM planes_ahorro WHERE id=?", (p.id,))[0]
+        version = reintentar(limpiar)
+        self._plan = p._replace(ahorrado=CERO, ahorrado_inicial=CERO, mes_actual=1, estado=motor_ahorro.PLAN_ACTIVO, version=version)
+        self._serie = SerieMensual()
+        return self._plan
+
+    def crear(self, usuario_id, meta, plazo, ingreso, comida, transporte, otros, ahorrado, fecha_inicio,
+              supuestos=SIN_SUPUESTOS):
+        # Guarda un plan nuevo y pasa a ser el plan de la caché; los montos en pesos o Dinero
+        meta, ingreso, comida, transporte, otros, ahorrado = (
+            Dinero.desde(m) for m in (meta, ingreso, comida, transporte, otros, ahorrado))
+        tasa, inflacion, al_inicio = supuestos.tasa_anual, supuestos.inflacion_anual, int(supuestos.aporte_al_inicio)
+        with self.db.transaccion():
+            cur = self.db.ejecutar("""
+                INSERT INTO planes_ahorro (meta, plazo, ingreso, comida, transporte, otros, ahorrado, ahorrado_inicial, usuario_id, fecha_inicio, mes_actual,
+                                           tasa_anual, inflacion_anual, aporte_al_inicio)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
+            """, (meta, plazo, ingreso, comida, transporte, otros, ahorrado, ahorrado, usuario_id, fecha_inicio,
+                  tasa, inflacion, al_inicio))
+        self._plan = Plan(cur.lastrowid, meta, plazo, ingreso, comida, transporte, otros,
+                          ahorrado, ahorrado, 1, motor_ahorro.PLAN_ACTIVO, fecha_inicio, tasa, inflacion, al_inicio, 0)
+        self._serie = SerieMensual()
+        self._version = version_datos(self.db)
+        return self._plan
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# carga_api.py
+# Generador de carga local para servidor_api.py. Cada cliente virtual crea su usuario y su plan
+# y después repite una mezcla de peticiones (listar planes, historial, proyección y finalizar mes)
+# sobre una conexión keep-alive durante el tiempo indicado.
+# Informa peticiones por segundo y latencias p50 / p99 / máxima, en total y por ruta.
+# Sin --url levanta su propio servidor en otro proceso sobre una base temporal, para que el
+# generador y el servidor no compitan por el mismo intérprete.
+#
+# Uso:
+#   python carga_api.py --clientes 32 --segundos 10
+#   python carga_api.py --clientes 64 --conexiones 8 --salida carga.json
+#   python carga_api.py --clientes 64 --conexiones 8 --fragmentos 16
+#   python carga_api.py --url http://127.0.0.1:8080 --clientes 16
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+CLIENTES = 16
+SEGUNDOS = 10.0
+# Peso de cada petición en la mezcla: sobre todo lecturas, como los clientes web y móvil
+MEZCLA = (("listar", 3), ("historial", 3), ("proyeccion", 2), ("finalizar", 2))
+PLAN = {"meta": 20000, "plazo": 120, "ingreso": 2000, "comida": 400, "transporte": 150, "otros": 200}
+
+
+# ====== CLIENTE HTTP ======
+class Cliente:
+    """Una conexión keep-alive al servidor; cada petición devuelve (estado, datos)."""
+
+    def __init__(self, host, puerto):
+        self.host, self.puerto = host, puerto
+        self.reader = self.writer = None
+        self.token = None
+
+    async def abrir(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.puerto)
+
+    async def pedir(self, metodo, ruta, datos=None):
+        cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else b""
+        cabecera = f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(cuerpo)}\r\n"
+        if self.token:
+            cabecera += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write((cabecera + "\r\n").encode("latin-1") + cuerpo)
+        await self.writer.drain()
+        estado = int((await self.reader.readline()).split()[1])
+        largo = 0
+        while True:
+            linea = await self.reader.readline()
+            if linea in (b"\r\n", b""):
+                break
+            nombre, _, valor = linea.decode("latin-1").partition(":")
+            if nombre.strip().lower() == "content-length":
+                largo = int(valor)
+        return estado, json.loads(await self.reader.readexactly(largo)) if largo else None
+
+    def cerrar(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# ====== CARGA ======
+def percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+async def _cliente_virtual(host, puerto, numero, fin, latencias, errores, semilla):
+    rnd = random.Random(semilla + numero)
+    cliente = Cliente(host, puerto)
+    await cliente.abrir()
+    try:
+        nombre = f"carga_{semilla}_{numero}"
+        await cliente.pedir("POST", "/usuarios", {"nombre": nombre, "contrasena": "clave"})
+        estado, datos = await cliente.pedir("POST", "/login", {"nombre": nombre, "contrasena": "clave"})
+        if estado != 200:
+            raise RuntimeError(f"No se pudo iniciar sesión ({estado}): {datos}")
+        cliente.token = datos["token"]
+        ruta_plan = None
+        nombres, pesos = zip(*MEZCLA)
+        while time.perf_counter() < fin:
+            if ruta_plan is None:
+                # Plan nuevo al empezar y cada vez que se cierran todos sus meses (como un usuario real)
+                estado, plan = await cliente.pedir("POST", "/planes", PLAN)
+                if estado != 201:
+                    errores[estado] = errores.get(estado, 0) + 1
+                    continue
+                ruta_plan = f"/planes/{plan['id']}"
+            tipo = rnd.choices(nombres, pesos)[0]
+            if tipo == "listar":
+                metodo, ruta, datos = "GET", "/planes", None
+            elif tipo == "historial":
+                metodo, ruta, datos = "GET", f"{ruta_plan}/historial?limite=50", None
+            elif tipo == "proyeccion":
+                metodo, ruta, datos = "GET", f"{ruta_plan}/proyeccion", None
+            else:
+                metodo, ruta, datos = "POST", f"{ruta_plan}/finalizar-mes", {"monto": round(rnd.uniform(100, 900), 2)}
+            inicio = time.perf_counter()
+            estado, respuesta = await cliente.pedir(metodo, ruta, datos)
+            latencias.setdefault(tipo, []).append(time.perf_counter() - inicio)
+            if estado >= 400:
+                errores[estado] = errores.get(estado, 0) + 1
+            elif tipo == "finalizar" and respuesta["plan"]["mes_actual"] > PLAN["plazo"]:
+                ruta_plan = None
+    finally:
+        cliente.cerrar()
+
+async def generar_carga(host, puerto, clientes=CLIENTES, segundos=SEGUNDOS, semilla=None):
+    # Devuelve un resumen {peticiones, segundos, por_segundo, p50_ms, p99_ms, max_ms, errores, rutas}
+    semilla = semilla if semilla is not None else random.randrange(10**9)
+    latencias, errores = {}, {}
+    inicio = time.perf_counter()
+    fin = inicio + segundos
+    await asyncio.gather(*(_cliente_virtual(host, puerto, i, fin, latencias, errores, semilla) for i in range(clientes)))
+    duracion = time.perf_counter() - inicio
+
+    def resumen(valores):
+        ordenados = sorted(valores)
+        return {"peticiones": len(ordenados), "p50_ms": percentil(ordenados, 50) * 1000,
+                "p99_ms": percentil(ordenados, 99) * 1000, "max_ms": (ordenados[-1] if ordenados else 0.0) * 1000}
+
+    total = resumen([v for valores in latencias.values() for v in valores])
+    total.update(segundos=duracion, por_segundo=total["peticiones"] / duracion, clientes=clientes,
+                 errores={str(k): v for k, v in sorted(errores.items())},
+                 rutas={tipo: resumen(valores) for tipo, valores in sorted(latencias.items())})
+    return total
+
+
+# ====== SERVIDOR PROPIO ======
+def levantar_servidor(ruta_db, conexiones, fragmentos=0):
+    # Otro proceso con --puerto 0; la primera línea que imprime trae el puerto elegido.
+    # Con fragmentos > 0 los usuarios se reparten en esa cantidad de archivos junto a ruta_db
+    comando = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "servidor_api.py"),
+               "--db", ruta_db, "--puerto", "0", "--conexiones", str(conexiones)]
+    if fragmentos:
+        comando += ["--fragmentos", os.path.join(os.path.dirname(ruta_db), "fragmentos"), "--cantidad", str(fragmentos)]
+    proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, text=True)
+    linea = proceso.stdout.readline()
+    if not linea.startswith("Escuchando en "):
+        proceso.kill()
+        raise RuntimeError(f"El servidor no arrancó: {linea!r}")
+    url = urllib.parse.urlsplit(linea.split()[2])
+    return proceso, url.hostname, url.port
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para servidor_api.py")
+    parser.add_argument("--url", help="Servidor ya levantado (por defecto se levanta uno sobre una base temporal)")
+    parser.add_argument("--clientes", type=int, default=CLIENTES, help="Clientes concurrentes")
+    parser.add_argument("--segundos", type=float, default=SEGUNDOS)
+    parser.add_argument("--conexiones", type=int, default=4, help="Conexiones del servidor propio")
+    parser.add_argument("--fragmentos", type=int, default=0, help="Fragmentos del servidor propio (0 = un solo archivo)")
+    parser.add_argument("--semilla", type=int)
+    parser.add_argument("--salida", help="Guardar el resumen en JSON")
+    args = parser.parse_args()
+
+    proceso = None
+    directorio = None
+    if args.url:
+        url = urllib.parse.urlsplit(args.url)
+        host, puerto = url.hostname, url.port or 80
+    else:
+        directorio = tempfile.TemporaryDirectory()
+        proceso, host, puerto = levantar_servidor(os.path.join(directorio.name, "ahorros.db"), args.conexiones,
+                                                   args.fragmentos)
+    try:
+        r = asyncio.run(generar_carga(host, puerto, args.clientes, args.segundos, args.semilla))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+        if directorio is not None:
+            directorio.cleanup()
+
+    print(f"{r['peticiones']} peticiones de {r['clientes']} clientes en {r['segundos']:.1f} s: "
+          f"{r['por_segundo']:.0f} pet/s, p50 {r['p50_ms']:.1f} ms, p99 {r['p99_ms']:.1f} ms, máx {r['max_ms']:.1f} ms")
+    for tipo, s in r["rutas"].items():
+        print(f"  {tipo:<11} {s['peticiones']:>7} pet.  p50 {s['p50_ms']:6.1f} ms  p99 {s['p99_ms']:6.1f} ms")
+    if r["errores"]:
+        print("  Respuestas con error: " + ", ".join(f"{n} x {e}" for e, n in r["errores"].items()))
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(r, f, indent=2)
+
+if __name__ == "__main__":
+    main()
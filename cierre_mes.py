@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# cierre_mes.py
+# Cierre de mes por lotes para todos los planes vigentes (mes_actual <= plazo) de todos los usuarios.
+# Para cada plan registra el aporte del mes (del archivo de aportes o el sugerido
+# faltante / (plazo - mes_actual + 1), o el de proyeccion.py si el plan tiene interés o inflación),
+# avanza mes_actual y actualiza su estado.
+# Trabaja en transacciones por bloques de planes; cada bloque guarda un punto de control en
+# la tabla cierres_mes, así que si el proceso se cae basta con volver a ejecutarlo con el mismo --id.
+# Cada plan se escribe solo si su versión no cambió desde que se leyó el bloque: si una ventana
+# abierta lo modificó mientras tanto, se vuelve a leer solo ese plan (hasta REINTENTOS_CONFLICTO veces)
+# y se cierra con los datos nuevos; si la ventana ya cerró ese mes, no se cierra otra vez.
+# Los que siguen en conflicto se listan al final por id para cerrarlos desde la aplicación.
+#
+# Uso:
+#   python cierre_mes.py --id 2026-10
+#   python cierre_mes.py --id 2026-10 --aportes aportes.csv --solo-archivo
+#   python cierre_mes.py --id 2026-10 --simular
+import argparse
+import csv
+import datetime
+import sys
+
+from base_datos import DB_FILE, obtener_conexion, reintentar
+from dinero import CERO, Dinero, centavos
+from saldos import registrar_aporte
+import motor_ahorro
+from proyeccion import Supuestos
+
+PLANES_POR_BLOQUE = 2000
+REINTENTOS_CONFLICTO = 3
+
+# Plan con meses por cerrar y cuyo usuario no está borrado (pendiente de purga)
+_VIGENTE = "p.mes_actual <= p.plazo AND p.usuario_id NOT IN (SELECT id FROM usuarios WHERE borrado_en IS NOT NULL)"
+
+
+# ====== APORTES DESDE ARCHIVO ======
+def cargar_aportes(db, ruta):
+    # Se cargan en una tabla temporal (propia de esta conexión) para cruzarlos con SQL
+    db.ejecutar("DROP TABLE IF EXISTS temp.aportes_cierre")
+    # Montos en centavos, como en planes_ahorro
+    db.ejecutar("CREATE TEMP TABLE aportes_cierre (plan_id INTEGER PRIMARY KEY, monto INTEGER NOT NULL)")
+    with open(ruta, newline="", encoding="utf-8") as f:
+        filas = ((int(r["plan_id"]), centavos(r["monto"])) for r in csv.DictReader(f))
+        with db.transaccion():
+            db.ejecutar_muchos("INSERT OR REPLACE INTO temp.aportes_cierre (plan_id, monto) VALUES (?, ?)", filas)
+    return db.uno("SELECT COUNT(*) FROM temp.aportes_cierre")[0]
+
+
+# ====== CIERRE ======
+def _consulta_planes(con_archivo, solo_archivo, filtro):
+    if not con_archivo:
+        return f"""
+            SELECT p.id, p.meta, p.plazo, p.ahorrado, p.mes_actual, NULL,
+                   p.tasa_anual, p.inflacion_anual, p.aporte_al_inicio, p.version
+            FROM planes_ahorro p
+            WHERE {filtro}
+        """
+    union = "JOIN" if solo_archivo else "LEFT JOIN"
+    return f"""
+        SELECT p.id, p.meta, p.plazo, p.ahorrado, p.mes_actual, a.monto,
+               p.tasa_anual, p.inflacion_anual, p.aporte_al_inicio, p.version
+        FROM planes_ahorro p {union} temp.aportes_cierre a ON a.plan_id = p.id
+        WHERE {filtro}
+    """
+
+def _consulta_bloque(con_archivo, solo_archivo):
+    return _consulta_planes(con_archivo, solo_archivo, f"p.id > ? AND {_VIGENTE} ORDER BY p.id LIMIT ?")
+
+def _consulta_reintento(con_archivo, solo_archivo, cantidad):
+    # Vuelve a leer solo los planes en conflicto, con su versión actual
+    marcas = ",".join("?" * cantidad)
+    return _consulta_planes(con_archivo, solo_archivo, f"p.id IN ({marcas}) AND {_VIGENTE}")
+
+def _cambio(fila):
+    # (plan_id, mes_actual, monto, nuevo_ahorrado, estado, version) de una fila de _consulta_planes
+    plan_id, meta, plazo, ahorrado, mes_actual, monto, tasa, inflacion, al_inicio, version = fila
+    meta, ahorrado = Dinero(meta or 0), Dinero(ahorrado or 0)
+    if monto is not None:
+        monto = Dinero(monto)
+    else:
+        supuestos = Supuestos(tasa, inflacion, bool(al_inicio)) if tasa or inflacion or al_inicio else None
+        monto = motor_ahorro.aporte_sugerido_mes(meta, ahorrado, plazo, mes_actual, supuestos)
+    nuevo_ahorrado = ahorrado + monto
+    estado = motor_ahorro.estado_plan(meta, plazo, nuevo_ahorrado, mes_actual + 1)
+    return plan_id, mes_actual, monto, nuevo_ahorrado, estado, version
+
+def _aplicar_bloque(db, cambios, fecha, id_cierre, ultimo):
+    # El bloque y su punto de control se confirman juntos: o se aplica todo o nada.
+    # Devuelve los cambios aplicados (sin los planes que otra sesión modificó después de leerlos)
+    aplicados = []
+    with db.transaccion(inmediata=True):
+        for cambio in cambios:
+            plan_id, mes_actual, monto, nuevo_ahorrado, estado, version = cambio
+            cur = db.ejecutar(
+                "UPDATE planes_ahorro SET ahorrado=?, mes_actual=?, estado=?, version=version+1 WHERE id=? AND version=?",
+                (nuevo_ahorrado, mes_actual + 1, estado, plan_id, version),
+            )
+            if cur.rowcount == 1:
+                registrar_aporte(db, plan_id, mes_actual, monto.centavos, fecha)
+                aplicados.append(cambio)
+        db.ejecutar(
+            "UPDATE cierres_mes SET ultimo_plan_id=?, procesados=procesados+?, actualizado_en=? WHERE id=?",
+            (ultimo, len(aplicados), datetime.datetime.now().isoformat(timespec="seconds"), id_cierre),
+        )
+    return aplicados
+
+def _punto_de_control(db, id_cierre, fecha):
+    row = db.uno("SELECT ultimo_plan_id, procesados, terminado FROM cierres_mes WHERE id=?", (id_cierre,))
+    if row:
+        return row
+    with db.transaccion():
+        db.ejecutar("INSERT INTO cierres_mes (id, fecha, actualizado_en) VALUES (?, ?, ?)",
+                    (id_cierre, fecha, datetime.datetime.now().isoformat(timespec="seconds")))
+    return 0, 0, 0
+
+def _reintentar_conflictos(db, sql_reintento, conflictos, fecha, id_cierre, ultimo):
+    # conflictos: {plan_id: mes_actual leído}. Se relee solo esos planes y se aplican de nuevo, a lo sumo
+    # REINTENTOS_CONFLICTO veces. Un plan cuyo mes_actual cambió ya tuvo ese mes cerrado por otra sesión
+    # (o ya no está vigente) y no se toca. Devuelve (aplicados, ids que siguen en conflicto)
+    aplicados = []
+    for _ in range(REINTENTOS_CONFLICTO):
+        if not conflictos:
+            break
+        ids = list(conflictos)
+        cambios = [_cambio(fila) for fila in db.todos(sql_reintento(len(ids)), ids)
+                   if fila[4] == conflictos[fila[0]]]
+        hechos = reintentar(_aplicar_bloque, db, cambios, fecha, id_cierre, ultimo)
+        aplicados += hechos
+        cerrados = {c[0] for c in hechos}
+        conflictos = {c[0]: c[1] for c in cambios if c[0] not in cerrados}
+    return aplicados, sorted(conflictos)
+
+def cerrar_mes(id_cierre, ruta_db=DB_FILE, aportes=None, solo_archivo=False, fecha=None,
+               simular=False, tamano_bloque=PLANES_POR_BLOQUE, progreso=None):
+    # Devuelve un resumen {procesados, completados, meta_alcanzada, total_aportado, en_conflicto,
+    # ids_en_conflicto, reanudado_desde}
+    db = obtener_conexion(ruta_db)
+    fecha = fecha or datetime.date.today().isoformat()
+    if aportes:
+        cargar_aportes(db, aportes)
+
+    if simular:
+        ultimo, procesados, terminado = 0, 0, 0
+    else:
+        ultimo, procesados, terminado = _punto_de_control(db, id_cierre, fecha)
+    resumen = {"procesados": procesados, "completados": 0, "meta_alcanzada": 0,
+               "total_aportado": CERO, "en_conflicto": 0, "ids_en_conflicto": [], "reanudado_desde": ultimo}
+    if terminado:
+        return resumen
+
+    pendientes = db.uno(f"SELECT COUNT(*) FROM planes_ahorro p WHERE p.id > ? AND {_VIGENTE}", (ultimo,))[0]
+    sql = _consulta_bloque(bool(aportes), solo_archivo)
+    sql_reintento = lambda cantidad: _consulta_reintento(bool(aportes), solo_archivo, cantidad)
+    hechos = 0
+
+    while True:
+        bloque = db.todos(sql, (ultimo, tamano_bloque))
+        if not bloque:
+            break
+        cambios = [_cambio(fila) for fila in bloque]
+        ultimo = bloque[-1][0]
+
+        if simular:
+            aplicados = cambios
+        else:
+            aplicados = reintentar(_aplicar_bloque, db, cambios, fecha, id_cierre, ultimo)
+            if len(aplicados) < len(cambios):
+                cerrados = {c[0] for c in aplicados}
+                conflictos = {c[0]: c[1] for c in cambios if c[0] not in cerrados}
+                otros, pendientes_ids = _reintentar_conflictos(db, sql_reintento, conflictos, fecha, id_cierre, ultimo)
+                aplicados += otros
+                resumen["ids_en_conflicto"] += pendientes_ids
+        for _, _, monto, _, estado, _ in aplicados:
+            resumen["total_aportado"] += monto
+            if estado == motor_ahorro.PLAN_COMPLETADO:
+                resumen["completados"] += 1
+            elif estado == motor_ahorro.PLAN_META_ALCANZADA:
+                resumen["meta_alcanzada"] += 1
+        resumen["procesados"] += len(aplicados)
+        hechos += len(bloque)
+        if progreso:
+            progreso(hechos, pendientes)
+
+    resumen["en_conflicto"] = len(resumen["ids_en_conflicto"])
+    if not simular:
+        with db.transaccion():
+            db.ejecutar("UPDATE cierres_mes SET terminado=1, actualizado_en=? WHERE id=?",
+                        (datetime.datetime.now().isoformat(timespec="seconds"), id_cierre))
+    return resumen
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Cierre de mes por lotes para todos los planes vigentes")
+    parser.add_argument("--id", required=True, help="Identificador del cierre (p. ej. 2026-10); permite reanudar")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--aportes", help="CSV con columnas plan_id,monto")
+    parser.add_argument("--solo-archivo", action="store_true", help="Cerrar solo los planes que están en el archivo")
+    parser.add_argument("--fecha", help="Fecha ISO de los registros (por defecto hoy)")
+    parser.add_argument("--bloque", type=int, default=PLANES_POR_BLOQUE)
+    parser.add_argument("--simular", action="store_true", help="Calcular sin escribir nada")
+    args = parser.parse_args()
+
+    def progreso(hechos, total):
+        print(f"\r{hechos}/{total} planes", end="", file=sys.stderr, flush=True)
+
+    resumen = cerrar_mes(args.id, args.db, args.aportes, args.solo_archivo, args.fecha,
+                         args.simular, args.bloque, progreso)
+    print(file=sys.stderr)
+    if resumen["reanudado_desde"]:
+        print(f"Reanudado desde el plan {resumen['reanudado_desde']}")
+    print(f"{'Simulación: ' if args.simular else ''}{resumen['procesados']} planes cerrados, "
+          f"{resumen['completados']} completados, {resumen['meta_alcanzada']} con la meta alcanzada, "
+          f"${resumen['total_aportado']:,.2f} aportados en este lote")
+    if resumen["en_conflicto"]:
+        # Solo estos planes quedaron sin cerrar; no hay que repetir el cierre completo
+        print(f"{resumen['en_conflicto']} planes se siguieron modificando durante el cierre y no se cerraron; "
+              f"ciérralos desde la aplicación: {', '.join(map(str, resumen['ids_en_conflicto']))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# dinero.py
+# Montos en centavos enteros. La base guarda todo el dinero como INTEGER (centavos), así que
+# sumas, acumulados y comparaciones son exactas, en SQL y en Python, sin errores de coma flotante.
+# Dinero envuelve esos centavos para el código de la aplicación: suma y resta en enteros,
+# redondea al centavo (mitad hacia arriba) solo al multiplicar o dividir, y se formatea igual
+# que un float (f"{d:.2f}", f"{d:,.2f}").
+# Registrado como adaptador de sqlite3: un Dinero pasado como parámetro se guarda en centavos.
+import sqlite3
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import total_ordering
+
+_CENTAVO = Decimal("0.01")
+
+
+def centavos(valor):
+    # Pesos (str, int, float, Decimal) o Dinero -> centavos enteros; None se mantiene
+    if valor is None:
+        return None
+    if isinstance(valor, Dinero):
+        return valor.centavos
+    if isinstance(valor, int):
+        return valor * 100
+    if isinstance(valor, float):
+        # repr de un float es el decimal más corto que lo representa: 0.1 -> "0.1", no 0.1000000000000000055
+        valor = repr(valor)
+    try:
+        d = Decimal(valor.strip() if isinstance(valor, str) else valor)
+        return int(d.quantize(_CENTAVO, ROUND_HALF_UP).scaleb(2))
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError(f"Monto inválido: {valor!r}")
+
+def texto(cent):
+    # Centavos -> "1234.56" sin pasar por float (para tablas y CSV)
+    signo = "-" if cent < 0 else ""
+    cent = abs(cent)
+    return f"{signo}{cent // 100}.{cent % 100:02d}"
+
+def _dividir(cent, divisor):
+    # Cociente redondeado al centavo, mitad hacia arriba (en magnitud)
+    if isinstance(divisor, int):
+        q, r = divmod(abs(cent), abs(divisor))
+        if 2 * r >= abs(divisor):
+            q += 1
+        return q if (cent < 0) == (divisor < 0) else -q
+    return int((Decimal(cent) / Decimal(repr(float(divisor)))).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+@total_ordering
+class Dinero:
+    """Monto fijo en centavos. Dinero(12345) son $123.45; Dinero.desde("123.45") también."""
+
+    __slots__ = ("centavos",)
+
+    def __init__(self, centavos=0):
+        self.centavos = int(centavos)
+
+    @classmethod
+    def desde(cls, valor):
+        # Desde pesos: texto del formulario, número o Dinero
+        return valor if isinstance(valor, Dinero) else cls(centavos(valor))
+
+    @property
+    def pesos(self):
+        return self.centavos / 100
+
+    # ====== ARITMÉTICA ======
+    def __add__(self, otro):
+        if isinstance(otro, Dinero):
+            return Dinero(self.centavos + otro.centavos)
+        if otro == 0: # sum() empieza en 0
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, otro):
+        if isinstance(otro, Dinero):
+            return Dinero(self.centavos - otro.centavos)
+        if otro == 0:
+            return self
+        return NotImplemented
+
+    def __rsub__(self, otro):
+        if otro == 0:
+            return -self
+        return NotImplemented
+
+    def __neg__(self):
+        return Dinero(-self.centavos)
+
+    def __abs__(self):
+        return Dinero(abs(self.centavos))
+
+    def __mul__(self, factor):
+        if isinstance(factor, int):
+            return Dinero(self.centavos * factor)
+        if isinstance(factor, float):
+            return Dinero(int((Decimal(self.centavos) * Decimal(repr(factor))).quantize(Decimal(1), ROUND_HALF_UP)))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, otro):
+        # Dinero / número -> Dinero redondeado; Dinero / Dinero -> proporción (float)
+        if isinstance(otro, Dinero):
+            return self.centavos / otro.centavos
+        if isinstance(otro, (int, float)):
+            return Dinero(_dividir(self.centavos, otro))
+        return NotImplemented
+
+    def repartir(self, partes):
+        # Divide en 'partes' montos que suman exactamente lo mismo (los primeros llevan el centavo extra)
+        base, resto = divmod(self.centavos, partes)
+        return [Dinero(base + (1 if i < resto else 0)) for i in range(partes)]
+
+    # ====== COMPARACIÓN ======
+    def _cent(self, otro):
+        if isinstance(otro, Dinero):
+            return otro.centavos
+        if isinstance(otro, int):
+            return otro * 100
+        if isinstance(otro, float):
+            return round(otro * 100, 6) # 0.1 * 100 da 10.000000000000002
+        return None
+
+    def __eq__(self, otro):
+        c = self._cent(otro)
+        return NotImplemented if c is None else self.centavos == c
+
+    def __lt__(self, otro):
+        c = self._cent(otro)
+        return NotImplemented if c is None else self.centavos < c
+
+    def __hash__(self):
+        return hash(("Dinero", self.centavos))
+
+    def __bool__(self):
+        return self.centavos != 0
+
+    # ====== CONVERSIÓN ======
+    def __float__(self):
+        return self.centavos / 100
+
+    def __str__(self):
+        return texto(self.centavos)
+
+    def __repr__(self):
+        return f"Dinero('{texto(self.centavos)}')"
+
+    def __format__(self, spec):
+        # Con formato se usa Decimal para no perder exactitud: f"{d:,.2f}" -> "1,234.50"
+        if not spec:
+            return str(self)
+        return format(Decimal(self.centavos).scaleb(-2), spec)
+
+    def __reduce__(self):
+        return (Dinero, (self.centavos,))
+
+
+CERO = Dinero(0)
+
+sqlite3.register_adapter(Dinero, lambda d: d.centavos)
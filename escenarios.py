@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# escenarios.py
+# Explorador de escenarios "¿y si...?": para rangos de meta, plazo, ingreso y cada gasto calcula
+# de una vez (con NumPy, por difusión de ejes) la grilla completa de aporte mensual necesario,
+# si es alcanzable con lo disponible y cuántos meses tomaría llegar a la meta.
+# Las reglas son las mismas de motor_ahorro.calcular, aplicadas a todas las combinaciones.
+# NumPy es opcional: sin él la aplicación funciona igual, solo sin el explorador.
+from collections import namedtuple
+
+EJES = ("meta", "plazo", "ingreso", "comida", "transporte", "otros")
+MAX_CELDAS = 5_000_000 # La grilla de alcanzables ocupa un byte por escenario
+
+Rango = namedtuple("Rango", ["desde", "hasta", "pasos"])
+Grilla = namedtuple("Grilla", [
+    "ejes",              # dict eje -> valores (arreglo 1-D)
+    "aporte_necesario",  # (meta, plazo): faltante / plazo; inf si el plazo no es válido
+    "disponible",        # (ingreso, comida, transporte, otros): ingreso - gastos
+    "alcanzable",        # (meta, plazo, ingreso, comida, transporte, otros): bool
+    "meses_a_meta",      # (meta, ingreso, comida, transporte, otros): meses ahorrando todo lo disponible
+])
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("El explorador de escenarios necesita el paquete 'numpy' (pip install numpy).")
+    return numpy
+
+def disponible_numpy():
+    try:
+        _numpy()
+    except RuntimeError:
+        return False
+    return True
+
+
+# ====== RANGOS ======
+def leer_rango(texto, entero=False):
+    # "desde:hasta:pasos" o un solo número (eje de un único valor)
+    partes = [p.strip() for p in texto.split(":")]
+    if len(partes) == 1:
+        valor = float(partes[0])
+        return Rango(valor, valor, 1)
+    if len(partes) != 3:
+        raise ValueError(f"Rango inválido: {texto!r} (usa desde:hasta:pasos)")
+    desde, hasta, pasos = float(partes[0]), float(partes[1]), int(partes[2])
+    if pasos < 1:
+        raise ValueError("La cantidad de pasos debe ser al menos 1")
+    if entero:
+        pasos = min(pasos, int(abs(hasta - desde)) + 1) # Sin plazos repetidos
+    return Rango(desde, hasta, pasos)
+
+def valores(rango, entero=False):
+    np = _numpy()
+    if isinstance(rango, Rango):
+        v = np.linspace(rango.desde, rango.hasta, rango.pasos)
+    else:
+        v = np.atleast_1d(np.asarray(rango, dtype=float))
+    return np.round(v) if entero else v
+
+def celdas(rangos):
+    # Tamaño de la grilla completa sin calcularla
+    total = 1
+    for r in rangos:
+        total *= r.pasos if isinstance(r, Rango) else len(r) if hasattr(r, "__len__") else 1
+    return total
+
+
+# ====== GRILLA ======
+def calcular_grilla(meta, plazo, ingreso, comida, transporte, otros, ahorrado=0.0):
+    # Cada argumento es un Rango, una secuencia de valores o un número
+    np = _numpy()
+    ejes = {
+        "meta": valores(meta), "plazo": valores(plazo, entero=True), "ingreso": valores(ingreso),
+        "comida": valores(comida), "transporte": valores(transporte), "otros": valores(otros),
+    }
+    # Cada resultado se calcula solo sobre los ejes de los que depende; la difusión hace el resto
+    faltante = np.maximum(ejes["meta"] - ahorrado, 0.0)                      # (M,)
+    p = ejes["plazo"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aporte = np.where(p[None, :] > 0, faltante[:, None] / np.where(p > 0, p, 1.0)[None, :], np.inf)  # (M, P)
+
+    gastos = (ejes["comida"][:, None, None]
+              + ejes["transporte"][None, :, None]
+              + ejes["otros"][None, None, :])                                 # (C, T, O)
+    disponible = ejes["ingreso"][:, None, None, None] - gastos[None]        # (I, C, T, O)
+
+    # Igual que motor_ahorro.calcular: plazo válido, gastos que no superan el ingreso y aporte que cabe
+    alcanzable = (aporte[:, :, None, None, None, None] <= disponible[None, None]) & (disponible[None, None] >= 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        meses = np.where(disponible[None] > 0,
+                         np.ceil(faltante[:, None, None, None, None] / disponible[None]), np.inf)  # (M, I, C, T, O)
+    meses = np.where(faltante[:, None, None, None, None] <= 0, 0.0, meses)
+
+    return Grilla(ejes, aporte, disponible, alcanzable, meses)
+
+def porcentaje_alcanzable(grilla):
+    # Para cada (meta, plazo): % de combinaciones de ingreso y gastos con las que el plan es alcanzable
+    np = _numpy()
+    return grilla.alcanzable.reshape(grilla.alcanzable.shape[0], grilla.alcanzable.shape[1], -1).mean(axis=2, dtype=np.float32) * 100
+
+def indice_cercano(valores_eje, valor):
+    np = _numpy()
+    return int(np.abs(valores_eje - valor).argmin())
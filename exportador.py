@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# exportador.py
+# Exportación por streaming de planes y registros mensuales a CSV o NDJSON (opcionalmente .gz).
+# Las filas se leen del cursor por bloques con fetchmany, así que la memoria usada no depende
+# del tamaño de la base: sirve para volcar ahorros.db completo cada noche.
+#
+# Uso:
+#   python exportador.py salida.csv.gz --todos
+#   python exportador.py salida.ndjson --usuario ana
+#   python exportador.py salida.csv --plan 12 --db otra.db
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import urllib.parse
+
+from base_datos import DB_FILE, BUSY_TIMEOUT_MS, obtener_conexion
+
+FILAS_POR_LOTE = 5000
+
+COLUMNAS = [
+    "usuario", "plan_id", "meta", "plazo", "ingreso", "comida", "transporte", "otros",
+    "ahorrado", "mes_actual", "fecha_inicio", "mes", "monto", "fecha", "acumulado",
+]
+
+def _pesos(columna):
+    # Centavos -> texto "1234.56" en el propio SQL, sin pasar por REAL (como dinero.texto).
+    # La división y el % de SQLite truncan hacia cero, así que se formatea el valor absoluto con su signo
+    return (f"CASE WHEN {columna} IS NULL THEN NULL ELSE printf('%s%d.%02d', CASE WHEN {columna} < 0 THEN '-' ELSE '' END, "
+            f"abs({columna}) / 100, abs({columna}) % 100) END")
+
+# La base guarda centavos; el archivo sale en pesos con dos decimales exactos
+_CONSULTA = f"""
+    SELECT u.nombre, p.id, {_pesos("p.meta")}, p.plazo, {_pesos("p.ingreso")}, {_pesos("p.comida")},
+           {_pesos("p.transporte")}, {_pesos("p.otros")}, {_pesos("p.ahorrado")}, p.mes_actual, p.fecha_inicio,
+           a.mes, {_pesos("a.monto")}, a.fecha, {_pesos("a.acumulado")}
+    FROM planes_ahorro p
+    JOIN usuarios u ON u.id = p.usuario_id
+    LEFT JOIN ahorros_mensuales a ON a.plan_id = p.id
+    {{filtro}}
+    ORDER BY p.id, a.mes, a.id
+"""
+
+
+# ====== LECTURA ======
+def abrir_solo_lectura(ruta_db=DB_FILE):
+    # Conexión propia de solo lectura: en modo WAL no bloquea a los escritores
+    uri = "file:" + urllib.parse.quote(os.path.abspath(ruta_db)) + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_MS / 1000)
+
+def iterar_filas(cur, tamano_lote=FILAS_POR_LOTE):
+    # Recorre un cursor ya ejecutado sin cargar todas las filas en memoria
+    while True:
+        lote = cur.fetchmany(tamano_lote)
+        if not lote:
+            return
+        yield from lote
+
+def _filtro(usuario=None, plan_id=None):
+    # Los usuarios borrados (pendientes de purga) nunca se exportan
+    if plan_id is not None:
+        return "WHERE p.id = ? AND u.borrado_en IS NULL", (plan_id,)
+    if usuario is not None:
+        if isinstance(usuario, int):
+            return "WHERE p.usuario_id = ? AND u.borrado_en IS NULL", (usuario,)
+        return "WHERE u.nombre = ? AND u.borrado_en IS NULL", (usuario,)
+    return "WHERE u.borrado_en IS NULL", ()
+
+def contar_filas(conn, usuario=None, plan_id=None):
+    filtro, params = _filtro(usuario, plan_id)
+    sql = f"""
+        SELECT COUNT(*) FROM planes_ahorro p
+        JOIN usuarios u ON u.id = p.usuario_id
+        LEFT JOIN ahorros_mensuales a ON a.plan_id = p.id
+        {filtro}
+    """
+    return conn.execute(sql, params).fetchone()[0]
+
+
+# ====== ESCRITURA ======
+def _abrir(destino, comprimir):
+    if comprimir is None:
+        comprimir = destino.endswith(".gz")
+    if comprimir:
+        return gzip.open(destino, "wt", newline="", encoding="utf-8", compresslevel=6)
+    return open(destino, "w", newline="", encoding="utf-8")
+
+def exportar(destino, formato=None, usuario=None, plan_id=None, ruta_db=DB_FILE,
+             comprimir=None, progreso=None, tamano_lote=FILAS_POR_LOTE):
+    # usuario: id o nombre; sin usuario ni plan_id se exporta la base completa.
+    # progreso(filas_escritas, filas_totales) se llama una vez por lote.
+    if formato is None:
+        formato = "ndjson" if ".ndjson" in destino or ".jsonl" in destino else "csv"
+    if formato not in ("csv", "ndjson"):
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    conn = abrir_solo_lectura(ruta_db)
+    try:
+        total = contar_filas(conn, usuario, plan_id) if progreso else 0
+        filtro, params = _filtro(usuario, plan_id)
+        cur = conn.execute(_CONSULTA.format(filtro=filtro), params)
+        escritas = 0
+        with _abrir(destino, comprimir) as f:
+            if formato == "csv":
+                writer = csv.writer(f)
+                writer.writerow(COLUMNAS)
+                escribir = writer.writerows
+            else:
+                def escribir(lote):
+                    f.writelines(json.dumps(dict(zip(COLUMNAS, fila)), ensure_ascii=False) + "\n" for fila in lote)
+            while True:
+                lote = cur.fetchmany(tamano_lote)
+                if not lote:
+                    break
+                escribir(lote)
+                escritas += len(lote)
+                if progreso:
+                    progreso(escritas, total)
+    finally:
+        conn.close()
+    return escritas
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Exporta planes y ahorros mensuales a CSV o NDJSON")
+    parser.add_argument("destino", help="Archivo de salida (.csv, .ndjson; agrega .gz para comprimir)")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--formato", choices=["csv", "ndjson"])
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--usuario", help="Nombre del usuario a exportar")
+    grupo.add_argument("--plan", type=int, help="Id del plan a exportar")
+    grupo.add_argument("--todos", action="store_true", help="Toda la base (por defecto)")
+    args = parser.parse_args()
+
+    obtener_conexion(args.db) # Aplica migraciones pendientes antes de leer
+    filas = exportar(args.destino, args.formato, usuario=args.usuario, plan_id=args.plan, ruta_db=args.db)
+    print(f"{filas} filas exportadas a {args.destino}")
+
+if __name__ == "__main__":
+    main()
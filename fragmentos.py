@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# fragmentos.py
+# Modo de almacenamiento opcional con los datos repartidos en varios archivos (fragmentos).
+# Con un solo ahorros.db todas las escrituras de todos los usuarios esperan el mismo bloqueo de
+# SQLite. Aquí cada usuario vive en un fragmento (un grupo de usuarios por id, o un archivo por
+# usuario con por_usuario=True) y los usuarios de fragmentos distintos escriben sin esperarse.
+#
+# catalogo.db guarda los usuarios (registro e inicio de sesión) y el fragmento de cada uno. La
+# asignación se guarda al registrar al usuario, así que cambiar la cantidad de fragmentos solo
+# reparte a los usuarios nuevos. Cada fragmento tiene el esquema completo (migraciones.py) con una
+# copia de la fila del usuario para las claves foráneas. Los ids de plan son propios de cada
+# fragmento: a un plan siempre se llega por su usuario.
+# Las consultas de administración sobre todos los fragmentos corren en paralelo, cada una con su
+# conexión de solo lectura.
+#
+# La ventana (proyecto.py) sigue usando ahorros.db; servidor_api.py usa fragmentos con --fragmentos.
+#
+# Uso:
+#   python fragmentos.py --directorio datos --resumen
+#   python fragmentos.py --directorio datos --consulta "SELECT COUNT(*) FROM ahorros_mensuales"
+#   python fragmentos.py --medir-escrituras 8 --cierres 200
+import argparse
+import datetime
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import borrado
+from base_datos import ConexionDB
+from cache_plan import CachePlan
+from dinero import Dinero, texto
+from exportador import abrir_solo_lectura
+
+CATALOGO = "catalogo.db"
+CANTIDAD = 16          # Fragmentos para los usuarios nuevos
+MAX_ABIERTAS = 64      # Conexiones a fragmentos que guarda cada hilo (importa con un archivo por usuario)
+HILOS_CONSULTA = 8     # Fragmentos consultados a la vez en las consultas globales
+
+
+# ====== ENRUTADOR ======
+class Enrutador:
+    """Catálogo de usuarios y conexiones al fragmento de cada uno."""
+
+    def __init__(self, directorio=".", cantidad=CANTIDAD, por_usuario=False):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.cantidad = cantidad
+        self.por_usuario = por_usuario
+        # El catálogo usa el esquema normal; de sus tablas solo se llena usuarios
+        self.catalogo = ConexionDB(os.path.join(directorio, CATALOGO))
+        with self.catalogo.transaccion():
+            self.catalogo.ejecutar("""
+                CREATE TABLE IF NOT EXISTS fragmentos_usuarios (
+                    usuario_id INTEGER PRIMARY KEY REFERENCES usuarios(id) ON DELETE CASCADE,
+                    fragmento TEXT NOT NULL
+                )
+            """)
+        self._asignados = {}            # usuario_id -> fragmento (no cambia nunca)
+        self._locales = threading.local() # Conexiones de cada hilo: fragmento -> ConexionDB
+        self._abiertas = set()
+        self._lock = threading.Lock()
+
+    # ====== RUTAS ======
+    def nuevo_fragmento(self, usuario_id):
+        # Fragmento para un usuario recién registrado
+        if self.por_usuario:
+            return f"u{usuario_id}"
+        return f"{usuario_id % self.cantidad:03d}"
+
+    def ruta(self, fragmento):
+        return os.path.join(self.directorio, f"ahorros_{fragmento}.db")
+
+    def fragmento_de(self, usuario_id):
+        # None si el usuario no está en el catálogo
+        fragmento = self._asignados.get(usuario_id)
+        if fragmento is None:
+            row = self.catalogo.uno("SELECT fragmento FROM fragmentos_usuarios WHERE usuario_id=?", (usuario_id,))
+            if row is None:
+                return None
+            fragmento = self._asignados[usuario_id] = row[0]
+        return fragmento
+
+    def fragmento_de_nombre(self, nombre):
+        # (usuario_id, fragmento) o None
+        row = self.catalogo.uno("""
+            SELECT u.id, f.fragmento FROM usuarios u JOIN fragmentos_usuarios f ON f.usuario_id = u.id
+            WHERE u.nombre=? AND u.borrado_en IS NULL
+        """, (nombre,))
+        return tuple(row) if row else None
+
+    def fragmentos(self):
+        # Fragmentos con al menos un usuario, incluidos los borrados pendientes de purga
+        return [r[0] for r in self.catalogo.todos("SELECT DISTINCT fragmento FROM fragmentos_usuarios ORDER BY fragmento")]
+
+    # ====== CONEXIONES ======
+    def _abrir(self, fragmento):
+        # Cada hilo tiene sus conexiones: dos hilos en fragmentos distintos no comparten ningún bloqueo
+        abiertas = getattr(self._locales, "abiertas", None)
+        if abiertas is None:
+            abiertas = self._locales.abiertas = OrderedDict()
+        db = abiertas.get(fragmento)
+        if db is not None:
+            abiertas.move_to_end(fragmento)
+            return db
+        db = ConexionDB(self.ruta(fragmento)) # Migra si el fragmento es nuevo o quedó atrás
+        abiertas[fragmento] = db
+        with self._lock:
+            self._abiertas.add(db)
+        if len(abiertas) > MAX_ABIERTAS:
+            _, vieja = abiertas.popitem(last=False)
+            with self._lock:
+                self._abiertas.discard(vieja)
+            vieja.cerrar()
+        return db
+
+    def conexion(self, usuario_id):
+        # Conexión de este hilo al fragmento del usuario
+        fragmento = self.fragmento_de(usuario_id)
+        if fragmento is None:
+            raise LookupError(f"El usuario {usuario_id} no está en el catálogo")
+        return self._abrir(fragmento)
+
+    def cerrar(self):
+        with self._lock:
+            for db in self._abiertas:
+                db.cerrar()
+            self._abiertas.clear()
+        self._locales = threading.local()
+        self.catalogo.cerrar()
+
+    # ====== USUARIOS ======
+    def crear_usuario(self, nombre, contrasena):
+        # Devuelve el id; sqlite3.IntegrityError si el nombre ya existe
+        with self.catalogo.transaccion():
+            usuario_id = self.catalogo.ejecutar(
+                "INSERT INTO usuarios (nombre, contrasena) VALUES (?, ?)", (nombre, contrasena)).lastrowid
+            fragmento = self.nuevo_fragmento(usuario_id)
+            self.catalogo.ejecutar("INSERT INTO fragmentos_usuarios (usuario_id, fragmento) VALUES (?, ?)",
+                                   (usuario_id, fragmento))
+        self._asignados[usuario_id] = fragmento
+        # La copia en el fragmento solo lleva id y nombre: la contraseña queda en el catálogo
+        db = self._abrir(fragmento)
+        with db.transaccion():
+            db.ejecutar("INSERT OR IGNORE INTO usuarios (id, nombre) VALUES (?, ?)", (usuario_id, nombre))
+        return usuario_id
+
+    def iniciar_sesion(self, nombre, contrasena):
+        # usuario_id o None; misma comprobación que la ventana de inicio de sesión
+        row = self.catalogo.uno("SELECT id, contrasena FROM usuarios WHERE nombre=? AND borrado_en IS NULL", (nombre,))
+        return row[0] if row and row[1] == contrasena else None
+
+    def borrar_usuario(self, usuario_id, **opciones):
+        # Marca en el catálogo (desaparece para el inicio de sesión) y purga en su fragmento
+        borrado.marcar_borrado(self.catalogo, usuario_id)
+        fragmento = self.fragmento_de(usuario_id)
+        registros = borrado.borrar_usuario(self._abrir(fragmento), usuario_id, **opciones) if fragmento else 0
+        with self.catalogo.transaccion():
+            self.catalogo.ejecutar("DELETE FROM usuarios WHERE id=?", (usuario_id,))
+        self._asignados.pop(usuario_id, None)
+        return registros
+
+    # ====== CONSULTAS GLOBALES ======
+    def consulta_global(self, sql, params=(), hilos=HILOS_CONSULTA):
+        # Ejecuta sql en todos los fragmentos a la vez; devuelve [(fragmento, filas)] en orden de fragmento.
+        # sqlite3 suelta el GIL mientras SQLite trabaja, así que los hilos avanzan de verdad en paralelo
+        def consultar(fragmento):
+            conn = abrir_solo_lectura(self.ruta(fragmento))
+            try:
+                return fragmento, conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+
+        fragmentos = [f for f in self.fragmentos() if os.path.exists(self.ruta(f))]
+        with ThreadPoolExecutor(max_workers=max(1, min(hilos, len(fragmentos)))) as pool:
+            return list(pool.map(consultar, fragmentos))
+
+    def resumen(self):
+        # Totales por fragmento y globales: usuarios, planes, planes activos, registros y ahorrado (centavos)
+        por_fragmento = self.consulta_global("""
+            SELECT (SELECT COUNT(*) FROM usuarios WHERE borrado_en IS NULL),
+                   COUNT(*), COALESCE(SUM(estado = 'activo'), 0),
+                   (SELECT COUNT(*) FROM ahorros_mensuales),
+                   COALESCE(SUM(ahorrado), 0)
+            FROM planes_ahorro
+        """)
+        filas = [(fragmento,) + tuple(filas[0]) for fragmento, filas in por_fragmento]
+        total = tuple(sum(f[i] for f in filas) for i in range(1, 6))
+        return filas, total
+
+
+# ====== MEDICIÓN DE ESCRITURAS ======
+def _escritor(directorio, cantidad, usuario_id, plan_id, cierres, barrera, resultados):
+    # Proceso hijo: cierra meses de su propio plan lo más rápido que puede
+    enrutador = Enrutador(directorio, cantidad)
+    cache = CachePlan(enrutador.conexion(usuario_id))
+    cache.cargar(plan_id)
+    barrera.wait()
+    inicio = time.perf_counter()
+    hoy = datetime.date.today().isoformat()
+    for _ in range(cierres):
+        cache.registrar_aporte(Dinero(10000), hoy, cache.plan.mes_actual)
+    resultados.put(time.perf_counter() - inicio)
+    enrutador.cerrar()
+
+def medir_escrituras(procesos, cierres, cantidad):
+    # Cierres por segundo con N procesos (un usuario cada uno) en un fragmento y en 'cantidad' fragmentos.
+    # Devuelve [(fragmentos, cierres_por_segundo)]
+    contexto = multiprocessing.get_context("spawn")
+    resultados = []
+    for n in (1, cantidad):
+        directorio = tempfile.mkdtemp(prefix="fragmentos_")
+        try:
+            enrutador = Enrutador(directorio, n)
+            planes = []
+            for i in range(procesos):
+                usuario_id = enrutador.crear_usuario(f"escritor{i}", "")
+                plan = CachePlan(enrutador.conexion(usuario_id)).crear(
+                    usuario_id, Dinero(cierres * 10000), cierres, Dinero(100000), 0, 0, 0, 0,
+                    datetime.date.today().isoformat())
+                planes.append((usuario_id, plan.id))
+            enrutador.cerrar()
+
+            barrera = contexto.Barrier(procesos)
+            cola = contexto.Queue()
+            hijos = [contexto.Process(target=_escritor, args=(directorio, n, u, p, cierres, barrera, cola))
+                     for u, p in planes]
+            for h in hijos:
+                h.start()
+            segundos = max(cola.get() for _ in hijos)
+            for h in hijos:
+                h.join()
+            resultados.append((n, procesos * cierres / segundos))
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+    return resultados
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Administración de la base repartida en fragmentos")
+    parser.add_argument("--directorio", default="fragmentos", help="Carpeta con catalogo.db y los fragmentos")
+    parser.add_argument("--cantidad", type=int, default=CANTIDAD, help="Fragmentos para los usuarios nuevos")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--resumen", action="store_true", help="Totales por fragmento")
+    grupo.add_argument("--consulta", metavar="SQL", help="Consulta de solo lectura en todos los fragmentos")
+    grupo.add_argument("--medir-escrituras", type=int, metavar="N",
+                       help="N procesos cerrando meses: un fragmento contra --cantidad fragmentos")
+    parser.add_argument("--cierres", type=int, default=200, help="Cierres por proceso al medir")
+    args = parser.parse_args()
+
+    if args.medir_escrituras:
+        base = None
+        for n, por_segundo in medir_escrituras(args.medir_escrituras, args.cierres, args.cantidad):
+            base = base or por_segundo
+            print(f"{n:>4} fragmentos: {por_segundo:8.0f} cierres/s  (x{por_segundo / base:.1f})")
+        return
+
+    enrutador = Enrutador(args.directorio, args.cantidad)
+    try:
+        if args.resumen:
+            filas, total = enrutador.resumen()
+            print(f"{'Fragmento':<10} {'Usuarios':>9} {'Planes':>8} {'Activos':>8} {'Registros':>10} {'Ahorrado':>16}")
+            for fragmento, usuarios, planes, activos, registros, ahorrado in filas + [("Total",) + total]:
+                print(f"{fragmento:<10} {usuarios:>9} {planes:>8} {activos:>8} {registros:>10} {texto(ahorrado):>16}")
+        else:
+            try:
+                for fragmento, filas in enrutador.consulta_global(args.consulta):
+                    for fila in filas:
+                        print(fragmento, *fila, sep="\t")
+            except sqlite3.Error as e:
+                parser.error(f"La consulta falló: {e}")
+    finally:
+        enrutador.cerrar()
+
+if __name__ == "__main__":
+    main()
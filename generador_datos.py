@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# generador_datos.py
+# Llena una base con el esquema de ahorros.db con datos sintéticos: N usuarios, M planes y
+# K registros mensuales repartidos con distribuciones realistas (ingresos log-normales,
+# gastos como fracción del ingreso, pocos planes con historiales muy largos).
+#
+# Uso:
+#   python generador_datos.py prueba.db --usuarios 1000 --planes 3000 --meses 100000
+import argparse
+import datetime
+import math
+import random
+
+from base_datos import obtener_conexion
+
+FILAS_POR_LOTE = 50000
+DIAS_DISPONIBLES = 2_900_000 # Margen de fechas para no pasar del año 9999
+
+
+# ====== DISTRIBUCIONES ======
+def _repartir(total, partes, rnd, alfa=1.3):
+    # Reparte total entre partes con pesos de Pareto (cola larga) y al menos 1 cuando alcanza
+    if partes == 0:
+        return []
+    pesos = [rnd.paretovariate(alfa) for _ in range(partes)]
+    suma = sum(pesos)
+    minimo = 1 if total >= partes else 0
+    resto = total - minimo * partes
+    cantidades = [minimo + int(resto * p / suma) for p in pesos]
+    # Lo que se perdió al redondear va a los primeros
+    faltan = total - sum(cantidades)
+    for i in range(faltan):
+        cantidades[i % partes] += 1
+    return cantidades
+
+def _plan_aleatorio(rnd, meses):
+    # Montos en centavos enteros, como se guardan en la base
+    ingreso = round(rnd.lognormvariate(math.log(1500), 0.5) * 100)
+    comida = round(ingreso * rnd.uniform(0.15, 0.35))
+    transporte = round(ingreso * rnd.uniform(0.05, 0.15))
+    otros = round(ingreso * rnd.uniform(0.05, 0.25))
+    # La mayoría de los planes siguen en curso; algunos ya cumplieron el plazo
+    plazo = max(meses + rnd.choice([0, 1, 3, 6, 12, 24]), rnd.choice([6, 12, 18, 24, 36, 48, 60]))
+    disponible = max(ingreso - comida - transporte - otros, 100)
+    meta = round(disponible * plazo * rnd.uniform(0.4, 0.9))
+    ahorrado_inicial = round(rnd.choice([0, 0, 0, meta * rnd.uniform(0.0, 0.2)]))
+    return meta, plazo, ingreso, comida, transporte, otros, ahorrado_inicial
+
+
+# ====== GENERACIÓN ======
+def generar(ruta_db, usuarios, planes, meses, semilla=1234):
+    rnd = random.Random(semilla)
+    db = obtener_conexion(ruta_db)
+
+    planes_por_usuario = _repartir(planes, usuarios, rnd)
+    meses_por_plan = _repartir(meses, planes, rnd)
+
+    with db.transaccion():
+        base_usuario = db.uno("SELECT COALESCE(MAX(id), 0) FROM usuarios")[0]
+        db.ejecutar_muchos(
+            "INSERT INTO usuarios (id, nombre, contrasena) VALUES (?, ?, ?)",
+            ((base_usuario + i + 1, f"usuario_{base_usuario + i + 1}", "clave") for i in range(usuarios)),
+        )
+        base_plan = db.uno("SELECT COALESCE(MAX(id), 0) FROM planes_ahorro")[0]
+
+        filas_planes = []
+        registros = []
+        plan_id = base_plan
+        k = 0
+        for u, cantidad in enumerate(planes_por_usuario):
+            for _ in range(cantidad):
+                plan_id += 1
+                n = meses_por_plan[k]; k += 1
+                meta, plazo, ingreso, comida, transporte, otros, inicial = _plan_aleatorio(rnd, n)
+                disponible = max(ingreso - comida - transporte - otros, 100)
+                paso_dias = max(1, min(30, DIAS_DISPONIBLES // max(n, 1)))
+                inicio = datetime.date(2000, 1, 1) + datetime.timedelta(days=rnd.randrange(0, 9000))
+                acumulado = 0
+                for mes in range(1, n + 1):
+                    # Aporte alrededor de lo necesario, a veces nada y a veces un extra
+                    monto = max(0, round(rnd.gauss(meta / plazo, disponible * 0.2)))
+                    if rnd.random() < 0.05:
+                        monto = 0
+                    acumulado += monto
+                    fecha = inicio + datetime.timedelta(days=paso_dias * mes)
+                    registros.append((plan_id, mes, monto, fecha.isoformat(), acumulado))
+                ahorrado = inicial + acumulado
+                mes_actual = n + 1
+                estado = "completado" if mes_actual > plazo else ("meta_alcanzada" if ahorrado >= meta else "activo")
+                filas_planes.append((plan_id, base_usuario + u + 1, meta, plazo, ingreso, comida, transporte, otros,
+                                     ahorrado, inicial, mes_actual, inicio.isoformat(), estado))
+                if len(registros) >= FILAS_POR_LOTE:
+                    _volcar(db, filas_planes, registros)
+        _volcar(db, filas_planes, registros)
+    return usuarios, planes, meses
+
+def _volcar(db, filas_planes, registros):
+    db.ejecutar_muchos("""
+        INSERT INTO planes_ahorro (id, usuario_id, meta, plazo, ingreso, comida, transporte, otros,
+                                   ahorrado, ahorrado_inicial, mes_actual, fecha_inicio, estado)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, filas_planes)
+    db.ejecutar_muchos(
+        "INSERT INTO ahorros_mensuales (plan_id, mes, monto, fecha, acumulado) VALUES (?, ?, ?, ?, ?)",
+        registros,
+    )
+    filas_planes.clear()
+    registros.clear()
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos para ahorros.db")
+    parser.add_argument("destino")
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--planes", type=int, default=300)
+    parser.add_argument("--meses", type=int, default=10000, help="Total de registros mensuales")
+    parser.add_argument("--semilla", type=int, default=1234)
+    args = parser.parse_args()
+    generar(args.destino, args.usuarios, args.planes, args.meses, args.semilla)
+    print(f"{args.usuarios} usuarios, {args.planes} planes y {args.meses} meses generados en {args.destino}")
+
+if __name__ == "__main__":
+    main()
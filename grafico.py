@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# grafico.py
+# Gráfico de progreso del ahorro embebido en la ventana principal.
+# Los artistas (línea acumulada, meta y ruta ideal) se crean una sola vez y luego
+# solo se actualizan sus datos; añadir un mes se pinta con blitting.
+# Encima se pueden superponer las bandas de percentiles de la simulación (simulacion.py).
+import matplotlib
+matplotlib.use("QtAgg")
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+NOMBRES_MESES = [
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+]
+
+MAX_ETIQUETAS = 12 # Con planes largos solo se rotulan algunos meses
+
+
+class GraficoAhorro:
+    def __init__(self):
+        self.figure = Figure(figsize=(6, 2.5), tight_layout=True)
+        self.canvas = FigureCanvas(self.figure)
+        self.ax = self.figure.add_subplot(111)
+
+        self.mes_inicio = 1
+        self.acumulados = []
+        self.meta = 0.0
+        self.plazo = 0
+        self._estado = None  # Firma de lo último dibujado, para no repetir redibujos
+        self._fondo = None   # Región copiada para blitting
+        self._bandas = []    # Artistas de la simulación superpuesta (si hay)
+        self._tope_bandas = 0.0
+        self._tope_ideal = 0.0   # Con inflación la ruta ideal termina por encima de la meta
+
+        # Artistas persistentes: solo cambian sus datos y visibilidad
+        self.linea_acumulada, = self.ax.plot([], [], marker='o', linewidth=2, label="Ahorro Acumulado", animated=True)
+        self.linea_meta = self.ax.axhline(0, color='r', linestyle='--', label="Meta")
+        self.linea_ideal, = self.ax.plot([], [], color='g', linestyle=':', label="Ruta Ideal")
+        self.texto_vacio = self.ax.text(0.5, 0.5, "Sin datos de ahorro aún", transform=self.ax.transAxes,
+                                        horizontalalignment='center', verticalalignment='center',
+                                        fontsize=12, color='gray')
+
+        self.ax.xaxis.set_major_locator(MaxNLocator(nbins=MAX_ETIQUETAS, integer=True))
+        self.ax.xaxis.set_major_formatter(FuncFormatter(self._etiqueta_mes))
+        self.ax.tick_params(axis='x', labelrotation=45, labelsize=8)
+        self.ax.set_ylabel("Monto Acumulado ($)")
+        self.ax.set_title("Progreso del Ahorro")
+        self.ax.grid(True, linestyle='--', alpha=0.4)
+        self.leyenda = self.ax.legend(loc='upper left', fontsize='small')
+
+        self.canvas.mpl_connect("draw_event", self._al_dibujar)
+
+    def _etiqueta_mes(self, x, _pos):
+        i = int(round(x))
+        if i < 0:
+            return ""
+        return NOMBRES_MESES[(self.mes_inicio + i - 1) % 12]
+
+    # ====== DIBUJO ======
+    def _al_dibujar(self, _evento):
+        # Tras un dibujo completo se guarda el fondo y se pinta encima la línea animada
+        self._fondo = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.ax.draw_artist(self.linea_acumulada)
+
+    def _blit(self):
+        if self._fondo is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._fondo)
+        self.ax.draw_artist(self.linea_acumulada)
+        self.canvas.blit(self.figure.bbox)
+
+    def _limites(self):
+        n = max(len(self.acumulados), self.plazo, 1)
+        tope = max([self.meta, self._tope_ideal, self._tope_bandas] + self.acumulados + [0.0])
+        return (-0.5, n - 0.5), (min(0.0, min(self.acumulados, default=0.0)), tope * 1.1 if tope > 0 else 1.0)
+
+    def _dibujo_completo(self):
+        xlim, ylim = self._limites()
+        self.ax.set_xlim(*xlim)
+        self.ax.set_ylim(*ylim)
+        self.canvas.draw_idle()
+
+    # ====== API ======
+    def mostrar_sin_datos(self):
+        estado = ("vacio",)
+        if estado == self._estado:
+            return
+        self._estado = estado
+        self._quitar_bandas()
+        self.acumulados = []
+        self.linea_acumulada.set_data([], [])
+        self.linea_meta.set_visible(False)
+        self.linea_ideal.set_visible(False)
+        self.leyenda.set_visible(False)
+        self.texto_vacio.set_visible(True)
+        self.ax.xaxis.set_visible(False)
+        self.ax.yaxis.set_visible(False)
+        self.ax.grid(False)
+        self.ax.set_title("")
+        self.canvas.draw_idle()
+
+    def mostrar_serie(self, acumulados, meta, plazo, mes_inicio, ruta_ideal=None):
+        # ruta_ideal: valores mes a mes (proyeccion.py); sin ella, una recta hasta la meta
+        ruta_ideal = tuple(ruta_ideal) if ruta_ideal is not None else None
+        estado = ("serie", tuple(acumulados), meta, plazo, mes_inicio, ruta_ideal)
+        if estado == self._estado:
+            return
+        self._estado = estado
+        self._quitar_bandas() # La simulación era del plan como estaba antes
+        self.acumulados = list(acumulados)
+        self.meta = meta or 0.0
+        self.plazo = plazo or 0
+        self.mes_inicio = mes_inicio
+
+        self.linea_acumulada.set_data(range(len(self.acumulados)), self.acumulados)
+        self.linea_meta.set_ydata([self.meta, self.meta])
+        self.linea_meta.set_visible(self.meta > 0)
+        self._tope_ideal = max(ruta_ideal) if ruta_ideal else 0.0
+        if ruta_ideal:
+            self.linea_ideal.set_data(range(len(ruta_ideal)), ruta_ideal)
+            self.linea_ideal.set_visible(True)
+        elif self.plazo > 0:
+            paso = self.meta / self.plazo
+            n = max(self.plazo, len(self.acumulados))
+            self.linea_ideal.set_data(range(n), [paso * (i + 1) for i in range(n)])
+            self.linea_ideal.set_visible(True)
+        else:
+            self.linea_ideal.set_visible(False)
+
+        self.texto_vacio.set_visible(False)
+        self.leyenda.set_visible(True)
+        self.ax.xaxis.set_visible(True)
+        self.ax.yaxis.set_visible(True)
+        self.ax.grid(True, linestyle='--', alpha=0.4)
+        self.ax.set_title("Progreso del Ahorro")
+        self._dibujo_completo()
+
+    def agregar_punto(self, acumulado):
+        # Camino rápido tras finalizar_mes: el punto cabe en los ejes actuales
+        if not self._estado or self._estado[0] != "serie":
+            return False
+        hubo_bandas = self._quitar_bandas()
+        self.acumulados.append(acumulado)
+        self._estado = ("serie", tuple(self.acumulados), self.meta, self.plazo, self.mes_inicio, self._estado[5])
+        self.linea_acumulada.set_data(range(len(self.acumulados)), self.acumulados)
+
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        x = len(self.acumulados) - 1
+        if x0 <= x <= x1 and y0 <= acumulado <= y1 and not hubo_bandas:
+            self._blit()
+        else:
+            self._dibujo_completo()
+        return True
+
+    def mostrar_bandas(self, desde, bandas):
+        # bandas: percentil -> valores desde el índice de mes 'desde' (5, 25, 50, 75 y 95)
+        self._quitar_bandas()
+        x = range(desde, desde + len(bandas[50]))
+        self._bandas = [
+            self.ax.fill_between(x, bandas[5], bandas[95], color='tab:blue', alpha=0.12, linewidth=0, label="Simulación p5-p95"),
+            self.ax.fill_between(x, bandas[25], bandas[75], color='tab:blue', alpha=0.25, linewidth=0, label="Simulación p25-p75"),
+            self.ax.plot(x, bandas[50], color='tab:blue', linestyle='-.', linewidth=1, label="Simulación mediana")[0],
+        ]
+        self._tope_bandas = max(bandas[95], default=0.0)
+        self.leyenda = self.ax.legend(loc='upper left', fontsize='small')
+        self._dibujo_completo()
+
+    def _quitar_bandas(self):
+        if not self._bandas:
+            return False
+        for artista in self._bandas:
+            artista.remove()
+        self._bandas = []
+        self._tope_bandas = 0.0
+        self.leyenda = self.ax.legend(loc='upper left', fontsize='small')
+        self.leyenda.set_visible(self._estado is not None and self._estado[0] == "serie")
+        return True
+
+
+class MapaEscenarios:
+    """Mapa de calor meta × plazo del explorador de escenarios (escenarios.py)."""
+
+    def __init__(self):
+        self.figure = Figure(figsize=(6, 2.5), tight_layout=True)
+        self.canvas = FigureCanvas(self.figure)
+        self.ax = self.figure.add_subplot(111)
+        self.imagen = None      # Se crea con el primer dato y después solo cambia su contenido
+        self.marca, = self.ax.plot([], [], marker='x', color='black', markersize=10, linestyle='', label="Plan actual")
+        self.ax.set_xlabel("Plazo (meses)")
+        self.ax.set_ylabel("Meta ($)")
+        self.ax.set_title("% de escenarios de ingreso y gastos en que la meta es alcanzable", fontsize=9)
+        # tight_layout en cada dibujo duplica el costo de redibujar: se calcula en el primero
+        # y al cambiar el tamaño, y entre medio la distribución queda fija
+        self._distribuido = False
+        self.canvas.mpl_connect("draw_event", self._fijar_distribucion)
+        self.canvas.mpl_connect("resize_event", lambda _e: self.figure.tight_layout())
+
+    def _fijar_distribucion(self, _evento):
+        if not self._distribuido:
+            self._distribuido = True
+            self.figure.set_layout_engine("none")
+
+    def mostrar(self, porcentajes, plazos, metas, actual=None):
+        # porcentajes: arreglo (metas, plazos) con valores 0-100; actual: (plazo, meta) del plan cargado
+        extension = (plazos[0], plazos[-1], metas[0], metas[-1])
+        if self.imagen is None:
+            self.imagen = self.ax.imshow(porcentajes, origin="lower", aspect="auto", extent=extension,
+                                         cmap="RdYlGn", vmin=0, vmax=100, interpolation="nearest")
+            self.figure.colorbar(self.imagen, ax=self.ax, label="% alcanzable")
+        else:
+            self.imagen.set_data(porcentajes)
+            self.imagen.set_extent(extension)
+        # Un solo valor en un eje: se ensancha para que la franja se vea
+        x0, x1 = (extension[0] - 0.5, extension[1] + 0.5) if extension[0] == extension[1] else extension[:2]
+        y0, y1 = (extension[2] - 0.5, extension[3] + 0.5) if extension[2] == extension[3] else extension[2:]
+        self.ax.set_xlim(x0, x1)
+        self.ax.set_ylim(y0, y1)
+        self.marca.set_data(([actual[0]], [actual[1]]) if actual else ([], []))
+        self.canvas.draw_idle()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# importador.py
+# Importación masiva del historial de ahorros mensuales desde CSV o NDJSON.
+# Cada fila trae (plan_id, mes, monto, fecha), con el monto en pesos como lo escribe exportador.py
+# ("1234.56"; también número en NDJSON). El archivo se valida primero en una pasada
+# por streaming y, si no hay errores, se carga en una sola transacción con executemany.
+# Al final se recalculan una vez por plan el índice de acumulados, ahorrado y mes_actual.
+#
+# Uso:
+#   python importador.py historial.csv
+#   python importador.py historial.ndjson.gz --db otra.db
+import argparse
+import csv
+import datetime
+import gzip
+import json
+import sys
+
+from base_datos import DB_FILE, obtener_conexion
+from dinero import centavos
+from saldos import sincronizar_plan
+
+MAX_ERRORES = 50 # Errores que se informan antes de abandonar la validación
+
+
+class ErrorImportacion(Exception):
+    def __init__(self, errores):
+        super().__init__(f"{len(errores)} error(es) en el archivo de importación")
+        self.errores = errores
+
+
+# ====== LECTURA ======
+def _abrir(ruta):
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, "rt", newline="", encoding="utf-8")
+    return open(ruta, newline="", encoding="utf-8")
+
+def _registros(ruta, formato):
+    # Devuelve (número_de_línea, dict o línea JSON) sin cargar el archivo completo
+    with _abrir(ruta) as f:
+        if formato == "csv":
+            for i, fila in enumerate(csv.DictReader(f), 2):
+                yield i, fila
+        else:
+            for i, linea in enumerate(f, 1):
+                if linea.strip():
+                    yield i, linea
+
+def _convertir(registro):
+    # None para las filas de exportador.py de un plan sin meses registrados (mes y monto vacíos)
+    if isinstance(registro, str):
+        registro = json.loads(registro)
+    if registro.get("mes") in (None, "") and registro.get("monto") in (None, ""):
+        return None
+    plan_id = int(registro.get("plan_id", registro.get("plan")))
+    mes = int(registro["mes"])
+    monto = centavos(registro["monto"]) # En pesos en el archivo, en centavos en la base
+    fecha = datetime.date.fromisoformat(str(registro["fecha"]).strip()).isoformat()
+    if mes < 1:
+        raise ValueError("mes debe ser mayor o igual a 1")
+    if monto < 0:
+        raise ValueError("el monto no puede ser negativo")
+    return plan_id, mes, monto, fecha
+
+def _filas_validas(ruta, formato):
+    for _, registro in _registros(ruta, formato):
+        fila = _convertir(registro)
+        if fila is not None:
+            yield fila
+
+
+# ====== VALIDACIÓN ======
+def validar(db, ruta, formato):
+    # Pasada por streaming: tipos, valores y existencia de los planes. Devuelve los planes tocados.
+    errores = []
+    planes = set()
+    for linea, registro in _registros(ruta, formato):
+        try:
+            fila = _convertir(registro)
+            if fila is not None:
+                planes.add(fila[0])
+        except (KeyError, TypeError, ValueError) as e:
+            errores.append((linea, str(e)))
+            if len(errores) >= MAX_ERRORES:
+                break
+    existentes = set()
+    lista = list(planes)
+    for i in range(0, len(lista), 500):
+        bloque = lista[i:i + 500]
+        marcas = ",".join("?" * len(bloque))
+        existentes.update(r[0] for r in db.todos(f"SELECT id FROM planes_ahorro WHERE id IN ({marcas})", bloque))
+    for plan_id in sorted(planes - existentes):
+        errores.append((0, f"el plan {plan_id} no existe"))
+    if errores:
+        raise ErrorImportacion(errores)
+    return planes
+
+
+# ====== CARGA ======
+def importar(ruta, ruta_db=DB_FILE, formato=None):
+    if formato is None:
+        formato = "ndjson" if ".ndjson" in ruta or ".jsonl" in ruta else "csv"
+    db = obtener_conexion(ruta_db)
+    planes = validar(db, ruta, formato)
+
+    with db.transaccion(inmediata=True):
+        cur = db.ejecutar_muchos(
+            "INSERT INTO ahorros_mensuales (plan_id, mes, monto, fecha) VALUES (?, ?, ?, ?)",
+            _filas_validas(ruta, formato),
+        )
+        insertadas = cur.rowcount
+        # Un mes no puede quedar repetido en un plan (ni dentro del archivo ni con lo ya guardado)
+        for plan_id in planes:
+            repetido = db.uno("SELECT mes FROM ahorros_mensuales WHERE plan_id=? GROUP BY mes HAVING COUNT(*) > 1 LIMIT 1", (plan_id,))
+            if repetido:
+                raise ErrorImportacion([(0, f"el plan {plan_id} tendría el mes {repetido[0]} repetido")])
+        for plan_id in planes:
+            sincronizar_plan(db, plan_id)
+    return insertadas, len(planes)
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Importa historial mensual de ahorros desde CSV o NDJSON")
+    parser.add_argument("archivo", help="CSV con columnas plan_id,mes,monto,fecha o NDJSON con esas claves")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--formato", choices=["csv", "ndjson"])
+    args = parser.parse_args()
+
+    try:
+        filas, planes = importar(args.archivo, args.db, args.formato)
+    except ErrorImportacion as e:
+        print(e, file=sys.stderr)
+        for linea, mensaje in e.errores:
+            print(f"  línea {linea}: {mensaje}" if linea else f"  {mensaje}", file=sys.stderr)
+        sys.exit(1)
+    print(f"{filas} meses importados en {planes} planes")
+
+if __name__ == "__main__":
+    main()
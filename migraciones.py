@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# migraciones.py
+# Esquema versionado de ahorros.db. La versión aplicada se guarda en PRAGMA user_version,
+# así que cada migración corre una sola vez por archivo de base de datos.
+
+# ====== MIGRACIONES ======
+def _v1_esquema_base(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE,
+            contrasena TEXT
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS planes_ahorro (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            meta REAL,
+            plazo INTEGER,
+            ingreso REAL,
+            comida REAL,
+            transporte REAL,
+            otros REAL,
+            ahorrado REAL,
+            mes_actual INTEGER DEFAULT 1,
+            fecha_inicio TEXT,
+            FOREIGN KEY(usuario_id) REFERENCES usuarios(id)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ahorros_mensuales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            plan_id INTEGER,
+            mes INTEGER,
+            monto REAL,
+            fecha TEXT,
+            FOREIGN KEY(plan_id) REFERENCES planes_ahorro(id)
+        )
+    """)
+    # Compatibilidad: bases creadas por la versión Tkinter no tienen contrasena
+    columnas = [col[1] for col in cur.execute("PRAGMA table_info(usuarios)").fetchall()]
+    if "contrasena" not in columnas:
+        cur.execute("ALTER TABLE usuarios ADD COLUMN contrasena TEXT")
+
+def _v2_cascada_e_indices(cur):
+    # SQLite no permite cambiar una FOREIGN KEY existente: se reconstruyen las tablas
+    cur.execute("""
+        CREATE TABLE planes_ahorro_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER REFERENCES usuarios(id) ON DELETE CASCADE,
+            meta REAL,
+            plazo INTEGER,
+            ingreso REAL,
+            comida REAL,
+            transporte REAL,
+            otros REAL,
+            ahorrado REAL,
+            mes_actual INTEGER DEFAULT 1,
+            fecha_inicio TEXT
+        )
+    """)
+    cur.execute("""
+        INSERT INTO planes_ahorro_nueva (id, usuario_id, meta, plazo, ingreso, comida, transporte, otros, ahorrado, mes_actual, fecha_inicio)
+        SELECT id, usuario_id, meta, plazo, ingreso, comida, transporte, otros, ahorrado, mes_actual, fecha_inicio FROM planes_ahorro
+    """)
+    cur.execute("""
+        CREATE TABLE ahorros_mensuales_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            plan_id INTEGER REFERENCES planes_ahorro(id) ON DELETE CASCADE,
+            mes INTEGER,
+            monto REAL,
+            fecha TEXT
+        )
+    """)
+    cur.execute("""
+        INSERT INTO ahorros_mensuales_nueva (id, plan_id, mes, monto, fecha)
+        SELECT id, plan_id, mes, monto, fecha FROM ahorros_mensuales
+    """)
+    cur.execute("DROP TABLE ahorros_mensuales")
+    cur.execute("DROP TABLE planes_ahorro")
+    cur.execute("ALTER TABLE planes_ahorro_nueva RENAME TO planes_ahorro")
+    cur.execute("ALTER TABLE ahorros_mensuales_nueva RENAME TO ahorros_mensuales")
+
+    # usuarios(nombre) ya tiene el índice implícito de su restricción UNIQUE
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ahorros_plan_mes ON ahorros_mensuales(plan_id, mes)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_planes_usuario ON planes_ahorro(usuario_id, id)")
+
+def _v3_indice_acumulado(cur):
+    # Suma acumulada por plan guardada en cada registro mensual (índice de saldos)
+    cur.execute("ALTER TABLE ahorros_mensuales ADD COLUMN acumulado REAL")
+    # Ahorro con el que se creó el plan; ahorrado = ahorrado_inicial + último acumulado
+    cur.execute("ALTER TABLE planes_ahorro ADD COLUMN ahorrado_inicial REAL DEFAULT 0.0")
+    cur.execute("""
+        CREATE TEMP TABLE acumulados_tmp AS
+        SELECT id, SUM(monto) OVER (PARTITION BY plan_id ORDER BY mes, id) AS acumulado
+        FROM ahorros_mensuales
+    """)
+    cur.execute("""
+        UPDATE ahorros_mensuales SET acumulado = acumulados_tmp.acumulado
+        FROM acumulados_tmp WHERE acumulados_tmp.id = ahorros_mensuales.id
+    """)
+    cur.execute("DROP TABLE acumulados_tmp")
+    cur.execute("""
+        UPDATE planes_ahorro SET ahorrado_inicial = COALESCE(ahorrado, 0.0) - COALESCE(
+            (SELECT SUM(monto) FROM ahorros_mensuales WHERE plan_id = planes_ahorro.id), 0.0)
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ahorros_plan_fecha ON ahorros_mensuales(plan_id, fecha)")
+
+def _v4_estado_y_cierres(cur):
+    # Estado del plan: 'activo', 'meta_alcanzada' o 'completado' (se acabó el plazo)
+    cur.execute("ALTER TABLE planes_ahorro ADD COLUMN estado TEXT DEFAULT 'activo'")
+    cur.execute("""
+        UPDATE planes_ahorro SET estado = CASE
+            WHEN mes_actual > plazo THEN 'completado'
+            WHEN ahorrado >= meta AND meta > 0 THEN 'meta_alcanzada'
+            ELSE 'activo' END
+    """)
+    # Puntos de control del cierre de mes por lotes (cierre_mes.py), para poder reanudarlo
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cierres_mes (
+            id TEXT PRIMARY KEY,
+            fecha TEXT,
+            ultimo_plan_id INTEGER DEFAULT 0,
+            procesados INTEGER DEFAULT 0,
+            terminado INTEGER DEFAULT 0,
+            actualizado_en TEXT
+        )
+    """)
+
+def _v5_indice_monto(cur):
+    # El historial (modelo_historial.py) pagina ordenado por monto sin ordenar todo el plan
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ahorros_plan_monto ON ahorros_mensuales(plan_id, monto)")
+
+def _v6_borrado_logico(cur):
+    # Usuarios borrados pendientes de purga (borrado.py); NULL = usuario vigente
+    cur.execute("ALTER TABLE usuarios ADD COLUMN borrado_en TEXT")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_usuarios_borrados ON usuarios(id) WHERE borrado_en IS NOT NULL")
+
+def _v7_supuestos_proyeccion(cur):
+    # Supuestos de proyeccion.py guardados con cada plan; en cero equivalen al cálculo lineal
+    cur.execute("ALTER TABLE planes_ahorro ADD COLUMN tasa_anual REAL DEFAULT 0.0")      # Interés efectivo anual (0.06 = 6%)
+    cur.execute("ALTER TABLE planes_ahorro ADD COLUMN inflacion_anual REAL DEFAULT 0.0")
+    cur.execute("ALTER TABLE planes_ahorro ADD COLUMN aporte_al_inicio INTEGER DEFAULT 0") # 1 = aporta al inicio del mes
+
+def _v8_version_plan(cur):
+    # Control optimista: cada escritura del plan suma 1; quien escribe comprueba que no cambió
+    cur.execute("ALTER TABLE planes_ahorro ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+def _v9_centavos(cur):
+    # Dinero en centavos enteros (dinero.py): sumas y comparaciones exactas, sin errores de coma flotante.
+    # Se reconstruyen las tablas para que las columnas queden declaradas INTEGER, como en la v2
+    cur.execute("""
+        CREATE TABLE planes_ahorro_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER REFERENCES usuarios(id) ON DELETE CASCADE,
+            meta INTEGER,
+            plazo INTEGER,
+            ingreso INTEGER,
+            comida INTEGER,
+            transporte INTEGER,
+            otros INTEGER,
+            ahorrado INTEGER,
+            mes_actual INTEGER DEFAULT 1,
+            fecha_inicio TEXT,
+            ahorrado_inicial INTEGER DEFAULT 0,
+            estado TEXT DEFAULT 'activo',
+            tasa_anual REAL DEFAULT 0.0,
+            inflacion_anual REAL DEFAULT 0.0,
+            aporte_al_inicio INTEGER DEFAULT 0,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("""
+        INSERT INTO planes_ahorro_nueva (id, usuario_id, meta, plazo, ingreso, comida, transporte, otros, ahorrado,
+                                         mes_actual, fecha_inicio, ahorrado_inicial, estado, tasa_anual,
+                                         inflacion_anual, aporte_al_inicio, version)
+        SELECT id, usuario_id, CAST(ROUND(meta * 100) AS INTEGER), plazo, CAST(ROUND(ingreso * 100) AS INTEGER),
+               CAST(ROUND(comida * 100) AS INTEGER), CAST(ROUND(transporte * 100) AS INTEGER),
+               CAST(ROUND(otros * 100) AS INTEGER), CAST(ROUND(ahorrado * 100) AS INTEGER),
+               mes_actual, fecha_inicio, CAST(ROUND(COALESCE(ahorrado_inicial, 0.0) * 100) AS INTEGER), estado,
+               tasa_anual, inflacion_anual, aporte_al_inicio, version
+        FROM planes_ahorro
+    """)
+    cur.execute("""
+        CREATE TABLE ahorros_mensuales_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            plan_id INTEGER REFERENCES planes_ahorro(id) ON DELETE CASCADE,
+            mes INTEGER,
+            monto INTEGER,
+            fecha TEXT,
+            acumulado INTEGER
+        )
+    """)
+    # Los acumulados se recalculan sobre los montos ya redondeados para que cuadren al centavo
+    cur.execute("""
+        INSERT INTO ahorros_mensuales_nueva (id, plan_id, mes, monto, fecha, acumulado)
+        SELECT id, plan_id, mes, monto, fecha, SUM(monto) OVER (PARTITION BY plan_id ORDER BY mes, id)
+        FROM (SELECT id, plan_id, mes, CAST(ROUND(monto * 100) AS INTEGER) AS monto, fecha FROM ahorros_mensuales)
+    """)
+    cur.execute("DROP TABLE ahorros_mensuales")
+    cur.execute("DROP TABLE planes_ahorro")
+    cur.execute("ALTER TABLE planes_ahorro_nueva RENAME TO planes_ahorro")
+    cur.execute("ALTER TABLE ahorros_mensuales_nueva RENAME TO ahorros_mensuales")
+    cur.execute("""
+        UPDATE planes_ahorro SET ahorrado = ahorrado_inicial + COALESCE(
+            (SELECT acumulado FROM ahorros_mensuales WHERE plan_id = planes_ahorro.id
+             ORDER BY mes DESC, id DESC LIMIT 1), 0)
+    """)
+
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_planes_usuario ON planes_ahorro(usuario_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ahorros_plan_mes ON ahorros_mensuales(plan_id, mes)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ahorros_plan_fecha ON ahorros_mensuales(plan_id, fecha)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ahorros_plan_monto ON ahorros_mensuales(plan_id, monto)")
+
+# Orden de aplicación: la posición (empezando en 1) es el número de versión
+MIGRACIONES = [
+    _v1_esquema_base,
+    _v2_cascada_e_indices,
+    _v3_indice_acumulado,
+    _v4_estado_y_cierres,
+    _v5_indice_monto,
+    _v6_borrado_logico,
+    _v7_supuestos_proyeccion,
+    _v8_version_plan,
+    _v9_centavos,
+]
+
+VERSION_ACTUAL = len(MIGRACIONES)
+# Desde esta versión el dinero está en centavos enteros: los prototipos Tkinter (pesos en REAL) no la abren
+VERSION_CENTAVOS = MIGRACIONES.index(_v9_centavos) + 1
+
+
+# ====== APLICACIÓN ======
+def version_esquema(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def aplicar_migraciones(conn):
+    # Camino rápido: la base ya está al día y no se toca nada más
+    if version_esquema(conn) >= VERSION_ACTUAL:
+        return VERSION_ACTUAL
+
+    # foreign_keys no se puede cambiar dentro de una transacción
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        # BEGIN IMMEDIATE: si otro proceso está migrando, esperamos su resultado
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = version_esquema(conn)
+            cur = conn.cursor()
+            for numero in range(version + 1, VERSION_ACTUAL + 1):
+                MIGRACIONES[numero - 1](cur)
+                cur.execute(f"PRAGMA user_version={numero}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    finally:
+        conn.execute("PRAGMA foreign_keys=ON")
+    return VERSION_ACTUAL
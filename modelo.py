@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# modelo.py
+# Registros compactos del dominio: el plan y su historial mensual.
+# Plan usa __slots__ (sin __dict__ por instancia) y guarda los montos en centavos enteros;
+# el Dinero de cada monto se crea recién al leer el atributo, así que un lote con cientos de
+# miles de planes no carga siete objetos Dinero por plan.
+# SerieMensual guarda el historial en columnas array (mes, monto en centavos, fecha como ordinal)
+# en lugar de una tupla con tres objetos por registro. Los acumulados se calculan la primera vez
+# que se piden y después se extienden con cada aporte. Con NumPy instalado las columnas se
+# entregan como arreglos (una copia de memoria por columna, sin pasar por objetos de Python).
+import datetime
+from array import array
+from itertools import accumulate
+from operator import attrgetter
+
+from dinero import Dinero
+
+CAMPOS = ("meta", "plazo", "ingreso", "comida", "transporte", "otros",
+          "ahorrado", "ahorrado_inicial", "mes_actual", "estado", "fecha_inicio",
+          "tasa_anual", "inflacion_anual", "aporte_al_inicio", "version")
+CAMPOS_DINERO = ("meta", "ingreso", "comida", "transporte", "otros", "ahorrado", "ahorrado_inicial")
+
+# Los montos se guardan en "_meta", "_ingreso"...; "meta", "ingreso"... son propiedades que devuelven Dinero
+_RANURAS = ("id",) + tuple("_" + c if c in CAMPOS_DINERO else c for c in CAMPOS)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("Las columnas como arreglos necesitan el paquete 'numpy' (pip install numpy).")
+    return numpy
+
+
+# ====== PLAN ======
+class Plan:
+    """Fila de planes_ahorro. Los montos se leen y se asignan como Dinero; desde_fila recibe centavos."""
+
+    __slots__ = _RANURAS
+
+    def __init__(self, id, meta, plazo, ingreso, comida, transporte, otros, ahorrado, ahorrado_inicial,
+                 mes_actual=1, estado="activo", fecha_inicio=None, tasa_anual=0.0, inflacion_anual=0.0,
+                 aporte_al_inicio=0, version=0):
+        self.id = id
+        self.meta, self.ingreso, self.comida = meta, ingreso, comida
+        self.transporte, self.otros = transporte, otros
+        self.ahorrado, self.ahorrado_inicial = ahorrado, ahorrado_inicial
+        self.plazo, self.mes_actual, self.estado, self.fecha_inicio = plazo, mes_actual, estado, fecha_inicio
+        self.tasa_anual, self.inflacion_anual = tasa_anual, inflacion_anual
+        self.aporte_al_inicio, self.version = aporte_al_inicio, version
+
+    @classmethod
+    def desde_fila(cls, plan_id, fila):
+        # fila en el orden de CAMPOS, tal como sale de SELECT (montos en centavos): sin conversiones
+        plan = cls.__new__(cls)
+        plan.id = plan_id
+        for ranura, valor in zip(_RANURAS[1:], fila):
+            setattr(plan, ranura, valor)
+        for ranura in ("_" + c for c in CAMPOS_DINERO):
+            if getattr(plan, ranura) is None:
+                setattr(plan, ranura, 0)
+        return plan
+
+    def centavos(self, campo):
+        # Monto en centavos sin crear el Dinero (para cálculos por lotes)
+        return getattr(self, "_" + campo)
+
+    def _replace(self, **cambios):
+        # Copia con algunos campos cambiados (misma forma de uso que el namedtuple anterior)
+        nuevo = Plan.__new__(Plan)
+        for ranura in _RANURAS:
+            setattr(nuevo, ranura, getattr(self, ranura))
+        for campo, valor in cambios.items():
+            setattr(nuevo, campo, valor)
+        return nuevo
+
+    def __eq__(self, otro):
+        if not isinstance(otro, Plan):
+            return NotImplemented
+        return all(getattr(self, r) == getattr(otro, r) for r in _RANURAS)
+
+    __hash__ = None # Mutable
+
+    def __repr__(self):
+        campos = ", ".join(f"{c}={getattr(self, c)!r}" for c in ("id",) + CAMPOS)
+        return f"Plan({campos})"
+
+
+def _propiedad_monto(campo):
+    leer = attrgetter("_" + campo)
+    def fset(self, valor):
+        # Solo Dinero: un número suelto sería ambiguo (pesos en el formulario, centavos en la base)
+        if not isinstance(valor, Dinero):
+            raise TypeError(f"{campo} debe ser Dinero, no {type(valor).__name__} (Dinero.desde() para pesos)")
+        setattr(self, "_" + campo, valor.centavos)
+    return property(lambda self: Dinero(leer(self)), fset)
+
+for _campo in CAMPOS_DINERO:
+    setattr(Plan, _campo, _propiedad_monto(_campo))
+del _campo
+
+
+# ====== SERIE MENSUAL ======
+class SerieMensual:
+    """Historial de un plan en columnas: mes, monto (centavos) y fecha (ordinal de date)."""
+
+    __slots__ = ("meses", "montos", "fechas", "_acumulados")
+
+    def __init__(self):
+        self.meses = array("i")
+        self.montos = array("q")
+        self.fechas = array("i")
+        self._acumulados = None
+
+    @classmethod
+    def desde_filas(cls, filas):
+        # filas: iterable de (mes, monto en centavos, fecha ISO), por ejemplo un cursor de SQLite
+        serie = cls()
+        meses, montos, fechas = serie.meses.append, serie.montos.append, serie.fechas.append
+        for mes, monto, fecha in filas:
+            meses(mes)
+            montos(monto or 0)
+            fechas(_ordinal(fecha))
+        return serie
+
+    def agregar(self, mes, monto, fecha):
+        # monto en centavos; si los acumulados ya se calcularon, se extienden en lugar de recalcularse
+        monto = monto or 0
+        self.meses.append(mes)
+        self.montos.append(monto)
+        self.fechas.append(_ordinal(fecha))
+        if self._acumulados is not None:
+            self._acumulados.append((self._acumulados[-1] if self._acumulados else 0) + monto)
+
+    def __len__(self):
+        return len(self.montos)
+
+    # ====== CONSULTAS ======
+    def acumulados(self):
+        # Suma acumulada de los montos (centavos), calculada una sola vez
+        if self._acumulados is None:
+            self._acumulados = array("q", accumulate(self.montos))
+        return self._acumulados
+
+    def total(self):
+        acumulados = self.acumulados()
+        return acumulados[-1] if acumulados else 0
+
+    def fecha(self, i):
+        ordinal = self.fechas[i]
+        return datetime.date.fromordinal(ordinal) if ordinal else None
+
+    def primera_fecha(self):
+        # ISO de la primera fecha o None si la serie está vacía
+        fecha = self.fecha(0) if self.fechas else None
+        return fecha.isoformat() if fecha else None
+
+    def columnas(self):
+        # (meses, montos, fechas ordinales, acumulados) como arreglos de NumPy.
+        # Se copian: una vista directa impediría seguir agregando meses a los array mientras exista
+        np = _numpy()
+        return tuple(np.frombuffer(c, dtype=np.int32 if c.typecode == "i" else np.int64).copy()
+                     for c in (self.meses, self.montos, self.fechas, self.acumulados()))
+
+
+def _ordinal(fecha):
+    # Fecha ISO ("2026-10-18" o con hora) o date -> ordinal; 0 = sin fecha
+    if not fecha:
+        return 0
+    if isinstance(fecha, datetime.date):
+        return fecha.toordinal()
+    return datetime.date.fromisoformat(fecha[:10]).toordinal()
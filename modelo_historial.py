@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# modelo_historial.py
+# Modelo de tabla para el historial mensual de un plan, leído de SQLite por páginas.
+# La vista pide más filas (canFetchMore / fetchMore) solo cuando el usuario se acerca al final,
+# el orden por columna lo resuelve SQL y se puede filtrar por un rango de fechas.
+# Las páginas se piden por clave (valor de la columna de orden + id), no con OFFSET,
+# así que la página 200 cuesta lo mismo que la primera.
+# Lo leído se guarda en columnas (modelo.SerieMensual más un array de ids), no una tupla por fila.
+from array import array
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from dinero import texto
+from modelo import SerieMensual
+
+FILAS_POR_PAGINA = 500
+
+ENCABEZADOS = ["Mes", "Monto Ahorrado ($)", "Fecha"]
+COLUMNAS_SQL = ["mes", "monto", "fecha"] # Columna de ahorros_mensuales por columna de la vista
+
+
+class ModeloHistorial(QAbstractTableModel):
+    def __init__(self, db, plan_id, parent=None, tamano_pagina=FILAS_POR_PAGINA):
+        super().__init__(parent)
+        self.db = db
+        self.plan_id = plan_id
+        self.tamano_pagina = tamano_pagina
+        self.columna_orden = 0
+        self.descendente = False
+        self.desde = None
+        self.hasta = None
+        self._ids = array("q")  # id de cada fila ya leída
+        self._serie = SerieMensual()
+        self._terminado = False
+        self._total = None
+
+    # ====== CONSULTAS ======
+    def _filtro(self):
+        condiciones = ["plan_id = ?"]
+        params = [self.plan_id]
+        if self.desde:
+            condiciones.append("fecha >= ?")
+            params.append(self.desde)
+        if self.hasta:
+            condiciones.append("fecha <= ?")
+            params.append(self.hasta)
+        return " AND ".join(condiciones), params
+
+    def _leer_pagina(self):
+        donde, params = self._filtro()
+        columna = COLUMNAS_SQL[self.columna_orden]
+        sentido, comparacion = ("DESC", "<") if self.descendente else ("ASC", ">")
+        if self._ids:
+            # Continuar justo después de la última fila leída
+            donde += f" AND ({columna}, id) {comparacion} (?, ?)"
+            params += [self._valor_orden(len(self._ids) - 1), self._ids[-1]]
+        return self.db.todos(
+            f"SELECT id, mes, monto, fecha FROM ahorros_mensuales WHERE {donde} "
+            f"ORDER BY {columna} {sentido}, id {sentido} LIMIT ?",
+            params + [self.tamano_pagina],
+        )
+
+    def _valor_orden(self, fila):
+        if self.columna_orden == 0:
+            return self._serie.meses[fila]
+        if self.columna_orden == 1:
+            return self._serie.montos[fila]
+        fecha = self._serie.fecha(fila)
+        return fecha.isoformat() if fecha else None
+
+    def total(self):
+        # Cantidad de registros con el filtro actual (sin leerlos)
+        if self._total is None:
+            donde, params = self._filtro()
+            self._total = self.db.uno(f"SELECT COUNT(*) FROM ahorros_mensuales WHERE {donde}", params)[0]
+        return self._total
+
+    def _reiniciar(self):
+        self.beginResetModel()
+        self._ids = array("q")
+        self._serie = SerieMensual()
+        self._terminado = False
+        self._total = None
+        self.endResetModel()
+
+    # ====== FILTRO ======
+    def filtrar_fechas(self, desde=None, hasta=None):
+        # Fechas ISO (AAAA-MM-DD) o None para no limitar ese extremo
+        self.desde = desde or None
+        self.hasta = hasta or None
+        self._reiniciar()
+
+    # ====== QAbstractTableModel ======
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(ENCABEZADOS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        fila = index.row()
+        columna = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if columna == 0:
+                return str(self._serie.meses[fila])
+            if columna == 1:
+                return texto(self._serie.montos[fila])
+            return str(self._serie.fecha(fila))
+        if role == Qt.ItemDataRole.TextAlignmentRole and columna < 2:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def headerData(self, seccion, orientacion, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientacion == Qt.Orientation.Horizontal:
+            return ENCABEZADOS[seccion]
+        return super().headerData(seccion, orientacion, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._terminado
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._terminado:
+            return
+        nuevas = self._leer_pagina()
+        if len(nuevas) < self.tamano_pagina:
+            self._terminado = True
+        if nuevas:
+            inicio = len(self._ids)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(nuevas) - 1)
+            for id_, mes, monto, fecha in nuevas:
+                self._ids.append(id_)
+                self._serie.agregar(mes, monto, fecha)
+            self.endInsertRows()
+
+    def sort(self, columna, orden=Qt.SortOrder.AscendingOrder):
+        # El orden lo hace SQL: se descarta lo leído y se vuelve a paginar desde el principio
+        descendente = orden == Qt.SortOrder.DescendingOrder
+        if (columna, descendente) == (self.columna_orden, self.descendente) and self._ids:
+            return
+        self.columna_orden = columna
+        self.descendente = descendente
+        self._reiniciar()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# motor_ahorro.py
+# Cálculos del planificador de ahorros sin dependencias de interfaz (ni Qt, ni Tk, ni matplotlib).
+# Lo usan las ventanas y también los trabajos por lotes que no necesitan abrir ninguna GUI.
+# Los montos pueden ser floats (prototipos Tkinter) o dinero.Dinero (la aplicación, en centavos exactos);
+# los resultados salen del mismo tipo que la entrada.
+from collections import namedtuple
+
+from dinero import CERO, Dinero, centavos
+import proyeccion
+
+CAMPOS_PLAN = ("meta", "plazo", "ingreso", "comida", "transporte", "otros", "ahorrado")
+
+ParametrosPlan = namedtuple("ParametrosPlan", CAMPOS_PLAN)
+ResultadoPlan = namedtuple("ResultadoPlan", [
+    "estado",            # Uno de los ESTADO_* de abajo
+    "disponible",        # ingreso - gastos
+    "faltante",          # meta - ahorrado
+    "aporte_necesario",  # Aporte mensual para llegar a la meta en el plazo
+    "progreso",          # Porcentaje ahorrado de la meta (sin recortar)
+    "alcanzable",        # El aporte necesario cabe en lo disponible
+])
+
+# ====== ESTADOS ======
+ESTADO_PLAZO_INVALIDO = "plazo_invalido"
+ESTADO_GASTOS_SUPERAN = "gastos_superan"
+ESTADO_META_CUMPLIDA = "meta_cumplida"
+ESTADO_EN_CURSO = "en_curso"
+
+# Estados guardados en planes_ahorro.estado
+PLAN_ACTIVO = "activo"
+PLAN_META_ALCANZADA = "meta_alcanzada"
+PLAN_COMPLETADO = "completado"
+
+
+# ====== CÁLCULO ======
+def _cero(monto):
+    return CERO if isinstance(monto, Dinero) else 0.0
+
+def _como(monto, valor):
+    # Un resultado en float de proyeccion.py, devuelto en el tipo de 'monto'
+    return Dinero.desde(valor) if isinstance(monto, Dinero) else valor
+
+def _con_supuestos(supuestos):
+    # Un Supuestos siempre es verdadero (namedtuple): SIN_SUPUESTOS, todo en cero, sigue el cálculo
+    # lineal en centavos igual que None
+    return bool(supuestos) and bool(supuestos.tasa_anual or supuestos.inflacion_anual or supuestos.aporte_al_inicio)
+
+def calcular(meta, plazo, ingreso, comida, transporte, otros, ahorrado, supuestos=None):
+    # supuestos: proyeccion.Supuestos (interés, inflación, momento del aporte); None = cálculo lineal
+    disponible = ingreso - (comida + transporte + otros)
+    faltante = meta - ahorrado
+    progreso = (ahorrado / meta) * 100 if meta > 0 else 0.0
+    cero = _cero(faltante)
+
+    if plazo <= 0:
+        return ResultadoPlan(ESTADO_PLAZO_INVALIDO, disponible, faltante, cero, progreso, False)
+    if disponible < 0:
+        return ResultadoPlan(ESTADO_GASTOS_SUPERAN, disponible, faltante, cero, progreso, False)
+    if faltante <= 0:
+        return ResultadoPlan(ESTADO_META_CUMPLIDA, disponible, faltante, cero, progreso, True)
+
+    if _con_supuestos(supuestos):
+        aporte_necesario = _como(faltante, proyeccion.aporte_necesario(float(meta), float(ahorrado), plazo, supuestos))
+    else:
+        aporte_necesario = faltante / plazo
+    return ResultadoPlan(ESTADO_EN_CURSO, disponible, faltante, aporte_necesario, progreso,
+                         aporte_necesario <= disponible)
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("El cálculo por lotes necesita el paquete 'numpy' (pip install numpy).")
+    return numpy
+
+def calcular_lote(filas, supuestos=None):
+    # Las reglas de calcular aplicadas a miles de planes de una vez, por columnas con NumPy.
+    # filas: filas (o arreglo N x 7) en el orden de CAMPOS_PLAN con los montos en centavos, como
+    # salen de un SELECT (sin NULL). supuestos: None, un Supuestos para todos o uno (o None) por plan.
+    # Devuelve un ResultadoPlan de arreglos: montos en centavos (int64), progreso en float64, estado en texto
+    np = _numpy()
+    datos = np.array(filas if hasattr(filas, "__len__") else list(filas), dtype=np.int64).reshape(-1, len(CAMPOS_PLAN))
+    meta, plazo, ingreso, comida, transporte, otros, ahorrado = datos.T
+    n = len(datos)
+
+    disponible = ingreso - (comida + transporte + otros)
+    faltante = meta - ahorrado
+    progreso = np.zeros(n)
+    con_meta = meta > 0
+    progreso[con_meta] = ahorrado[con_meta] / meta[con_meta] * 100
+
+    estado = np.full(n, ESTADO_EN_CURSO, dtype=object)
+    estado[faltante <= 0] = ESTADO_META_CUMPLIDA
+    estado[disponible < 0] = ESTADO_GASTOS_SUPERAN
+    estado[plazo <= 0] = ESTADO_PLAZO_INVALIDO
+    en_curso = estado == ESTADO_EN_CURSO
+
+    # Sin supuestos: faltante / plazo redondeado al centavo, mitad hacia arriba (como Dinero / int)
+    aporte = np.zeros(n, dtype=np.int64)
+    plazo_valido = np.where(en_curso, plazo, 1)
+    cociente, resto = np.divmod(faltante, plazo_valido)
+    aporte[en_curso] = (cociente + (2 * resto >= plazo_valido))[en_curso]
+
+    # Con supuestos: la fórmula de proyeccion.aporte_necesario con los factores calculados una vez por
+    # (supuestos, plazo); la aritmética por plan son productos y cocientes exactos de float64
+    por_plan = supuestos if isinstance(supuestos, (list, tuple)) and not isinstance(supuestos, proyeccion.Supuestos) \
+        else [supuestos] * n
+    indices = [i for i in np.flatnonzero(en_curso).tolist() if _con_supuestos(por_plan[i])]
+    if indices:
+        factores = {}
+        inflacion, crecimiento, anualidad = np.empty(len(indices)), np.empty(len(indices)), np.empty(len(indices))
+        for k, i in enumerate(indices):
+            clave = (por_plan[i], int(plazo[i]))
+            f = factores.get(clave)
+            if f is None:
+                s, meses = clave
+                r = proyeccion.tasa_mensual(s.tasa_anual)
+                f = factores[clave] = (proyeccion.factor_crecimiento(proyeccion.tasa_mensual(s.inflacion_anual), meses),
+                                       proyeccion.factor_crecimiento(r, meses),
+                                       proyeccion.factor_anualidad(r, meses, s.aporte_al_inicio))
+            inflacion[k], crecimiento[k], anualidad[k] = f
+        objetivo = meta[indices] / 100 * inflacion - ahorrado[indices] / 100 * crecimiento
+        pesos = np.where(objetivo > 0, objetivo / anualidad, 0.0)
+        # Al centavo igual que Dinero.desde(float): sin pasar por un Dinero por plan
+        aporte[indices] = [centavos(p) for p in pesos.tolist()]
+
+    alcanzable = np.where(en_curso, aporte <= disponible, estado == ESTADO_META_CUMPLIDA)
+    return ResultadoPlan(estado, disponible, faltante, aporte, progreso, alcanzable)
+
+def aporte_sugerido_mes(meta, ahorrado, plazo, mes_actual, supuestos=None):
+    # Lo que falta repartido entre los meses que quedan, contando el mes en curso
+    if _con_supuestos(supuestos):
+        return _como(meta, proyeccion.aporte_mes(float(meta), float(ahorrado), plazo, mes_actual, supuestos))
+    faltante = meta - ahorrado
+    meses_restantes = plazo - mes_actual + 1
+    if faltante > 0 and meses_restantes > 0:
+        return faltante / meses_restantes
+    return _cero(faltante)
+
+def estado_plan(meta, plazo, ahorrado, mes_actual):
+    # mes_actual es el próximo mes a cerrar; si ya pasó el plazo el plan está completado
+    if mes_actual > plazo:
+        return PLAN_COMPLETADO
+    if meta > 0 and ahorrado >= meta:
+        return PLAN_META_ALCANZADA
+    return PLAN_ACTIVO
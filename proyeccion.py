@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# proyeccion.py
+# Proyección del ahorro con interés compuesto sobre lo ahorrado, meta ajustada por inflación
+# y aportes al inicio o al final de cada mes.
+# Las tasas se expresan como efectivas anuales (0.06 = 6%) y se convierten a su equivalente mensual.
+# Aporte necesario y saldo al cabo de n meses salen de las fórmulas cerradas de anualidades;
+# lo que no tiene fórmula cerrada (la ruta mes a mes, los meses hasta la meta con inflación)
+# se resuelve con tablas de factores precalculadas y guardadas por tasa y plazo.
+# Con tasas en cero y aporte a fin de mes todo coincide con el cálculo lineal de motor_ahorro.
+#
+# Uso:
+#   python proyeccion.py --meta 20000 --plazo 36 --ahorrado 1500 --tasa 6 --inflacion 4 --al-inicio
+import argparse
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+Supuestos = namedtuple("Supuestos", ["tasa_anual", "inflacion_anual", "aporte_al_inicio"])
+SIN_SUPUESTOS = Supuestos(0.0, 0.0, False)
+
+# crecimiento[k] = (1 + r)^k ; anualidad[k] = valor al mes k de aportar 1 por mes durante k meses
+TablaFactores = namedtuple("TablaFactores", ["crecimiento", "anualidad"])
+
+MAX_MESES = 1200 # Horizonte de búsqueda de meses_para_meta (100 años)
+
+
+# ====== FACTORES ======
+def tasa_mensual(tasa_anual):
+    return (1 + (tasa_anual or 0.0)) ** (1 / 12) - 1
+
+def factor_crecimiento(r, meses):
+    return (1 + r) ** meses
+
+def factor_anualidad(r, meses, al_inicio=False):
+    # Valor futuro de aportar 1 por mes durante 'meses' meses
+    if r == 0:
+        return float(meses)
+    factor = ((1 + r) ** meses - 1) / r
+    return factor * (1 + r) if al_inicio else factor
+
+@lru_cache(maxsize=256)
+def tabla_factores(r, meses, al_inicio=False):
+    # Un producto y una suma por mes en lugar de una potencia por mes y por consulta
+    crecimiento = [1.0] * (meses + 1)
+    anualidad = [0.0] * (meses + 1)
+    paso = (1 + r) if al_inicio else 1.0
+    for k in range(1, meses + 1):
+        crecimiento[k] = crecimiento[k - 1] * (1 + r)
+        anualidad[k] = anualidad[k - 1] * (1 + r) + paso
+    return TablaFactores(tuple(crecimiento), tuple(anualidad))
+
+
+# ====== PROYECCIONES ======
+def supuestos_de(plan):
+    # Supuestos guardados con el plan (cache_plan.Plan o cualquier objeto con esos atributos)
+    return Supuestos(plan.tasa_anual or 0.0, plan.inflacion_anual or 0.0, bool(plan.aporte_al_inicio))
+
+def meta_ajustada(meta, meses, supuestos=SIN_SUPUESTOS):
+    # Meta en pesos de dentro de 'meses' meses, para conservar el poder de compra de hoy
+    return meta * factor_crecimiento(tasa_mensual(supuestos.inflacion_anual), meses)
+
+def saldo_proyectado(ahorrado, aporte, meses, supuestos=SIN_SUPUESTOS):
+    r = tasa_mensual(supuestos.tasa_anual)
+    return ahorrado * factor_crecimiento(r, meses) + aporte * factor_anualidad(r, meses, supuestos.aporte_al_inicio)
+
+def aporte_necesario(meta, ahorrado, meses, supuestos=SIN_SUPUESTOS):
+    # Aporte mensual constante que lleva 'ahorrado' a la meta (ajustada) en 'meses' meses
+    if meses <= 0:
+        return 0.0
+    r = tasa_mensual(supuestos.tasa_anual)
+    objetivo = meta_ajustada(meta, meses, supuestos) - ahorrado * factor_crecimiento(r, meses)
+    if objetivo <= 0:
+        return 0.0
+    return objetivo / factor_anualidad(r, meses, supuestos.aporte_al_inicio)
+
+def aporte_mes(meta, ahorrado, plazo, mes_actual, supuestos=SIN_SUPUESTOS):
+    # Aporte sugerido para el mes en curso: la meta se ajusta hasta el fin del plan
+    # y lo que falta se reparte entre los meses que quedan, contando el actual
+    restantes = plazo - mes_actual + 1
+    if restantes <= 0:
+        return 0.0
+    objetivo = meta_ajustada(meta, plazo, supuestos)
+    return aporte_necesario(objetivo, ahorrado, restantes, supuestos._replace(inflacion_anual=0.0))
+
+def ruta_ideal(meta, ahorrado_inicial, plazo, meses=None, supuestos=SIN_SUPUESTOS):
+    # Saldo mes a mes (meses 1..n) aportando desde el inicio el aporte constante necesario
+    n = max(meses or plazo, 0)
+    aporte = aporte_necesario(meta, ahorrado_inicial, plazo, supuestos)
+    tabla = tabla_factores(tasa_mensual(supuestos.tasa_anual), n, supuestos.aporte_al_inicio)
+    return [ahorrado_inicial * tabla.crecimiento[k] + aporte * tabla.anualidad[k] for k in range(1, n + 1)]
+
+def meses_para_meta(meta, ahorrado, aporte, supuestos=SIN_SUPUESTOS, maximo=MAX_MESES):
+    # Meses hasta alcanzar la meta con un aporte fijo; None si no se alcanza dentro de 'maximo'
+    if ahorrado >= meta:
+        return 0
+    r = tasa_mensual(supuestos.tasa_anual)
+    al_inicio = supuestos.aporte_al_inicio
+    if not supuestos.inflacion_anual:
+        # Fórmula cerrada: despejar n de ahorrado*(1+r)^n + aporte*s(n) = meta
+        if r == 0:
+            return math.ceil((meta - ahorrado) / aporte - 1e-9) if aporte > 0 else None
+        c = aporte * (1 + r if al_inicio else 1) / r
+        if ahorrado + c <= 0:
+            return None
+        n = math.log((meta + c) / (ahorrado + c)) / math.log(1 + r)
+        n = max(math.ceil(n - 1e-9), 1)
+        return n if n <= maximo else None
+    # Con inflación la meta también crece: se recorre la tabla de factores
+    tabla = tabla_factores(r, maximo, al_inicio)
+    inflacion = tabla_factores(tasa_mensual(supuestos.inflacion_anual), maximo).crecimiento
+    for k in range(1, maximo + 1):
+        if ahorrado * tabla.crecimiento[k] + aporte * tabla.anualidad[k] >= meta * inflacion[k] - 1e-6:
+            return k
+    return None
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Proyección de un plan de ahorro con interés e inflación")
+    parser.add_argument("--meta", type=float, required=True)
+    parser.add_argument("--plazo", type=int, required=True)
+    parser.add_argument("--ahorrado", type=float, default=0.0)
+    parser.add_argument("--tasa", type=float, default=0.0, help="Interés efectivo anual en %%")
+    parser.add_argument("--inflacion", type=float, default=0.0, help="Inflación anual en %%")
+    parser.add_argument("--al-inicio", action="store_true", help="Aportes al inicio de cada mes")
+    args = parser.parse_args()
+
+    s = Supuestos(args.tasa / 100, args.inflacion / 100, args.al_inicio)
+    aporte = aporte_necesario(args.meta, args.ahorrado, args.plazo, s)
+    print(f"Meta ajustada por inflación: ${meta_ajustada(args.meta, args.plazo, s):,.2f}")
+    print(f"Aporte mensual necesario: ${aporte:,.2f}")
+    print(f"Intereses ganados: ${saldo_proyectado(args.ahorrado, aporte, args.plazo, s) - args.ahorrado - aporte * args.plazo:,.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from tkinter import ttk, messagebox, simpledialog
 import sqlite3
 import datetime
 
+from migraciones import VERSION_CENTAVOS, version_esquema
+
 # ====== COLORES ======
 BG_COLOR = "#f4f9f9"
 FRAME_COLOR = "#dff6f0"
@@ -18,8 +20,23 @@ BUTTON_COLORS = {
 }
 
 # ====== BASE DE DATOS ======
+def comprobar_version(conn):
+    # Una base ya migrada por proyecto.py guarda centavos enteros, saldos acumulados y la versión
+    # de cada plan; esta ventana escribe pesos en REAL, así que no la abre
+    if version_esquema(conn) < VERSION_CENTAVOS:
+        return
+    conn.close()
+    raiz = tk.Tk()
+    raiz.withdraw()
+    messagebox.showerror("Base no compatible",
+                         "ahorros.db ya tiene el formato de la aplicación nueva (montos en centavos).\n"
+                         "Ábrela con proyecto.py.")
+    raiz.destroy()
+    raise SystemExit(1)
+
 def crear_base():
     conn = sqlite3.connect("ahorros.db")
+    comprobar_version(conn)
     cur = conn.cursor()
     cur.execute("""
         CREATE TABLE IF NOT EXISTS usuarios (
@@ -2,23 +2,37 @@
 # planificador_ahorros_pyqt6.py
 import sys
 import sqlite3
+import time
+import tiempos # Debe ir primero: marca el inicio del arranque
 import datetime
 import csv 
-import shutil # Importación añadida para copiar archivos (backup)
+import os
 
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QMainWindow, QMessageBox, QLineEdit, QLabel, QPushButton,
-    QGridLayout, QVBoxLayout, QHBoxLayout, QFrame, QProgressBar, QTableWidget,
-    QTableWidgetItem, QInputDialog, QDialog, QFormLayout, QFileDialog 
+    QGridLayout, QVBoxLayout, QHBoxLayout, QFrame, QProgressBar, QTableView, QTabWidget,
+    QInputDialog, QDialog, QFormLayout, QFileDialog, QCheckBox
 )
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QFont, QIcon, QPixmap 
 
-# matplotlib for embedding the simple line chart
-import matplotlib
-matplotlib.use("QtAgg")
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+from base_datos import DB_FILE, obtener_conexion, cerrar_conexiones
+from cache_plan import CachePlan, MesYaCerrado, leer_ultimo_plan
+from dinero import Dinero, texto
+from recalculo import ProgramadorRecalculo, fijar_texto
+from modelo_historial import ModeloHistorial
+import motor_ahorro
+import exportador
+import respaldo
+import tareas
+import trazas
+import borrado
+import escenarios
+import simulacion
+import proyeccion
+# matplotlib (grafico.py) se importa recién cuando hace falta dibujar el primer gráfico
+
+tiempos.registrar_fase("imports", time.perf_counter() - tiempos.INICIO)
 
 # ====== COLORES ======
 BG_COLOR = "#f4f9f9" 
@@ -33,52 +47,15 @@ BUTTON_COLORS = {
     "borrar": "#dc3545",
     "regresar": "#6c757d",
     "exportar": "#17a2b8", 
-    "backup": "#ff8c00" # Color para el botón de Backup
+    "backup": "#ff8c00", # Color para el botón de Backup
+    "simular": "#20c997"
 }
 
-DB_FILE = "ahorros.db" # Nombre del archivo de la base de datos
-
 # ====== BASE DE DATOS ======
 def crear_base():
-    conn = sqlite3.connect(DB_FILE)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT UNIQUE,
-            contrasena TEXT
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS planes_ahorro (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario_id INTEGER,
-            meta REAL,
-            plazo INTEGER,
-            ingreso REAL,
-            comida REAL,
-            transporte REAL,
-            otros REAL,
-            ahorrado REAL,
-            mes_actual INTEGER DEFAULT 1,
-            fecha_inicio TEXT,
-            FOREIGN KEY(usuario_id) REFERENCES usuarios(id)
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS ahorros_mensuales (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            plan_id INTEGER,
-            mes INTEGER,
-            monto REAL,
-            fecha TEXT,
-            FOREIGN KEY(plan_id) REFERENCES planes_ahorro(id)
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-crear_base()
+    # Las tablas e índices se crean con las migraciones versionadas (migraciones.py)
+    # la primera vez que se abre la conexión compartida.
+    obtener_conexion()
 
 # ====== DIALOGO DE LOGIN ======
 class LoginDialog(QDialog):
@@ -126,62 +103,133 @@ class LoginDialog(QDialog):
             QMessageBox.critical(self, "Error", "Por favor ingresa usuario y contraseña.")
             return
 
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-
-        # Compatibilidad: asegurar columna contrasena
-        cur.execute("PRAGMA table_info(usuarios)")
-        columnas = [col[1] for col in cur.fetchall()] 
-        if "contrasena" not in columnas:
-            cur.execute("ALTER TABLE usuarios ADD COLUMN contrasena TEXT")
-            conn.commit()
-
-        cur.execute("SELECT id, contrasena FROM usuarios WHERE nombre=?", (nombre,))
-        row = cur.fetchone()
+        db = obtener_conexion()
+        row = db.uno("SELECT id, contrasena FROM usuarios WHERE nombre=?", (nombre,))
 
         if row:
             usuario_id, contrasena_guardada = row
             if contrasena == contrasena_guardada:
-                conn.close()
                 self.usuario_id = usuario_id
                 self.nombre = nombre
                 self.accept()
             else:
-                conn.close()
                 QMessageBox.critical(self, "Error", "Contraseña incorrecta.")
         else:
             resp = QMessageBox.question(self, "Nuevo usuario",
                                          f"El usuario '{nombre}' no existe. ¿Deseas crear una cuenta nueva?",
                                          QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if resp == QMessageBox.StandardButton.Yes:
-                cur.execute("INSERT INTO usuarios (nombre, contrasena) VALUES (?, ?)", (nombre, contrasena))
-                conn.commit()
-                usuario_id = cur.lastrowid
-                conn.close()
+                with db.transaccion():
+                    usuario_id = db.ejecutar("INSERT INTO usuarios (nombre, contrasena) VALUES (?, ?)", (nombre, contrasena)).lastrowid
                 QMessageBox.information(self, "Éxito", f"Cuenta creada para {nombre}.")
                 self.usuario_id = usuario_id
                 self.nombre = nombre
                 self.accept()
             else:
-                conn.close()
                 return
 
+# ====== TRABAJO EN SEGUNDO PLANO ======
+# Estas funciones corren en el QThreadPool (ver tareas.py): no deben tocar widgets.
+FILAS_POR_AVISO = 1000     # Cada cuántas filas se informa progreso al exportar
+TRAYECTORIAS_SIMULACION = 200_000
+
+def _leer_ultimo_plan(tarea, db, usuario_id):
+    # Fila del plan y serie de acumulados de una vez; la GUI los guarda en su CachePlan
+    return leer_ultimo_plan(db, usuario_id)
+
+def _purgar_usuario(tarea, db, usuario_id):
+    # Borrado físico por bloques cortos (borrado.py); si se cancela, lo termina la próxima sesión
+    return borrado.purgar_usuario(db, usuario_id, cancelado=lambda: tarea.cancelada)
+
+def _purgar_pendientes(tarea, db):
+    return borrado.purgar_pendientes(db, cancelado=lambda: tarea.cancelada)
+
+def _simular_plan(tarea, params, semilla):
+    # Los lotes se reparten en procesos (simulacion.py); el hilo solo espera y reporta avance
+    return simulacion.simular(params, TRAYECTORIAS_SIMULACION, semilla,
+                              progreso=lambda hechos, total: tarea.informar_progreso(hechos * 100 / total),
+                              cancelado=lambda: tarea.cancelada)
+
+def _copiar_backup(tarea, db, destino):
+    # Copia en caliente con la API de backup de SQLite (respaldo.py), desde una conexión propia
+    def avance(porcentaje):
+        tarea.comprobar_cancelacion()
+        tarea.informar_progreso(porcentaje)
+    try:
+        return respaldo.respaldar(db.ruta, destino, progreso=avance)
+    except tareas.TareaCancelada:
+        if os.path.exists(destino):
+            os.remove(destino) # No dejar una copia a medias
+        raise
+
+def _escribir_exportacion(tarea, db, plan, nombre_usuario, filename):
+    # El plan llega de la caché de la ventana; los ahorros mensuales se leen por bloques mientras se escriben
+    if plan is None:
+        return None
+    plan_id = plan.id
+    total = db.uno("SELECT COUNT(*) FROM ahorros_mensuales WHERE plan_id=?", (plan_id,))[0] or 1
+
+    lectura = exportador.abrir_solo_lectura(db.ruta)
+    try:
+        cur = lectura.execute("SELECT mes, monto, fecha, acumulado FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes, id", (plan_id,))
+        # Centavos de la base -> pesos en el archivo
+        filas = ((mes, texto(monto), fecha, texto(acumulado)) for mes, monto, fecha, acumulado in exportador.iterar_filas(cur))
+        _escribir_csv_plan(tarea, filename, nombre_usuario, plan, filas, total)
+    finally:
+        lectura.close()
+    return filename
+
+def _escribir_csv_plan(tarea, filename, nombre_usuario, plan, filas, total):
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        
+        # Encabezado del Plan
+        writer.writerow(["Plan de Ahorro", nombre_usuario])
+        writer.writerow(["Métrica", "Valor"])
+        
+        # Datos del Plan
+        writer.writerow(["Meta", f"{plan.meta:.2f}"])
+        writer.writerow(["Plazo (meses)", plan.plazo])
+        writer.writerow(["Ingreso Mensual", f"{plan.ingreso:.2f}"])
+        writer.writerow(["Comida", f"{plan.comida:.2f}"])
+        writer.writerow(["Transporte", f"{plan.transporte:.2f}"])
+        writer.writerow(["Otros Gastos", f"{plan.otros:.2f}"])
+        writer.writerow(["Ahorrado Total", f"{plan.ahorrado:.2f}"])
+        writer.writerow(["Mes Actual", plan.mes_actual])
+        writer.writerow([]) # Fila vacía para separación
+        
+        # Datos Mensuales
+        writer.writerow(["Historial Mensual"])
+        writer.writerow(["Mes", "Monto Ahorrado ($)", "Fecha", "Acumulado ($)"])
+        
+        # Escribir registros mensuales
+        for i, row in enumerate(filas, 1):
+            writer.writerow(row)
+            if i % FILAS_POR_AVISO == 0:
+                tarea.comprobar_cancelacion()
+                tarea.informar_progreso(i * 100 / total)
+
 # ====== VENTANA PRINCIPAL ======
 class MainWindow(QMainWindow):
     def __init__(self, nombre_usuario, usuario_id):
         super().__init__()
         self.nombre_usuario = nombre_usuario
         self.usuario_id = usuario_id
-        self.current_plan_id = None
+        self.db = obtener_conexion()
+        self.cache = CachePlan(self.db) # Plan activo en memoria (ver cache_plan.py)
 
         self.setWindowTitle(f"Planificador de Ahorros - {self.nombre_usuario}")
         self.setMinimumSize(QSize(900, 650))
         self.setWindowIcon(QIcon("logo.png"))
         
-        self.init_ui()
+        with tiempos.fase("init_ui"):
+            self.init_ui()
         self.cargar_ultimo_plan()
 
     def init_ui(self):
+        # Los cambios en los campos se agrupan en un solo recálculo
+        self.recalculo = ProgramadorRecalculo(self.calcular_plan, parent=self)
+
         central = QWidget()
         self.setCentralWidget(central)
         main_layout = QHBoxLayout()
@@ -235,34 +283,46 @@ class MainWindow(QMainWindow):
         # Campos
         lf_layout.addWidget(QLabel("🎯 Meta de ahorro ($):"), 1, 0)
         self.meta_edit = QLineEdit(); self.meta_edit.setText("0.00"); lf_layout.addWidget(self.meta_edit, 1, 1)
-        self.meta_edit.textChanged.connect(self.calcular_plan)
+        self.meta_edit.textChanged.connect(self.recalculo.programar)
 
         lf_layout.addWidget(QLabel("⏳ Plazo (meses):"), 2, 0)
         self.plazo_edit = QLineEdit(); self.plazo_edit.setText("1"); lf_layout.addWidget(self.plazo_edit, 2, 1)
-        self.plazo_edit.textChanged.connect(self.calcular_plan)
+        self.plazo_edit.textChanged.connect(self.recalculo.programar)
 
         lf_layout.addWidget(QLabel("💰 Ingreso mensual ($):"), 3, 0)
         self.ingreso_edit = QLineEdit(); self.ingreso_edit.setText("0.00"); lf_layout.addWidget(self.ingreso_edit, 3, 1)
-        self.ingreso_edit.textChanged.connect(self.calcular_plan)
+        self.ingreso_edit.textChanged.connect(self.recalculo.programar)
 
         lf_layout.addWidget(QLabel("🍽️ Comida ($):"), 4, 0)
         self.comida_edit = QLineEdit(); self.comida_edit.setText("0.00"); lf_layout.addWidget(self.comida_edit, 4, 1)
-        self.comida_edit.textChanged.connect(self.calcular_plan)
+        self.comida_edit.textChanged.connect(self.recalculo.programar)
 
         lf_layout.addWidget(QLabel("🚌 Transporte ($):"), 5, 0)
         self.transporte_edit = QLineEdit(); self.transporte_edit.setText("0.00"); lf_layout.addWidget(self.transporte_edit, 5, 1)
-        self.transporte_edit.textChanged.connect(self.calcular_plan)
+        self.transporte_edit.textChanged.connect(self.recalculo.programar)
 
         lf_layout.addWidget(QLabel("📱 Otros gastos ($):"), 6, 0)
         self.otros_edit = QLineEdit(); self.otros_edit.setText("0.00"); lf_layout.addWidget(self.otros_edit, 6, 1)
-        self.otros_edit.textChanged.connect(self.calcular_plan)
+        self.otros_edit.textChanged.connect(self.recalculo.programar)
 
         lf_layout.addWidget(QLabel("💵 Ahorro actual ($):"), 7, 0)
         self.ahorrado_edit = QLineEdit(); self.ahorrado_edit.setText("0.00"); lf_layout.addWidget(self.ahorrado_edit, 7, 1)
-        self.ahorrado_edit.textChanged.connect(self.calcular_plan)
+        self.ahorrado_edit.textChanged.connect(self.recalculo.programar)
+
+        # Supuestos de la proyección (proyeccion.py); en cero el cálculo es lineal como siempre
+        lf_layout.addWidget(QLabel("📈 Interés anual (%):"), 8, 0)
+        self.tasa_edit = QLineEdit(); self.tasa_edit.setText("0.00"); lf_layout.addWidget(self.tasa_edit, 8, 1)
+        self.tasa_edit.textChanged.connect(self.recalculo.programar)
 
-        lf_layout.addWidget(QLabel("📆 Aporte sugerido mensual ($):"), 8, 0)
-        self.aporte_label = QLabel("--"); lf_layout.addWidget(self.aporte_label, 8, 1)
+        lf_layout.addWidget(QLabel("🏷️ Inflación anual (%):"), 9, 0)
+        self.inflacion_edit = QLineEdit(); self.inflacion_edit.setText("0.00"); lf_layout.addWidget(self.inflacion_edit, 9, 1)
+        self.inflacion_edit.textChanged.connect(self.recalculo.programar)
+
+        self.al_inicio_check = QCheckBox("Aportar al inicio de cada mes"); lf_layout.addWidget(self.al_inicio_check, 10, 1)
+        self.al_inicio_check.toggled.connect(self.recalculo.programar)
+
+        lf_layout.addWidget(QLabel("📆 Aporte sugerido mensual ($):"), 11, 0)
+        self.aporte_label = QLabel("--"); lf_layout.addWidget(self.aporte_label, 11, 1)
 
         # Resultado / progreso / alerta (Contenedor derecho)
         right_vbox = QVBoxLayout()
@@ -292,11 +352,21 @@ class MainWindow(QMainWindow):
         self.mes_label.setFont(QFont("Helvetica", 10, QFont.Weight.Bold))
         right_vbox.addWidget(self.mes_label)
 
-        # Gráfico embebido (matplotlib)
-        self.figure = Figure(figsize=(6, 2.5), tight_layout=True)
-        self.canvas = FigureCanvas(self.figure)
-        self.canvas.setStyleSheet("background-color: white; border-radius: 6px;") # Fondo blanco sólido para el gráfico
-        right_vbox.addWidget(self.canvas)
+        # Gráfico embebido (matplotlib): mientras no se necesite se muestra un marcador liviano
+        self.grafico = None
+        self.grafico_placeholder = QLabel("Sin datos de ahorro aún")
+        self.grafico_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.grafico_placeholder.setMinimumHeight(250)
+        self.grafico_placeholder.setStyleSheet("background-color: white; border-radius: 6px; color: gray; font-size: 12pt;")
+
+        # Pestañas: progreso del plan y explorador de escenarios
+        self.mapa = None
+        self.recalculo_escenarios = ProgramadorRecalculo(self.calcular_escenarios, parent=self)
+        self.pestanas = QTabWidget()
+        self.pestanas.addTab(self.grafico_placeholder, "Progreso")
+        self.pestanas.addTab(self.crear_panel_escenarios(), "Escenarios")
+        self.pestanas.currentChanged.connect(self._cambio_pestana)
+        right_vbox.addWidget(self.pestanas)
 
         # Botones panel derecho (organizados en grid)
         btn_frame = QFrame()
@@ -313,6 +383,7 @@ class MainWindow(QMainWindow):
             ("Guardar Datos", self.guardar_datos, BUTTON_COLORS["guardar"]),
             ("Finalizar Mes", self.finalizar_mes, BUTTON_COLORS["finalizar"]),
             ("Ver Historial", self.ver_historial, BUTTON_COLORS["historial"]),
+            ("Simular Plan", self.simular_plan, BUTTON_COLORS["simular"]),
             ("Limpiar Datos", self.limpiar_datos, BUTTON_COLORS["limpiar"]),
             ("Borrar Todo", self.borrar_datos_usuario, BUTTON_COLORS["borrar"]),
             ("Exportar Datos", self.exportar_datos, BUTTON_COLORS["exportar"]), 
@@ -333,71 +404,91 @@ class MainWindow(QMainWindow):
 
     # ====== FUNCIONES DE LÓGICA ======
     
+    @property
+    def current_plan_id(self):
+        return self.cache.plan_id
+
+    def supuestos_formulario(self):
+        # Los campos se escriben en %; proyeccion.py trabaja con fracciones
+        valor = self.recalculo.valor
+        return proyeccion.Supuestos(valor("tasa", self.tasa_edit) / 100, valor("inflacion", self.inflacion_edit) / 100,
+                                    self.al_inicio_check.isChecked())
+
+    def ruta_ideal(self, plan, meses):
+        # Lo que el gráfico muestra es lo ahorrado en el plan sin el ahorro inicial
+        inicial = float(plan.ahorrado_inicial)
+        ruta = proyeccion.ruta_ideal(float(plan.meta), inicial, plan.plazo, meses, proyeccion.supuestos_de(plan))
+        return [v - inicial for v in ruta]
+
     def calcular_plan(self):
+        # Una llamada directa absorbe cualquier recálculo que estuviera pendiente
+        self.recalculo.cancelar()
+        valor = self.recalculo.valor
         try:
-            meta = float(self.meta_edit.text())
-            plazo = int(self.plazo_edit.text())
-            ingreso = float(self.ingreso_edit.text())
-            comida = float(self.comida_edit.text())
-            transporte = float(self.transporte_edit.text())
-            otros = float(self.otros_edit.text())
-            ahorrado = float(self.ahorrado_edit.text())
-
-            if plazo <= 0:
-                 self.resultado_label.setText("⚠️ El plazo debe ser mayor que 0.")
+            # Los montos se calculan en centavos exactos (dinero.py)
+            meta = valor("meta", self.meta_edit, Dinero.desde)
+            plazo = valor("plazo", self.plazo_edit, int)
+            ingreso = valor("ingreso", self.ingreso_edit, Dinero.desde)
+            comida = valor("comida", self.comida_edit, Dinero.desde)
+            transporte = valor("transporte", self.transporte_edit, Dinero.desde)
+            otros = valor("otros", self.otros_edit, Dinero.desde)
+            ahorrado = valor("ahorrado", self.ahorrado_edit, Dinero.desde)
+            supuestos = self.supuestos_formulario()
+
+            r = motor_ahorro.calcular(meta, plazo, ingreso, comida, transporte, otros, ahorrado, supuestos)
+
+            if r.estado == motor_ahorro.ESTADO_PLAZO_INVALIDO:
+                 fijar_texto(self.resultado_label, "⚠️ El plazo debe ser mayor que 0.")
                  self.progress.setValue(0)
-                 self.alerta_label.setText("")
-                 self.faltante_label.setText("")
+                 fijar_texto(self.alerta_label, "")
+                 fijar_texto(self.faltante_label, "")
                  return
 
-            gastos_totales = comida + transporte + otros
-            disponible = ingreso - gastos_totales
-            
-            if disponible < 0:
-                 self.resultado_label.setText("⚠️ Gastos superan ingresos. No puedes ahorrar.")
-                 self.alerta_label.setText(f"💸 Te faltan ${abs(disponible):.2f} para cubrir gastos.")
+            if r.estado == motor_ahorro.ESTADO_GASTOS_SUPERAN:
+                 fijar_texto(self.resultado_label, "⚠️ Gastos superan ingresos. No puedes ahorrar.")
+                 fijar_texto(self.alerta_label, f"💸 Te faltan ${abs(r.disponible):.2f} para cubrir gastos.")
                  self.progress.setValue(0)
-                 self.aporte_label.setText("$0.00/mes")
-                 self.faltante_label.setText("")
+                 fijar_texto(self.aporte_label, "$0.00/mes")
+                 fijar_texto(self.faltante_label, "")
                  return
             else:
-                 self.alerta_label.setText(f"✅ Disponible para ahorro: ${disponible:.2f}/mes")
+                 fijar_texto(self.alerta_label, f"✅ Disponible para ahorro: ${r.disponible:.2f}/mes")
 
-            faltante = meta - ahorrado
-            
-            if faltante <= 0:
-                aporte_necesario = 0
-                self.faltante_label.setText("🎉 Meta alcanzada.")
-                self.resultado_label.setText("✅ ¡Felicidades! Meta ya cumplida.")
+            if r.estado == motor_ahorro.ESTADO_META_CUMPLIDA:
+                fijar_texto(self.faltante_label, "🎉 Meta alcanzada.")
+                fijar_texto(self.resultado_label, "✅ ¡Felicidades! Meta ya cumplida.")
             else:
-                aporte_necesario = faltante / plazo
-                self.faltante_label.setText(f"💸 Te faltan ${faltante:.2f}")
-                self.resultado_label.setText(f"✅ Ahorrando ${aporte_necesario:.2f} por mes, alcanzarás la meta.")
+                if supuestos.inflacion_anual:
+                    fijar_texto(self.faltante_label, f"💸 Te faltan ${r.faltante:.2f} "
+                                                     f"(meta con inflación: ${proyeccion.meta_ajustada(meta, plazo, supuestos):.2f})")
+                else:
+                    fijar_texto(self.faltante_label, f"💸 Te faltan ${r.faltante:.2f}")
+                fijar_texto(self.resultado_label, f"✅ Ahorrando ${r.aporte_necesario:.2f} por mes, alcanzarás la meta.")
             
-            self.aporte_label.setText(f"${aporte_necesario:.2f}/mes")
+            fijar_texto(self.aporte_label, f"${r.aporte_necesario:.2f}/mes")
 
-            progreso = int((ahorrado / meta) * 100) if meta > 0 else 0
-            self.progress.setValue(max(0, min(progreso, 100)))
+            self.progress.setValue(max(0, min(int(r.progreso), 100)))
 
         except ValueError:
-             self.resultado_label.setText("⚠️ Introduce valores numéricos válidos en todos los campos.")
+             fijar_texto(self.resultado_label, "⚠️ Introduce valores numéricos válidos en todos los campos.")
              self.progress.setValue(0)
-             self.aporte_label.setText("--")
-             self.alerta_label.setText("")
-             self.faltante_label.setText("")
+             fijar_texto(self.aporte_label, "--")
+             fijar_texto(self.alerta_label, "")
+             fijar_texto(self.faltante_label, "")
         except Exception as e:
             QMessageBox.critical(self, "Error de Cálculo", f"Error desconocido: {e}")
 
 
     def guardar_datos(self):
         try:
-            meta = float(self.meta_edit.text())
+            meta = Dinero.desde(self.meta_edit.text())
             plazo = int(self.plazo_edit.text())
-            ingreso = float(self.ingreso_edit.text())
-            comida = float(self.comida_edit.text())
-            transporte = float(self.transporte_edit.text())
-            otros = float(self.otros_edit.text())
-            ahorrado = float(self.ahorrado_edit.text())
+            ingreso = Dinero.desde(self.ingreso_edit.text())
+            comida = Dinero.desde(self.comida_edit.text())
+            transporte = Dinero.desde(self.transporte_edit.text())
+            otros = Dinero.desde(self.otros_edit.text())
+            ahorrado = Dinero.desde(self.ahorrado_edit.text())
+            supuestos = self.supuestos_formulario()
         except ValueError:
             QMessageBox.critical(self, "Error", "Completa todos los campos con valores numéricos válidos antes de guardar.")
             return
@@ -406,20 +497,9 @@ class MainWindow(QMainWindow):
              QMessageBox.critical(self, "Error", "Meta y Plazo deben ser mayores a cero.")
              return
 
-        datos = (
-            meta, plazo, ingreso, comida, transporte, otros,
-            ahorrado, self.usuario_id, datetime.date.today().isoformat()
-        )
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO planes_ahorro (meta, plazo, ingreso, comida, transporte, otros, ahorrado, usuario_id, fecha_inicio, mes_actual)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
-            """, datos)
-            conn.commit()
-            self.current_plan_id = cur.lastrowid
-            conn.close()
+            self.cache.crear(self.usuario_id, meta, plazo, ingreso, comida, transporte, otros,
+                             ahorrado, datetime.date.today().isoformat(), supuestos)
             QMessageBox.information(self, "Éxito", "Nuevo plan de ahorro guardado correctamente.")
             self.actualizar_grafico()
             self.calcular_plan() 
@@ -432,56 +512,50 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Atención", "Primero guarda un plan antes de finalizar un mes.")
             return
 
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute("SELECT mes_actual, plazo, ahorrado, meta FROM planes_ahorro WHERE id=?", (self.current_plan_id,))
-        row = cur.fetchone()
+        plan = self.cache.plan
         
-        if not row:
-            conn.close()
+        if not plan:
             QMessageBox.critical(self, "Error", "No se encontró el plan de ahorro activo.")
             return
 
-        mes_actual, plazo, ahorrado, meta = row
+        mes_actual, plazo, ahorrado, meta = plan.mes_actual, plan.plazo, plan.ahorrado, plan.meta
         
         if mes_actual > plazo:
-            conn.close()
             QMessageBox.information(self, "Plan completado", "🎉 Ya has finalizado todos los meses de tu plan.")
             return
 
-        monto_sugerido = 0
-        try:
-            faltante = meta - ahorrado
-            if faltante > 0 and (plazo - mes_actual + 1) > 0:
-                monto_sugerido = faltante / (plazo - mes_actual + 1)
-        except Exception:
-            monto_sugerido = 0
+        monto_sugerido = motor_ahorro.aporte_sugerido_mes(meta, ahorrado, plazo, mes_actual, proyeccion.supuestos_de(plan))
             
         monto, ok = QInputDialog.getDouble(self, "Finalizar mes", 
                                           f"¿Cuánto ahorraste en el **Mes {mes_actual}**?\n(Aporte sugerido: ${monto_sugerido:.2f})", 
-                                          value=monto_sugerido, decimals=2, min=-1000000)
+                                          value=float(monto_sugerido), decimals=2, min=-1000000)
         
         if not ok:
-            conn.close()
             return
             
         if monto < 0:
              QMessageBox.warning(self, "Advertencia", "El monto ahorrado no puede ser negativo, por favor ajusta tus gastos o meta.")
-             conn.close()
              return
+        monto = Dinero.desde(monto) # El diálogo devuelve un float con dos decimales
 
-        nuevo_ahorrado = ahorrado + monto
-        
-        cur.execute("UPDATE planes_ahorro SET ahorrado=?, mes_actual=? WHERE id=?", 
-                    (nuevo_ahorrado, mes_actual + 1, self.current_plan_id))
-        
-        cur.execute("INSERT INTO ahorros_mensuales (plan_id, mes, monto, fecha) VALUES (?, ?, ?, ?)",
-                      (self.current_plan_id, mes_actual, monto, datetime.date.today().isoformat()))
-        conn.commit()
-        conn.close()
+        # El índice de acumulados se extiende con el nuevo mes y la caché se actualiza en el lugar.
+        # Se cierra el mes que se preguntó: si otra ventana lo cerró mientras el diálogo estaba abierto, no se duplica
+        try:
+            acumulado, plan = self.cache.registrar_aporte(monto, datetime.date.today().isoformat(), mes_actual)
+        except MesYaCerrado:
+            QMessageBox.warning(self, "Mes ya cerrado",
+                                f"El Mes {mes_actual} se cerró desde otra sesión mientras tanto. Se recargaron los datos del plan.")
+            self._refrescar_plan()
+            return
+        except sqlite3.OperationalError as e:
+            QMessageBox.critical(self, "Base de datos ocupada", f"No se pudo guardar el mes; inténtalo de nuevo.\n{e}")
+            return
+        nuevo_ahorrado = plan.ahorrado
 
         self.ahorrado_edit.setText(f"{nuevo_ahorrado:.2f}")
-        self.actualizar_grafico()
+        # Solo se añade el nuevo punto; si el gráfico estaba vacío se construye completo
+        if self.grafico is None or not self.grafico.agregar_punto(acumulado.pesos):
+            self.actualizar_grafico()
         self.calcular_plan()
         
         self.mes_label.setText(f"📅 Mes {mes_actual} finalizado. Nuevo mes: {mes_actual + 1}")
@@ -495,81 +569,209 @@ class MainWindow(QMainWindow):
              self.resultado_label.setText("✅ Meta alcanzada.")
 
 
+    def _refrescar_plan(self):
+        # Tras un cambio hecho desde otra sesión: campos, gráfico y cálculo con lo que hay en la base
+        plan = self.cache.plan
+        if plan is None:
+            return
+        self.ahorrado_edit.setText(f"{plan.ahorrado:.2f}")
+        self.mes_label.setText(f"📅 Mes actual: {plan.mes_actual}")
+        self.actualizar_grafico()
+        self.calcular_plan()
+
     def actualizar_grafico(self):
         if not self.current_plan_id:
             self.plot_sin_datos()
             return
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute("SELECT mes, monto, fecha FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes", (self.current_plan_id,))
-        datos = cur.fetchall()
-        conn.close()
-        
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute("SELECT meta, plazo FROM planes_ahorro WHERE id=?", (self.current_plan_id,))
-        plan_data = cur.fetchone()
-        meta_total = plan_data[0] if plan_data else 0.0
-        plazo_total = plan_data[1] if plan_data else 0
-        conn.close()
-
-        if not datos:
+        # Serie y plan salen de la caché; solo se leen de la base si otra conexión los cambió
+        montos_acumulados = self.cache.acumulados()
+        plan = self.cache.plan
+        meta_total = float(plan.meta) if plan else 0.0
+        plazo_total = plan.plazo if plan else 0
+
+        if not montos_acumulados:
             self.plot_sin_datos()
             return
-
-        meses = [d[0] for d in datos]
-        montos_mensuales = [d[1] for d in datos]
-        montos_acumulados = [sum(montos_mensuales[:i+1]) for i in range(len(montos_mensuales))]
         
         try:
-            fecha_inicio = datetime.datetime.fromisoformat(datos[0][2])
+            fecha_inicio = datetime.datetime.fromisoformat(self.cache.primera_fecha())
             mes_inicio = fecha_inicio.month
         except Exception:
             mes_inicio = datetime.date.today().month
 
-        nombres_meses = [
-            "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-            "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
-        ]
-        etiquetas = [nombres_meses[(mes_inicio + i - 1) % 12] for i in range(len(meses))]
-
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        
-        ax.plot(range(len(montos_acumulados)), montos_acumulados, marker='o', linewidth=2, label="Ahorro Acumulado")
-        
-        if meta_total > 0:
-            ax.axhline(meta_total, color='r', linestyle='--', label="Meta")
-            
-        ruta_ideal = [(meta_total / plazo_total) * (i + 1) for i in range(len(montos_acumulados))]
-        if ruta_ideal and plazo_total > 0:
-             ax.plot(range(len(ruta_ideal)), ruta_ideal, color='g', linestyle=':', label="Ruta Ideal")
-             
-        ax.set_xticks(range(len(montos_acumulados)))
-        ax.set_xticklabels(etiquetas, rotation=45, fontsize=8)
-        ax.set_ylabel("Monto Acumulado ($)")
-        ax.set_title("Progreso del Ahorro")
-        ax.grid(True, linestyle='--', alpha=0.4)
-        ax.legend(loc='upper left', fontsize='small')
-        self.canvas.draw()
+        # El controlador del gráfico no redibuja si la serie no cambió
+        ruta = self.ruta_ideal(plan, max(plazo_total, len(montos_acumulados))) if plan else None
+        self.obtener_grafico().mostrar_serie(montos_acumulados, meta_total, plazo_total, mes_inicio, ruta)
 
     def plot_sin_datos(self):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        ax.text(0.5, 0.5, "Sin datos de ahorro aún", horizontalalignment='center', verticalalignment='center', fontsize=12, color='gray')
-        ax.set_xticks([]); ax.set_yticks([])
-        self.canvas.draw()
+        # Sin datos no hace falta cargar matplotlib: basta con el marcador
+        if self.grafico is not None:
+            self.grafico.mostrar_sin_datos()
+
+    def obtener_grafico(self):
+        # Primera vez que se dibuja una serie: se importa matplotlib y se reemplaza el marcador
+        if self.grafico is None:
+            with tiempos.fase("matplotlib + gráfico"):
+                from grafico import GraficoAhorro
+                self.grafico = GraficoAhorro()
+            self.canvas = self.grafico.canvas
+            self.canvas.setStyleSheet("background-color: white; border-radius: 6px;") # Fondo blanco sólido para el gráfico
+            actual = self.pestanas.currentIndex()
+            indice = self.pestanas.indexOf(self.grafico_placeholder)
+            self.pestanas.removeTab(indice)
+            self.pestanas.insertTab(indice, self.canvas, "Progreso")
+            self.pestanas.setCurrentIndex(actual)
+            self.grafico_placeholder.deleteLater()
+            self.grafico_placeholder = None
+        return self.grafico
+
+    # ====== SIMULACIÓN ======
+    def simular_plan(self):
+        plan = self.cache.plan
+        if plan is None:
+            QMessageBox.warning(self, "Atención", "Primero guarda o carga un plan para simularlo.")
+            return
+        if plan.mes_actual > plan.plazo:
+            QMessageBox.information(self, "Simulación", "El plazo del plan ya terminó: no quedan meses por simular.")
+            return
+        params = simulacion.desde_plan(float(plan.meta), plan.plazo, float(plan.ingreso), float(plan.comida),
+                                       float(plan.transporte), float(plan.otros), float(plan.ahorrado), plan.mes_actual)
+        # Misma semilla para el mismo plan y mes: repetir la simulación da el mismo resultado
+        tareas.ejecutar_con_progreso(
+            self, "Simulando el plan", _simular_plan, params, plan.id * 1000 + plan.mes_actual,
+            al_terminar=lambda r: self._simulacion_terminada(plan, r),
+            al_error=lambda e: QMessageBox.critical(self, "Error de Simulación", f"No se pudo simular el plan: {e}"),
+        )
+
+    def _simulacion_terminada(self, plan, resultado):
+        if self.cache.plan_id != plan.id:
+            return # Se cambió de plan mientras se simulaba
+        self.actualizar_grafico()
+        grafico = self.obtener_grafico()
+        if not self.cache.acumulados():
+            grafico.mostrar_serie([], float(plan.meta), plan.plazo, datetime.date.today().month, self.ruta_ideal(plan, plan.plazo))
+        # El gráfico muestra lo ahorrado en el plan sin el ahorro inicial; las bandas siguen esa línea
+        inicial = float(plan.ahorrado_inicial)
+        grafico.mostrar_bandas(plan.mes_actual - 1, {p: [v - inicial for v in valores]
+                                                     for p, valores in resultado.bandas.items()})
+        self.pestanas.setCurrentIndex(self.pestanas.indexOf(self.canvas))
+        self.resultado_label.setText(
+            f"🎲 Probabilidad de llegar a la meta: {resultado.probabilidad * 100:.1f}% "
+            f"({resultado.trayectorias:,} simulaciones con ingreso, gastos e imprevistos variables)")
+
+    # ====== ESCENARIOS ======
+    def crear_panel_escenarios(self):
+        panel = QWidget()
+        v = QVBoxLayout()
+        panel.setLayout(v)
+        self.escenario_edits = {}
+        if not escenarios.disponible_numpy():
+            v.addWidget(QLabel("Instala numpy (pip install numpy) para explorar escenarios."))
+            return panel
+
+        form = QGridLayout()
+        etiquetas = {"meta": "Meta", "plazo": "Plazo", "ingreso": "Ingreso",
+                     "comida": "Comida", "transporte": "Transporte", "otros": "Otros"}
+        for i, eje in enumerate(escenarios.EJES):
+            edit = QLineEdit()
+            edit.setPlaceholderText("desde:hasta:pasos")
+            edit.textChanged.connect(self.recalculo_escenarios.programar)
+            self.escenario_edits[eje] = edit
+            form.addWidget(QLabel(etiquetas[eje]), i // 3, (i % 3) * 2)
+            form.addWidget(edit, i // 3, (i % 3) * 2 + 1)
+        v.addLayout(form)
+
+        self.escenario_label = QLabel("")
+        self.escenario_label.setWordWrap(True)
+        v.addWidget(self.escenario_label)
+
+        self.mapa_placeholder = QLabel("")
+        self.mapa_placeholder.setMinimumHeight(200)
+        v.addWidget(self.mapa_placeholder)
+        self.escenario_layout = v
+        return panel
+
+    def _cambio_pestana(self, indice):
+        if self.pestanas.widget(indice) is not None and self.pestanas.tabText(indice) == "Escenarios":
+            if self.escenario_edits and not any(e.text() for e in self.escenario_edits.values()):
+                self.rangos_por_defecto()
+            self.calcular_escenarios()
+
+    def rangos_por_defecto(self):
+        # Alrededor de los valores del formulario; unos 10^6 escenarios en total
+        def numero(edit, defecto=0.0):
+            try:
+                return float(edit.text())
+            except ValueError:
+                return defecto
+        meta, plazo, ingreso = numero(self.meta_edit), int(numero(self.plazo_edit, 12)), numero(self.ingreso_edit)
+        rangos = {
+            "meta": f"{meta * 0.5:.0f}:{meta * 1.5:.0f}:50" if meta > 0 else "0",
+            "plazo": f"{max(1, plazo // 2)}:{max(2, plazo * 2)}:40",
+            "ingreso": f"{ingreso * 0.75:.0f}:{ingreso * 1.25:.0f}:8" if ingreso > 0 else "0",
+        }
+        for eje, edit, pasos in (("comida", self.comida_edit, 5), ("transporte", self.transporte_edit, 5), ("otros", self.otros_edit, 4)):
+            valor = numero(edit)
+            rangos[eje] = f"{valor * 0.5:.0f}:{valor * 1.5:.0f}:{pasos}" if valor > 0 else "0"
+        with self.recalculo_escenarios.agrupado():
+            for eje, texto in rangos.items():
+                self.escenario_edits[eje].setText(texto)
+
+    def calcular_escenarios(self):
+        self.recalculo_escenarios.cancelar()
+        if not self.escenario_edits:
+            return
+        try:
+            rangos = [escenarios.leer_rango(self.escenario_edits[eje].text(), entero=(eje == "plazo"))
+                      for eje in escenarios.EJES]
+        except ValueError as e:
+            fijar_texto(self.escenario_label, f"⚠️ {e}")
+            return
+        total = escenarios.celdas(rangos)
+        if total > escenarios.MAX_CELDAS:
+            fijar_texto(self.escenario_label, f"⚠️ {total:,} escenarios es demasiado; el máximo es {escenarios.MAX_CELDAS:,}.")
+            return
+        try:
+            ahorrado = float(self.ahorrado_edit.text())
+        except ValueError:
+            ahorrado = 0.0
+
+        inicio = time.perf_counter()
+        grilla = escenarios.calcular_grilla(*rangos, ahorrado=ahorrado)
+        porcentajes = escenarios.porcentaje_alcanzable(grilla)
+        ms = (time.perf_counter() - inicio) * 1000
+
+        if self.mapa is None:
+            from grafico import MapaEscenarios
+            self.mapa = MapaEscenarios()
+            self.escenario_layout.replaceWidget(self.mapa_placeholder, self.mapa.canvas)
+            self.mapa_placeholder.deleteLater()
+            self.mapa_placeholder = None
+
+        # El plan del formulario, ubicado en la celda más cercana de la grilla
+        ejes = grilla.ejes
+        try:
+            actual = [float(e.text()) for e in (self.meta_edit, self.plazo_edit, self.ingreso_edit,
+                                                self.comida_edit, self.transporte_edit, self.otros_edit)]
+        except ValueError:
+            actual = None
+        detalle = ""
+        if actual:
+            i = [escenarios.indice_cercano(ejes[eje], valor) for eje, valor in zip(escenarios.EJES, actual)]
+            meses = grilla.meses_a_meta[i[0], i[2], i[3], i[4], i[5]]
+            detalle = (" Con ingreso y gastos actuales, ahorrando todo lo disponible la meta llega en "
+                       f"{int(meses)} meses." if meses != float("inf") else " Con ingreso y gastos actuales no queda nada para ahorrar.")
+        self.mapa.mostrar(porcentajes, ejes["plazo"], ejes["meta"], (actual[1], actual[0]) if actual else None)
+        fijar_texto(self.escenario_label, f"{total:,} escenarios, {float(grilla.alcanzable.mean()) * 100:.1f}% alcanzables "
+                                          f"(calculado en {ms:.1f} ms).{detalle}")
 
     def ver_historial(self):
         if not self.current_plan_id:
             QMessageBox.information(self, "Historial", "No hay plan cargado para mostrar historial.")
             return
 
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute("SELECT mes, monto, fecha FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes", (self.current_plan_id,))
-        datos = cur.fetchall()
-        conn.close()
+        # El modelo lee el historial por páginas a medida que se desplaza la tabla
+        modelo = ModeloHistorial(self.db, self.current_plan_id)
 
         tabla = QDialog(self)
         tabla.setWindowTitle(f"📋 Historial de {self.nombre_usuario}")
@@ -577,16 +779,45 @@ class MainWindow(QMainWindow):
         tabla.setWindowIcon(QIcon("logo.png"))
         v = QVBoxLayout()
         tabla.setLayout(v)
+        modelo.setParent(tabla)
+
+        # Filtro por rango de fechas
+        filtro = QHBoxLayout()
+        desde_edit = QLineEdit()
+        desde_edit.setPlaceholderText("Desde (AAAA-MM-DD)")
+        hasta_edit = QLineEdit()
+        hasta_edit.setPlaceholderText("Hasta (AAAA-MM-DD)")
+        filtrar_btn = QPushButton("Filtrar")
+        filtro.addWidget(desde_edit)
+        filtro.addWidget(hasta_edit)
+        filtro.addWidget(filtrar_btn)
+        v.addLayout(filtro)
+
+        total_label = QLabel()
+        v.addWidget(total_label)
+
+        table_view = QTableView()
+        table_view.setModel(modelo)
+        table_view.setSortingEnabled(True)
+        table_view.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        table_view.verticalHeader().setVisible(False)
+        table_view.verticalHeader().setDefaultSectionSize(22) # Filas de alto fijo: la vista no mide cada una
+        v.addWidget(table_view)
+
+        def aplicar_filtro():
+            fechas = []
+            for edit in (desde_edit, hasta_edit):
+                texto = edit.text().strip()
+                try:
+                    fechas.append(datetime.date.fromisoformat(texto).isoformat() if texto else None)
+                except ValueError:
+                    QMessageBox.warning(tabla, "Filtro", f"Fecha inválida: {texto}\nUsa el formato AAAA-MM-DD.")
+                    return
+            modelo.filtrar_fechas(*fechas)
+            total_label.setText(f"{modelo.total()} registros")
 
-        table_widget = QTableWidget()
-        table_widget.setColumnCount(3)
-        table_widget.setHorizontalHeaderLabels(["Mes", "Monto Ahorrado ($)", "Fecha"])
-        table_widget.setRowCount(len(datos))
-        for i, row in enumerate(datos):
-            table_widget.setItem(i, 0, QTableWidgetItem(str(row[0])))
-            table_widget.setItem(i, 1, QTableWidgetItem(f"{row[1]:.2f}"))
-            table_widget.setItem(i, 2, QTableWidgetItem(str(row[2])))
-        v.addWidget(table_widget)
+        filtrar_btn.clicked.connect(aplicar_filtro)
+        total_label.setText(f"{modelo.total()} registros")
         
         close_btn = QPushButton("Cerrar")
         close_btn.clicked.connect(tabla.close)
@@ -599,11 +830,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Atención", "Primero guarda un plan antes de limpiar.")
             return
             
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute("SELECT ahorrado, mes_actual FROM planes_ahorro WHERE id=?", (self.current_plan_id,))
-        plan = cur.fetchone()
-        conn.close()
+        plan = self.cache.plan
         
         if not plan:
              QMessageBox.warning(self, "Atención", "Plan no encontrado. No se puede limpiar.")
@@ -615,12 +842,7 @@ class MainWindow(QMainWindow):
         if resp != QMessageBox.StandardButton.Yes:
             return
         
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute("DELETE FROM ahorros_mensuales WHERE plan_id=?", (self.current_plan_id,))
-        cur.execute("UPDATE planes_ahorro SET ahorrado=0.0, mes_actual=1 WHERE id=?", (self.current_plan_id,))
-        conn.commit()
-        conn.close()
+        self.cache.limpiar()
         
         self.ahorrado_edit.setText("0.00")
         self.mes_label.setText("📅 Plan iniciado en Mes 1.")
@@ -636,24 +858,16 @@ class MainWindow(QMainWindow):
         if resp != QMessageBox.StandardButton.Yes:
             return
             
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        
-        cur.execute("SELECT id FROM planes_ahorro WHERE usuario_id=?", (self.usuario_id,))
-        plan_ids = [row[0] for row in cur.fetchall()]
-
-        for plan_id in plan_ids:
-            cur.execute("DELETE FROM ahorros_mensuales WHERE plan_id=?", (plan_id,))
+        # El usuario desaparece al instante; sus registros se purgan en segundo plano
+        try:
+            borrado.marcar_borrado(self.db, self.usuario_id)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudieron borrar los datos.\n{e}")
+            return
+        tareas.ejecutar(_purgar_usuario, self.db, self.usuario_id)
 
-        cur.execute("DELETE FROM planes_ahorro WHERE usuario_id=?", (self.usuario_id,))
-        cur.execute("DELETE FROM usuarios WHERE id=?", (self.usuario_id,))
-        
-        conn.commit()
-        conn.close()
-        
         QMessageBox.information(self, "Éxito", "Todos los datos y planes del usuario han sido borrados.")
-        self.close()
-        main()
+        volver_al_login(self)
 
     # Método para extraer backup de la DB
     def extraer_backup_db(self):
@@ -664,41 +878,28 @@ class MainWindow(QMainWindow):
         # Abrir diálogo para seleccionar dónde guardar
         filename, _ = QFileDialog.getSaveFileName(self, "Guardar Copia de Seguridad de la Base de Datos", 
                                                   nombre_sugerido,
-                                                  "Archivos de Base de Datos SQLite (*.db)")
+                                                  "Archivos de Base de Datos SQLite (*.db);;Comprimidos (*.db.gz *.db.zst)")
 
         if not filename:
             return
 
-        try:
-            # Copiar el archivo de la DB al destino seleccionado
-            shutil.copyfile(DB_FILE, filename)
-            QMessageBox.information(self, "Éxito", f"Copia de seguridad guardada correctamente en:\n{filename}")
-        except FileNotFoundError:
+        tareas.ejecutar_con_progreso(
+            self, "Guardando copia de seguridad", _copiar_backup, self.db, filename,
+            al_terminar=lambda f: QMessageBox.information(self, "Éxito", f"Copia de seguridad guardada correctamente en:\n{f}"),
+            al_error=self._error_backup,
+        )
+
+    def _error_backup(self, mensaje):
+        if not os.path.exists(DB_FILE):
             QMessageBox.critical(self, "Error", f"No se encontró el archivo de la base de datos: {DB_FILE}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error de Backup", f"No se pudo guardar la copia de seguridad: {e}")
+        else:
+            QMessageBox.critical(self, "Error de Backup", f"No se pudo guardar la copia de seguridad: {mensaje}")
 
     def exportar_datos(self):
         if not self.current_plan_id:
             QMessageBox.warning(self, "Atención", "No hay plan de ahorro cargado para exportar.")
             return
 
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        
-        # Obtener datos del plan y de los ahorros mensuales
-        cur.execute("SELECT meta, plazo, ingreso, comida, transporte, otros, ahorrado, mes_actual FROM planes_ahorro WHERE id=?", (self.current_plan_id,))
-        plan_data = cur.fetchone()
-        
-        cur.execute("SELECT mes, monto, fecha FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes", (self.current_plan_id,))
-        ahorro_mensual_data = cur.fetchall()
-        
-        conn.close()
-
-        if not plan_data and not ahorro_mensual_data:
-             QMessageBox.information(self, "Exportar", "No hay datos para exportar en el plan actual.")
-             return
-
         # Abrir diálogo para guardar archivo
         filename, _ = QFileDialog.getSaveFileName(self, "Guardar Historial de Ahorros", 
                                                   f"historial_ahorros_{self.nombre_usuario}.csv",
@@ -707,68 +908,54 @@ class MainWindow(QMainWindow):
         if not filename:
             return
 
-        try:
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                
-                # Encabezado del Plan
-                writer.writerow(["Plan de Ahorro", self.nombre_usuario])
-                writer.writerow(["Métrica", "Valor"])
-                
-                # Datos del Plan
-                writer.writerow(["Meta", f"{plan_data[0]:.2f}"])
-                writer.writerow(["Plazo (meses)", plan_data[1]])
-                writer.writerow(["Ingreso Mensual", f"{plan_data[2]:.2f}"])
-                writer.writerow(["Comida", f"{plan_data[3]:.2f}"])
-                writer.writerow(["Transporte", f"{plan_data[4]:.2f}"])
-                writer.writerow(["Otros Gastos", f"{plan_data[5]:.2f}"])
-                writer.writerow(["Ahorrado Total", f"{plan_data[6]:.2f}"])
-                writer.writerow(["Mes Actual", plan_data[7]])
-                writer.writerow([]) # Fila vacía para separación
-                
-                # Datos Mensuales
-                writer.writerow(["Historial Mensual"])
-                writer.writerow(["Mes", "Monto Ahorrado ($)", "Fecha"])
-                
-                # Escribir registros mensuales
-                for row in ahorro_mensual_data:
-                    writer.writerow(row)
-            
-            QMessageBox.information(self, "Éxito", f"Datos exportados correctamente a:\n{filename}")
+        tareas.ejecutar_con_progreso(
+            self, "Exportando datos", _escribir_exportacion,
+            self.db, self.cache.plan, self.nombre_usuario, filename,
+            al_terminar=self._exportacion_terminada,
+            al_error=lambda e: QMessageBox.critical(self, "Error de Exportación", f"No se pudieron exportar los datos: {e}"),
+        )
 
-        except Exception as e:
-            QMessageBox.critical(self, "Error de Exportación", f"No se pudieron exportar los datos: {e}")
+    def _exportacion_terminada(self, filename):
+        if filename is None:
+            QMessageBox.information(self, "Exportar", "No hay datos para exportar en el plan actual.")
+        else:
+            QMessageBox.information(self, "Éxito", f"Datos exportados correctamente a:\n{filename}")
 
     def regresar_login(self):
         resp = QMessageBox.question(self, "Cerrar sesión", "¿Deseas salir de la cuenta actual?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if resp == QMessageBox.StandardButton.Yes:
-            self.close()
-            main()
+            volver_al_login(self)
 
     def cargar_ultimo_plan(self):
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute("SELECT id FROM planes_ahorro WHERE usuario_id=? ORDER BY id DESC LIMIT 1", (self.usuario_id,))
-        row = cur.fetchone()
-        
-        if row:
-            self.current_plan_id = row[0]
-            cur.execute("SELECT meta, plazo, ingreso, comida, transporte, otros, ahorrado, mes_actual FROM planes_ahorro WHERE id=?", (self.current_plan_id,))
-            p = cur.fetchone()
+        # La lectura va en segundo plano; los campos se llenan al recibir el resultado
+        self._inicio_carga = time.perf_counter()
+        tareas.ejecutar(_leer_ultimo_plan, self.db, self.usuario_id,
+                        al_terminar=self.mostrar_ultimo_plan,
+                        al_error=lambda e: QMessageBox.warning(self, "Carga incompleta", f"No se pudo cargar el último plan.\n{e}"))
+
+    def mostrar_ultimo_plan(self, resultado):
+        if tiempos.ACTIVO: # Solo con AHORROS_TIEMPOS=1; la primera carga entra en el informe de arranque
+            tiempos.registrar_fase("cargar_ultimo_plan", time.perf_counter() - self._inicio_carga)
+        if resultado:
+            self.cache.establecer(resultado)
+            p = resultado.plan
             
             if p:
                 try:
-                    meta, plazo, ingreso, comida, transporte, otros, ahorrado, mes_actual = p
-                    
-                    self.meta_edit.setText(f"{meta:.2f}")
-                    self.plazo_edit.setText(str(plazo))
-                    self.ingreso_edit.setText(f"{ingreso:.2f}")
-                    self.comida_edit.setText(f"{comida:.2f}")
-                    self.transporte_edit.setText(f"{transporte:.2f}")
-                    self.otros_edit.setText(f"{otros:.2f}")
-                    self.ahorrado_edit.setText(f"{ahorrado:.2f}")
-                    self.mes_label.setText(f"📅 Plan cargado. Mes actual: {mes_actual}")
+                    # Los setText no disparan recálculos; se hace uno solo más abajo
+                    with self.recalculo.agrupado():
+                        self.meta_edit.setText(f"{p.meta:.2f}")
+                        self.plazo_edit.setText(str(p.plazo))
+                        self.ingreso_edit.setText(f"{p.ingreso:.2f}")
+                        self.comida_edit.setText(f"{p.comida:.2f}")
+                        self.transporte_edit.setText(f"{p.transporte:.2f}")
+                        self.otros_edit.setText(f"{p.otros:.2f}")
+                        self.ahorrado_edit.setText(f"{p.ahorrado:.2f}")
+                        self.tasa_edit.setText(f"{(p.tasa_anual or 0.0) * 100:.2f}")
+                        self.inflacion_edit.setText(f"{(p.inflacion_anual or 0.0) * 100:.2f}")
+                        self.al_inicio_check.setChecked(bool(p.aporte_al_inicio))
+                    self.mes_label.setText(f"📅 Plan cargado. Mes actual: {p.mes_actual}")
                 except Exception:
                     QMessageBox.warning(self, "Carga incompleta", "El último plan no pudo cargarse por completo. Por favor, revisa o crea uno nuevo.")
             
@@ -777,20 +964,50 @@ class MainWindow(QMainWindow):
             
         else:
             self.mes_label.setText("📅 No hay planes guardados. Crea uno nuevo.")
-            
-        conn.close()
+        tiempos.imprimir_informe()
 
 # ====== EJECUTAR APLICACIÓN ======
+_ventana = None # La ventana principal abierta (sin esta referencia Python la destruiría)
+
+def abrir_sesion(dlg=None):
+    # Diálogo de inicio de sesión y, si se acepta, la ventana principal. False si se canceló
+    global _ventana
+    if dlg is None:
+        dlg = LoginDialog()
+    if dlg.exec() != QDialog.DialogCode.Accepted:
+        return False
+    _ventana = MainWindow(dlg.nombre, dlg.usuario_id)
+    _ventana.show()
+    return True
+
+def volver_al_login(ventana):
+    # Cerrar sesión o borrar el usuario: se vuelve al login dentro de la misma QApplication
+    # (sin repetir main(), que crearía otra y lanzaría otra vez la purga de pendientes)
+    app = QApplication.instance()
+    app.setQuitOnLastWindowClosed(False) # Entre el cierre y el login no queda ninguna ventana
+    ventana.close()
+    try:
+        abierta = abrir_sesion()
+    finally:
+        app.setQuitOnLastWindowClosed(True)
+    if not abierta:
+        app.quit()
+
 def main():
     app = QApplication(sys.argv)
-    dlg = LoginDialog()
-    if dlg.exec() == QDialog.DialogCode.Accepted:
-        nombre = dlg.nombre
-        usuario_id = dlg.usuario_id
-        ventana = MainWindow(nombre, usuario_id)
-        ventana.show()
+    app.aboutToQuit.connect(tareas.detener_todas) # Antes de cerrar la conexión que usan las tareas
+    app.aboutToQuit.connect(trazas.volcar)
+    app.aboutToQuit.connect(cerrar_conexiones)
+    with tiempos.fase("crear_base"):
+        crear_base()
+    # Purgas que quedaron a medias en una sesión anterior
+    tareas.ejecutar(_purgar_pendientes, obtener_conexion())
+    with tiempos.fase("login (construcción)"):
+        dlg = LoginDialog()
+    if abrir_sesion(dlg):
         sys.exit(app.exec())
     else:
+        tareas.detener_todas()
         sys.exit(0)
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+import motor_ahorro
+
 # Colores
 BG_COLOR = "#f4f9f9"
 FRAME_COLOR = "#dff6f0"
@@ -87,8 +89,18 @@ def calcular_plan():
         otros = float(otros_entry.get())
         ahorrado = float(ahorrado_entry.get())
 
-        gastos_totales = comida + transporte + otros
-        disponible = ingreso - gastos_totales
+        r = motor_ahorro.calcular(meta, plazo, ingreso, comida, transporte, otros, ahorrado)
+        disponible = r.disponible
+        aporte_necesario = r.aporte_necesario
+        faltante = r.faltante
+        porcentaje = r.progreso
+
+        if r.estado == motor_ahorro.ESTADO_PLAZO_INVALIDO:
+            resultado_label.config(text="⚠️ El plazo debe ser mayor que 0.")
+            progress["value"] = 0
+            alerta_label.config(text="", fg="red")
+            faltante_label.config(text="")
+            return
 
         if disponible <= 0:
             resultado_label.config(text="⚠️ No puedes ahorrar: tus gastos superan tus ingresos.")
@@ -97,16 +109,13 @@ def calcular_plan():
             faltante_label.config(text="")
             return
 
-        aporte_necesario = (meta - ahorrado) / plazo
-
-        if aporte_necesario > disponible:
+        if not r.alcanzable:
             resultado_label.config(
                 text=f"❌ No es posible alcanzar la meta con tus gastos actuales.\n"
                      f"Necesitas ahorrar ${aporte_necesario:.2f}/mes."
             )
             alerta_label.config(text="Revisa tus gastos o extiende el plazo.", fg="red")
-            progress["value"] = (ahorrado / meta) * 100
-            faltante = meta - ahorrado
+            progress["value"] = porcentaje
             if faltante > 0:
                 faltante_label.config(text=f"💸 Te faltan ${faltante:.2f} para alcanzar tu meta.")
             else:
@@ -117,7 +126,6 @@ def calcular_plan():
         aporte_sugerido_label.config(text=f"${aporte_necesario:.2f}/mes")
         resultado_label.config(text=f"✅ Puedes alcanzar tu meta en {plazo} meses.")
 
-        porcentaje = (ahorrado / meta) * 100
         progress["value"] = porcentaje
 
         # Alertas visuales
@@ -131,7 +139,6 @@ def calcular_plan():
             alerta_label.config(text="🔴 Aún te falta bastante. Mantente constante.", fg="red")
 
         # Mostrar cuánto falta
-        faltante = meta - ahorrado
         if faltante > 0:
             faltante_label.config(text=f"💸 Te faltan ${faltante:.2f} para alcanzar tu meta.")
         else:
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# recalculo.py
+# Agrupa los cambios de los campos del formulario en un solo recálculo (debounce con QTimer)
+# y guarda el valor ya convertido de cada campo para no volver a parsear los que no cambiaron.
+from contextlib import contextmanager
+
+from PyQt6.QtCore import QObject, QTimer
+
+ESPERA_MS = 150 # Tiempo sin escribir antes de recalcular
+
+
+class ProgramadorRecalculo(QObject):
+    def __init__(self, callback, espera_ms=ESPERA_MS, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+        self._suspendido = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(espera_ms)
+        self._timer.timeout.connect(self.callback)
+        self._cache = {} # nombre_campo -> (texto, valor | ValueError)
+
+    # ====== PROGRAMACIÓN ======
+    def programar(self, *_):
+        # Cada llamada reinicia la espera: una ráfaga de cambios produce un único recálculo
+        if self._suspendido:
+            return
+        self._timer.start()
+
+    def cancelar(self):
+        self._timer.stop()
+
+    @contextmanager
+    def agrupado(self):
+        # Los cambios hechos dentro del bloque no programan nada; quien lo usa recalcula una vez al final
+        self._suspendido += 1
+        try:
+            yield
+        finally:
+            self._suspendido -= 1
+
+    # ====== VALORES DE LOS CAMPOS ======
+    def valor(self, nombre, edit, tipo=float):
+        texto = edit.text()
+        guardado = self._cache.get(nombre)
+        if guardado is None or guardado[0] != texto:
+            try:
+                guardado = (texto, tipo(texto))
+            except ValueError as e:
+                guardado = (texto, e)
+            self._cache[nombre] = guardado
+        if isinstance(guardado[1], ValueError):
+            raise guardado[1]
+        return guardado[1]
+
+
+def fijar_texto(widget, texto):
+    # Evita el repintado y el reajuste del layout cuando el texto no cambia
+    if widget.text() != texto:
+        widget.setText(texto)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# respaldo.py
+# Copias de seguridad en caliente de ahorros.db con la API de backup de SQLite.
+# La copia avanza por lotes de páginas, así que no bloquea a quien esté escribiendo.
+# Opcionalmente comprime (gzip o zstd) o guarda en un almacén de bloques deduplicados,
+# donde los respaldos diarios solo agregan los bloques que cambiaron.
+#
+# Uso:
+#   python respaldo.py respaldar ahorros.db backup.db.gz
+#   python respaldo.py restaurar backup.db.gz ahorros.db
+#   python respaldo.py incremental ahorros.db carpeta_respaldos
+#   python respaldo.py restaurar-incremental carpeta_respaldos/manifiestos/XXXX.json ahorros.db
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import urllib.parse
+
+from base_datos import DB_FILE
+
+PAGINAS_POR_PASO = 256      # Páginas copiadas antes de soltar el bloqueo de lectura
+PAUSA_ENTRE_PASOS = 0.005   # Segundos de respiro para los escritores
+TAM_BLOQUE = 64 * 1024      # Tamaño de bloque del almacén deduplicado
+BLOQUE_LECTURA = 1024 * 1024
+
+
+# ====== COMPRESIÓN ======
+def _compresion_por_nombre(ruta):
+    if ruta.endswith(".gz"):
+        return "gzip"
+    if ruta.endswith(".zst"):
+        return "zstd"
+    return None
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("La compresión zstd necesita el paquete 'zstandard' (pip install zstandard).")
+    return zstandard
+
+def _abrir_escritura(ruta, compresion):
+    if compresion == "gzip":
+        return gzip.open(ruta, "wb", compresslevel=6)
+    if compresion == "zstd":
+        return _zstd().ZstdCompressor(level=3).stream_writer(open(ruta, "wb"))
+    return open(ruta, "wb")
+
+def _abrir_lectura(ruta, compresion):
+    if compresion == "gzip":
+        return gzip.open(ruta, "rb")
+    if compresion == "zstd":
+        return _zstd().ZstdDecompressor().stream_reader(open(ruta, "rb"))
+    return open(ruta, "rb")
+
+
+# ====== INSTANTÁNEA CONSISTENTE ======
+def _instantanea(origen, destino, progreso=None, autocontenido=True):
+    # origen: ruta o sqlite3.Connection; destino: ruta de un archivo .db sin comprimir
+    def avance(_estado, restantes, total):
+        if progreso:
+            progreso(100 * (total - restantes) / total if total else 100)
+
+    propia = isinstance(origen, str)
+    src = sqlite3.connect(origen) if propia else origen
+    dst = sqlite3.connect(destino)
+    try:
+        src.backup(dst, pages=PAGINAS_POR_PASO, progress=avance, sleep=PAUSA_ENTRE_PASOS)
+        if autocontenido:
+            # El archivo de respaldo queda autocontenido (sin diario WAL aparte)
+            dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dst.close()
+        if propia:
+            src.close()
+
+def _archivo_temporal(carpeta):
+    fd, ruta = tempfile.mkstemp(suffix=".db", dir=carpeta or None)
+    os.close(fd)
+    return ruta
+
+
+# ====== RESPALDO COMPLETO ======
+def respaldar(origen, destino, compresion="auto", progreso=None):
+    # compresion: "auto" (según la extensión), None, "gzip" o "zstd"
+    if compresion == "auto":
+        compresion = _compresion_por_nombre(destino)
+    if compresion is None:
+        _instantanea(origen, destino, progreso)
+        return destino
+
+    temporal = _archivo_temporal(os.path.dirname(os.path.abspath(destino)))
+    try:
+        _instantanea(origen, temporal, progreso)
+        with open(temporal, "rb") as entrada, _abrir_escritura(destino, compresion) as salida:
+            shutil.copyfileobj(entrada, salida, BLOQUE_LECTURA)
+    finally:
+        os.remove(temporal)
+    return destino
+
+def _abrir_respaldo(ruta):
+    # Solo lectura: sqlite3.connect sobre una ruta equivocada crearía un archivo vacío
+    uri = "file:" + urllib.parse.quote(os.path.abspath(ruta)) + "?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+def restaurar(respaldo, destino=DB_FILE, progreso=None):
+    # Se restaura también con la API de backup, así las conexiones abiertas ven el cambio.
+    # Antes de tocar destino se comprueba que el respaldo exista, esté sano y sea una base de ahorros
+    if not os.path.isfile(respaldo):
+        raise FileNotFoundError(f"No existe el respaldo {respaldo}")
+    compresion = _compresion_por_nombre(respaldo)
+    temporal = None
+    origen = respaldo
+    if compresion:
+        temporal = _archivo_temporal(os.path.dirname(os.path.abspath(destino)))
+        with _abrir_lectura(respaldo, compresion) as entrada, open(temporal, "wb") as salida:
+            shutil.copyfileobj(entrada, salida, BLOQUE_LECTURA)
+        origen = temporal
+    try:
+        src = _abrir_respaldo(origen)
+        try:
+            if src.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+                raise sqlite3.DatabaseError(f"El respaldo {respaldo} está dañado.")
+            tablas = {r[0] for r in src.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            if not {"usuarios", "planes_ahorro"} <= tablas:
+                raise sqlite3.DatabaseError(f"{respaldo} no es un respaldo de la base de ahorros.")
+            _instantanea(src, destino, progreso, autocontenido=False)
+        finally:
+            src.close()
+    finally:
+        if temporal:
+            os.remove(temporal)
+    return destino
+
+
+# ====== ALMACÉN DEDUPLICADO ======
+def _ruta_bloque(almacen, digest):
+    return os.path.join(almacen, "bloques", digest[:2], digest + ".gz")
+
+def respaldar_incremental(origen, almacen, progreso=None):
+    # Guarda una instantánea como lista de bloques direccionados por su SHA-256.
+    # Los bloques que ya existen (páginas sin cambios) no se vuelven a escribir.
+    os.makedirs(os.path.join(almacen, "manifiestos"), exist_ok=True)
+    temporal = _archivo_temporal(almacen)
+    nuevos = 0
+    try:
+        _instantanea(origen, temporal, progreso)
+        hashes = []
+        with open(temporal, "rb") as f:
+            while True:
+                bloque = f.read(TAM_BLOQUE)
+                if not bloque:
+                    break
+                digest = hashlib.sha256(bloque).hexdigest()
+                hashes.append(digest)
+                ruta = _ruta_bloque(almacen, digest)
+                if not os.path.exists(ruta):
+                    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                    with open(ruta + ".tmp", "wb") as salida:
+                        salida.write(gzip.compress(bloque, compresslevel=6))
+                    os.replace(ruta + ".tmp", ruta)
+                    nuevos += 1
+        tamano = os.path.getsize(temporal)
+    finally:
+        os.remove(temporal)
+
+    fecha = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    manifiesto = os.path.join(almacen, "manifiestos", f"{fecha}.json")
+    with open(manifiesto, "w", encoding="utf-8") as f:
+        json.dump({"fecha": fecha, "tam_bloque": TAM_BLOQUE, "tamano": tamano, "bloques": hashes}, f)
+    return manifiesto, nuevos, len(hashes)
+
+def restaurar_incremental(manifiesto, destino=DB_FILE, progreso=None):
+    with open(manifiesto, encoding="utf-8") as f:
+        datos = json.load(f)
+    almacen = os.path.dirname(os.path.dirname(os.path.abspath(manifiesto)))
+    temporal = _archivo_temporal(os.path.dirname(os.path.abspath(destino)))
+    try:
+        with open(temporal, "wb") as salida:
+            for digest in datos["bloques"]:
+                with open(_ruta_bloque(almacen, digest), "rb") as entrada:
+                    bloque = gzip.decompress(entrada.read())
+                if hashlib.sha256(bloque).hexdigest() != digest:
+                    raise sqlite3.DatabaseError(f"Bloque dañado en el almacén: {digest}")
+                salida.write(bloque)
+        if os.path.getsize(temporal) != datos["tamano"]:
+            raise sqlite3.DatabaseError("El respaldo reconstruido no tiene el tamaño esperado.")
+        return restaurar(temporal, destino, progreso)
+    finally:
+        os.remove(temporal)
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Respaldos de la base de datos de ahorros")
+    sub = parser.add_subparsers(dest="accion", required=True)
+    p = sub.add_parser("respaldar"); p.add_argument("origen"); p.add_argument("destino")
+    p.add_argument("--compresion", choices=["auto", "ninguna", "gzip", "zstd"], default="auto")
+    p = sub.add_parser("restaurar"); p.add_argument("respaldo"); p.add_argument("destino")
+    p = sub.add_parser("incremental"); p.add_argument("origen"); p.add_argument("almacen")
+    p = sub.add_parser("restaurar-incremental"); p.add_argument("manifiesto"); p.add_argument("destino")
+    args = parser.parse_args()
+
+    if args.accion == "respaldar":
+        compresion = None if args.compresion == "ninguna" else args.compresion
+        print(respaldar(args.origen, args.destino, compresion))
+    elif args.accion == "restaurar":
+        print(restaurar(args.respaldo, args.destino))
+    elif args.accion == "incremental":
+        manifiesto, nuevos, total = respaldar_incremental(args.origen, args.almacen)
+        print(f"{manifiesto}: {nuevos} bloques nuevos de {total}")
+    else:
+        print(restaurar_incremental(args.manifiesto, args.destino))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# saldos.py
+# Índice de sumas acumuladas sobre ahorros_mensuales.
+# Cada registro guarda en "acumulado" la suma de los montos del plan hasta ese mes,
+# así que el saldo a un mes o a una fecha es una sola búsqueda en el índice (plan_id, mes|fecha).
+# Todos los montos van y vienen en centavos enteros (ver dinero.py): las sumas son exactas.
+
+# ====== ESCRITURA ======
+def registrar_aporte(db, plan_id, mes, monto, fecha):
+    # Debe llamarse dentro de db.transaccion(); monto en centavos, devuelve el nuevo acumulado
+    previo = acumulado_al_mes(db, plan_id, mes)
+    acumulado = previo + monto
+    db.ejecutar(
+        "INSERT INTO ahorros_mensuales (plan_id, mes, monto, fecha, acumulado) VALUES (?, ?, ?, ?, ?)",
+        (plan_id, mes, monto, fecha, acumulado),
+    )
+    return acumulado
+
+def recalcular_acumulados(db, plan_id):
+    # Reconstruye el índice de un plan completo (por ejemplo tras insertar meses desordenados)
+    db.ejecutar("""
+        UPDATE ahorros_mensuales SET acumulado = w.acumulado
+        FROM (SELECT id, SUM(monto) OVER (ORDER BY mes, id) AS acumulado
+              FROM ahorros_mensuales WHERE plan_id=?) AS w
+        WHERE w.id = ahorros_mensuales.id
+    """, (plan_id,))
+    return total_acumulado(db, plan_id)
+
+def sincronizar_plan(db, plan_id):
+    # Tras cargas masivas: reconstruye el índice y deja ahorrado y mes_actual coherentes con él
+    total = recalcular_acumulados(db, plan_id)
+    db.ejecutar("""
+        UPDATE planes_ahorro
+        SET version = version + 1,
+            ahorrado = COALESCE(ahorrado_inicial, 0) + ?,
+            mes_actual = MAX(COALESCE(mes_actual, 1),
+                             COALESCE((SELECT MAX(mes) FROM ahorros_mensuales WHERE plan_id = ?), 0) + 1)
+        WHERE id = ?
+    """, (total, plan_id, plan_id))
+    db.ejecutar("""
+        UPDATE planes_ahorro SET estado = CASE
+            WHEN mes_actual > plazo THEN 'completado'
+            WHEN ahorrado >= meta AND meta > 0 THEN 'meta_alcanzada'
+            ELSE 'activo' END
+        WHERE id = ?
+    """, (plan_id,))
+    return total
+
+
+# ====== CONSULTAS ======
+def acumulado_al_mes(db, plan_id, mes):
+    # Suma de los aportes registrados hasta el mes indicado (incluido)
+    row = db.uno(
+        "SELECT acumulado FROM ahorros_mensuales WHERE plan_id=? AND mes<=? ORDER BY mes DESC, id DESC LIMIT 1",
+        (plan_id, mes),
+    )
+    return row[0] if row and row[0] is not None else 0
+
+def acumulado_a_fecha(db, plan_id, fecha):
+    # Suma de los aportes registrados hasta la fecha ISO indicada (incluida)
+    row = db.uno(
+        "SELECT acumulado FROM ahorros_mensuales WHERE plan_id=? AND fecha<=? ORDER BY fecha DESC, id DESC LIMIT 1",
+        (plan_id, fecha),
+    )
+    return row[0] if row and row[0] is not None else 0
+
+def ahorro_entre_fechas(db, plan_id, desde, hasta):
+    # Aportes con desde <= fecha <= hasta, como diferencia de dos búsquedas
+    row = db.uno(
+        "SELECT acumulado FROM ahorros_mensuales WHERE plan_id=? AND fecha<? ORDER BY fecha DESC, id DESC LIMIT 1",
+        (plan_id, desde),
+    )
+    antes = row[0] if row and row[0] is not None else 0
+    return acumulado_a_fecha(db, plan_id, hasta) - antes
+
+def total_acumulado(db, plan_id):
+    row = db.uno(
+        "SELECT acumulado FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes DESC, id DESC LIMIT 1",
+        (plan_id,),
+    )
+    return row[0] if row and row[0] is not None else 0
+
+def saldo_actual(db, plan_id):
+    # Ahorro inicial del plan más todos los aportes mensuales
+    row = db.uno("SELECT COALESCE(ahorrado_inicial, 0) FROM planes_ahorro WHERE id=?", (plan_id,))
+    inicial = row[0] if row else 0
+    return inicial + total_acumulado(db, plan_id)
+
+def serie_acumulada(db, plan_id):
+    # Lista de (mes, monto, fecha, acumulado) ordenada por mes
+    return db.todos(
+        "SELECT mes, monto, fecha, acumulado FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes, id",
+        (plan_id,),
+    )
+
+def verificar_ahorrado(db, plan_id):
+    # Comprueba que el total desnormalizado planes_ahorro.ahorrado coincide con el índice (al centavo)
+    row = db.uno("SELECT ahorrado FROM planes_ahorro WHERE id=?", (plan_id,))
+    if not row:
+        return True
+    return (row[0] or 0) == saldo_actual(db, plan_id)
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# servidor_api.py
+# Modo servicio del planificador: API HTTP con JSON sobre asyncio para los clientes web y móvil.
+# Usa la misma lógica que la ventana (cache_plan, motor_ahorro, proyeccion) sobre el mismo ahorros.db.
+# El bucle de asyncio solo lee y escribe sockets; el trabajo con SQLite corre en un pool de hilos,
+# cada hilo con su propia conexión (base_datos.PoolConexiones), así que una consulta lenta no
+# detiene al resto de los clientes.
+# Con --fragmentos los usuarios se reparten en varios archivos (fragmentos.py): el catálogo atiende
+# registro e inicio de sesión y cada petición va al fragmento de su usuario.
+#
+# Rutas (montos en pesos; todas menos /usuarios y /login piden "Authorization: Bearer <token>"):
+#   POST /usuarios                     {"nombre", "contrasena"}
+#   POST /login                        {"nombre", "contrasena"} -> {"token", "usuario_id"}
+#   GET  /planes                       planes del usuario
+#   POST /planes                       {"meta", "plazo", "ingreso", "comida", "transporte", "otros", "ahorrado",
+#                                       "tasa_anual", "inflacion_anual", "aporte_al_inicio"}
+#   GET  /planes/<id>
+#   POST /planes/<id>/finalizar-mes    {"monto" (por defecto el sugerido), "mes" (por defecto el actual)}
+#   GET  /planes/<id>/historial        ?despues=<mes>:<id>&limite=100
+#   GET  /planes/<id>/proyeccion
+#
+# Uso:
+#   python servidor_api.py --puerto 8080
+#   python servidor_api.py --db otra.db --conexiones 8
+#   python servidor_api.py --fragmentos datos --cantidad 16
+import argparse
+import asyncio
+import datetime
+import json
+import re
+import secrets
+import sqlite3
+import urllib.parse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from base_datos import DB_FILE, ConflictoEscritura, PoolConexiones
+from cache_plan import CachePlan, MesYaCerrado
+from dinero import Dinero
+from fragmentos import CANTIDAD, Enrutador
+from modelo import CAMPOS, CAMPOS_DINERO, Plan
+import motor_ahorro
+import proyeccion
+
+CONEXIONES = 4               # Conexiones a SQLite (y hilos que las usan)
+MAX_CUERPO = 64 * 1024       # Bytes aceptados en el cuerpo de una petición
+MAX_ENCABEZADOS = 100
+FILAS_POR_PAGINA = 100
+MAX_FILAS_POR_PAGINA = 1000
+
+Peticion = namedtuple("Peticion", ["metodo", "ruta", "consulta", "encabezados", "cuerpo"])
+
+ESTADOS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class ErrorHTTP(Exception):
+    """Error que se devuelve al cliente con su código de estado y {"error": mensaje}."""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+
+class SesionVencida(ErrorHTTP):
+    """El usuario del token se borró después de iniciar sesión."""
+
+    def __init__(self):
+        super().__init__(401, "La sesión ya no es válida; vuelve a iniciar sesión")
+
+
+# ====== OPERACIONES (corren en el pool de hilos, con una conexión propia) ======
+def crear_usuario(db, nombre, contrasena, enrutador=None):
+    # Con fragmentos, db es el catálogo y el enrutador además asigna el fragmento del usuario
+    if not nombre or not contrasena:
+        raise ErrorHTTP(400, "Nombre y contraseña son obligatorios")
+    try:
+        if enrutador is not None:
+            return enrutador.crear_usuario(nombre, contrasena)
+        with db.transaccion():
+            return db.ejecutar("INSERT INTO usuarios (nombre, contrasena) VALUES (?, ?)", (nombre, contrasena)).lastrowid
+    except sqlite3.IntegrityError:
+        raise ErrorHTTP(409, f"El usuario {nombre!r} ya existe")
+
+def iniciar_sesion(db, nombre, contrasena):
+    # Misma comprobación que la ventana de inicio de sesión; los usuarios borrados no entran
+    row = db.uno("SELECT id, contrasena FROM usuarios WHERE nombre=? AND borrado_en IS NULL", (nombre,))
+    if not row or row[1] != contrasena:
+        raise ErrorHTTP(401, "Usuario o contraseña incorrectos")
+    return row[0]
+
+def _vigente(db, usuario_id):
+    # Las sesiones viven en memoria: el borrado (borrado.py) las invalida a partir de aquí
+    if db.uno("SELECT 1 FROM usuarios WHERE id=? AND borrado_en IS NULL", (usuario_id,)) is None:
+        raise SesionVencida()
+
+def listar_planes(db, usuario_id):
+    filas = db.todos(f"SELECT id, {', '.join(CAMPOS)} FROM planes_ahorro WHERE usuario_id=? ORDER BY id", (usuario_id,))
+    return [plan_json(Plan.desde_fila(f[0], f[1:])) for f in filas]
+
+def _dueno(db, usuario_id, plan_id):
+    # Un plan de otro usuario responde igual que uno inexistente
+    row = db.uno("SELECT usuario_id FROM planes_ahorro WHERE id=?", (plan_id,))
+    if not row or row[0] != usuario_id:
+        raise ErrorHTTP(404, f"No existe el plan {plan_id}")
+
+def _cargar(db, usuario_id, plan_id):
+    _dueno(db, usuario_id, plan_id)
+    cache = CachePlan(db)
+    cache.cargar(plan_id)
+    return cache
+
+def obtener_plan(db, usuario_id, plan_id):
+    return plan_json(_cargar(db, usuario_id, plan_id).plan)
+
+def crear_plan(db, usuario_id, datos):
+    try:
+        montos = {c: Dinero.desde(datos.get(c, 0)) for c in ("meta", "ingreso", "comida", "transporte", "otros", "ahorrado")}
+        plazo = int(datos["plazo"])
+        supuestos = proyeccion.Supuestos(float(datos.get("tasa_anual", 0.0)), float(datos.get("inflacion_anual", 0.0)),
+                                         bool(datos.get("aporte_al_inicio", False)))
+    except KeyError:
+        raise ErrorHTTP(400, "Falta el plazo")
+    except (TypeError, ValueError) as e:
+        raise ErrorHTTP(400, f"Valor inválido: {e}")
+    if montos["meta"] <= 0 or plazo <= 0:
+        raise ErrorHTTP(400, "Meta y Plazo deben ser mayores a cero.")
+    plan = CachePlan(db).crear(usuario_id, montos["meta"], plazo, montos["ingreso"], montos["comida"],
+                               montos["transporte"], montos["otros"], montos["ahorrado"],
+                               datetime.date.today().isoformat(), supuestos)
+    return plan_json(plan)
+
+def finalizar_mes(db, usuario_id, plan_id, datos):
+    # La misma secuencia que MainWindow.finalizar_mes: aporte sugerido, validación y cierre con control de versión.
+    # Mandar "mes" hace el reintento seguro: si ese mes ya se cerró responde 409 en lugar de cerrar el siguiente
+    cache = _cargar(db, usuario_id, plan_id)
+    plan = cache.plan
+    if plan.mes_actual > plan.plazo:
+        raise ErrorHTTP(409, "Ya has finalizado todos los meses de tu plan.")
+    try:
+        mes = int(datos.get("mes", plan.mes_actual))
+        if "monto" in datos:
+            monto = Dinero.desde(datos["monto"])
+        else:
+            monto = motor_ahorro.aporte_sugerido_mes(plan.meta, plan.ahorrado, plan.plazo, plan.mes_actual,
+                                                     proyeccion.supuestos_de(plan))
+    except (TypeError, ValueError) as e:
+        raise ErrorHTTP(400, f"Valor inválido: {e}")
+    # Solo un mes ya pasado puede estar "ya cerrado"; uno futuro o menor que 1 es un error del cliente
+    if not 1 <= mes <= plan.mes_actual:
+        raise ErrorHTTP(400, f"El mes debe estar entre 1 y {plan.mes_actual} (el mes en curso)")
+    if monto < 0:
+        raise ErrorHTTP(400, "El monto ahorrado no puede ser negativo.")
+    try:
+        acumulado, plan = cache.registrar_aporte(monto, datetime.date.today().isoformat(), mes)
+    except MesYaCerrado:
+        raise ErrorHTTP(409, f"El Mes {mes} ya fue cerrado")
+    except ConflictoEscritura:
+        raise ErrorHTTP(409, "El plan cambió mientras se guardaba; vuelve a intentarlo")
+    return {"mes": mes, "monto": float(monto), "acumulado": float(acumulado),
+            "meta_alcanzada": plan.ahorrado >= plan.meta, "plan": plan_json(plan)}
+
+def historial(db, usuario_id, plan_id, despues=None, limite=FILAS_POR_PAGINA):
+    # Páginas por clave (mes, id) como en modelo_historial.py: "siguiente" se pasa como ?despues=
+    _dueno(db, usuario_id, plan_id)
+    donde, params = "plan_id = ?", [plan_id]
+    if despues:
+        try:
+            mes, id_ = (int(x) for x in despues.split(":"))
+        except ValueError:
+            raise ErrorHTTP(400, "despues debe tener la forma <mes>:<id>")
+        donde += " AND (mes, id) > (?, ?)"
+        params += [mes, id_]
+    filas = db.todos(f"SELECT id, mes, monto, fecha, acumulado FROM ahorros_mensuales WHERE {donde} "
+                     "ORDER BY mes, id LIMIT ?", params + [limite])
+    siguiente = f"{filas[-1][1]}:{filas[-1][0]}" if len(filas) == limite else None
+    return {"filas": [{"mes": mes, "monto": monto / 100, "fecha": fecha, "acumulado": (acumulado or 0) / 100}
+                      for _, mes, monto, fecha, acumulado in filas],
+            "siguiente": siguiente}
+
+def proyectar(db, usuario_id, plan_id):
+    plan = _cargar(db, usuario_id, plan_id).plan
+    s = proyeccion.supuestos_de(plan)
+    r = motor_ahorro.calcular(plan.meta, plan.plazo, plan.ingreso, plan.comida, plan.transporte, plan.otros,
+                              plan.ahorrado, s)
+    sugerido = motor_ahorro.aporte_sugerido_mes(plan.meta, plan.ahorrado, plan.plazo, plan.mes_actual, s)
+    meta, inicial = float(plan.meta), float(plan.ahorrado_inicial)
+    meses = (proyeccion.meses_para_meta(meta, float(plan.ahorrado), float(r.disponible), s)
+             if r.disponible > 0 else None)
+    return {
+        "estado": r.estado,
+        "disponible": float(r.disponible),
+        "faltante": float(r.faltante),
+        "progreso": r.progreso,
+        "aporte_sugerido": float(sugerido),
+        "meta_ajustada": proyeccion.meta_ajustada(meta, plan.plazo, s),
+        "meses_ahorrando_disponible": meses, # null si con lo disponible no se llega
+        "ruta_ideal": [round(v, 2) for v in proyeccion.ruta_ideal(meta, inicial, plan.plazo, supuestos=s)],
+    }
+
+def plan_json(plan):
+    datos = {"id": plan.id}
+    for campo in CAMPOS:
+        valor = getattr(plan, campo)
+        datos[campo] = float(valor) if campo in CAMPOS_DINERO else valor
+    datos["aporte_al_inicio"] = bool(plan.aporte_al_inicio)
+    return datos
+
+
+# ====== HTTP ======
+async def leer_peticion(reader):
+    # None si el cliente cerró la conexión entre peticiones
+    linea = await reader.readline()
+    if not linea:
+        return None
+    try:
+        metodo, destino, _ = linea.decode("latin-1").split()
+    except ValueError:
+        raise ErrorHTTP(400, "Línea de petición inválida")
+    encabezados = {}
+    for _ in range(MAX_ENCABEZADOS):
+        linea = await reader.readline()
+        if linea in (b"\r\n", b"\n", b""):
+            break
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        encabezados[nombre.strip().lower()] = valor.strip()
+    else:
+        raise ErrorHTTP(400, "Demasiados encabezados")
+    try:
+        largo = int(encabezados.get("content-length") or 0)
+    except ValueError:
+        raise ErrorHTTP(400, "Content-Length inválido")
+    if largo > MAX_CUERPO:
+        raise ErrorHTTP(413, "Cuerpo demasiado grande")
+    cuerpo = await reader.readexactly(largo) if largo else b""
+    url = urllib.parse.urlsplit(destino)
+    consulta = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+    return Peticion(metodo.upper(), url.path.rstrip("/") or "/", consulta, encabezados, cuerpo)
+
+def respuesta(estado, datos, mantener=True):
+    cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+    cabecera = (f"HTTP/1.1 {estado} {ESTADOS.get(estado, '')}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(cuerpo)}\r\n"
+                f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n")
+    return cabecera.encode("latin-1") + cuerpo
+
+
+# ====== SERVIDOR ======
+class ServidorAPI:
+    # (método, patrón de la ruta, nombre del método que la atiende)
+    RUTAS = [
+        ("POST", re.compile(r"/usuarios"), "_usuarios"),
+        ("POST", re.compile(r"/login"), "_login"),
+        ("GET", re.compile(r"/planes"), "_listar"),
+        ("POST", re.compile(r"/planes"), "_crear"),
+        ("GET", re.compile(r"/planes/(\d+)"), "_plan"),
+        ("POST", re.compile(r"/planes/(\d+)/finalizar-mes"), "_finalizar_mes"),
+        ("GET", re.compile(r"/planes/(\d+)/historial"), "_historial"),
+        ("GET", re.compile(r"/planes/(\d+)/proyeccion"), "_proyeccion"),
+    ]
+
+    def __init__(self, ruta_db=DB_FILE, conexiones=CONEXIONES, enrutador=None):
+        self.enrutador = enrutador
+        self.pool = PoolConexiones(ruta_db, conexiones) if enrutador is None else None
+        self._hilos = ThreadPoolExecutor(max_workers=conexiones, thread_name_prefix="api-db")
+        self._sesiones = {} # token -> usuario_id (en memoria: reiniciar el servidor cierra las sesiones)
+        self._servidor = None
+
+    async def _en_hilo(self, funcion, *args, usuario_id=None):
+        # La función recibe una conexión como primer argumento: del pool o, con fragmentos, la del catálogo.
+        # Con usuario_id primero se comprueba que el usuario siga vigente; la función lo recibe como
+        # segundo argumento y, con fragmentos, la conexión es la de su fragmento
+        def con_conexion():
+            if self.enrutador is None:
+                with self.pool.conexion() as db:
+                    if usuario_id is None:
+                        return funcion(db, *args)
+                    _vigente(db, usuario_id)
+                    return funcion(db, usuario_id, *args)
+            if usuario_id is None:
+                return funcion(self.enrutador.catalogo, *args)
+            _vigente(self.enrutador.catalogo, usuario_id)
+            return funcion(self.enrutador.conexion(usuario_id), usuario_id, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._hilos, con_conexion)
+
+    def _sesion(self, peticion):
+        # (token, usuario_id) de "Authorization: Bearer <token>"
+        tipo, _, token = peticion.encabezados.get("authorization", "").partition(" ")
+        usuario_id = self._sesiones.get(token) if tipo.lower() == "bearer" else None
+        if usuario_id is None:
+            raise ErrorHTTP(401, "Falta iniciar sesión (Authorization: Bearer <token>)")
+        return token, usuario_id
+
+    async def _del_usuario(self, sesion, funcion, *args):
+        # Operación del usuario de la sesión; si se borró desde que inició sesión, el token se descarta
+        token, usuario_id = sesion
+        try:
+            return await self._en_hilo(funcion, *args, usuario_id=usuario_id)
+        except SesionVencida:
+            self._sesiones.pop(token, None)
+            raise
+
+    # ====== CICLO DE VIDA ======
+    async def iniciar(self, host="127.0.0.1", puerto=8080):
+        self._servidor = await asyncio.start_server(self._atender, host, puerto, reuse_address=True)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def servir(self):
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    def cerrar(self):
+        if self._servidor is not None:
+            self._servidor.close()
+        self._hilos.shutdown(wait=True)
+        if self.enrutador is not None:
+            self.enrutador.cerrar()
+        else:
+            self.pool.cerrar()
+
+    # ====== CONEXIÓN ======
+    async def _atender(self, reader, writer):
+        # Una conexión puede traer muchas peticiones seguidas (keep-alive)
+        try:
+            while True:
+                # Si la petición no se pudo leer entera, lo que sigue en el socket no es confiable: se cierra
+                mantener = False
+                try:
+                    peticion = await leer_peticion(reader)
+                    if peticion is None:
+                        break
+                    mantener = peticion.encabezados.get("connection", "").lower() != "close"
+                    estado, datos = await self._despachar(peticion)
+                except ErrorHTTP as e:
+                    estado, datos = e.estado, {"error": e.mensaje}
+                except sqlite3.OperationalError as e:
+                    estado, datos = 503, {"error": f"Base de datos ocupada: {e}"}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    estado, datos = 500, {"error": f"Error desconocido: {e}"}
+                writer.write(respuesta(estado, datos, mantener))
+                await writer.drain()
+                if not mantener:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _despachar(self, peticion):
+        metodos = []
+        for metodo, patron, nombre in self.RUTAS:
+            encontrada = patron.fullmatch(peticion.ruta)
+            if encontrada:
+                if metodo == peticion.metodo:
+                    return await getattr(self, nombre)(peticion, *encontrada.groups())
+                metodos.append(metodo)
+        if metodos:
+            raise ErrorHTTP(405, f"Usa {' o '.join(metodos)} en {peticion.ruta}")
+        raise ErrorHTTP(404, f"No existe la ruta {peticion.ruta}")
+
+    @staticmethod
+    def _json(peticion):
+        if not peticion.cuerpo:
+            return {}
+        try:
+            datos = json.loads(peticion.cuerpo)
+        except ValueError:
+            raise ErrorHTTP(400, "El cuerpo no es JSON válido")
+        if not isinstance(datos, dict):
+            raise ErrorHTTP(400, "El cuerpo debe ser un objeto JSON")
+        return datos
+
+    # ====== RUTAS ======
+    async def _usuarios(self, peticion):
+        datos = self._json(peticion)
+        usuario_id = await self._en_hilo(crear_usuario, str(datos.get("nombre", "")).strip(),
+                                         str(datos.get("contrasena", "")).strip(), self.enrutador)
+        return 201, {"usuario_id": usuario_id}
+
+    async def _login(self, peticion):
+        datos = self._json(peticion)
+        usuario_id = await self._en_hilo(iniciar_sesion, str(datos.get("nombre", "")).strip(),
+                                         str(datos.get("contrasena", "")).strip())
+        token = secrets.token_urlsafe(24)
+        self._sesiones[token] = usuario_id
+        return 200, {"token": token, "usuario_id": usuario_id}
+
+    async def _listar(self, peticion):
+        return 200, {"planes": await self._del_usuario(self._sesion(peticion), listar_planes)}
+
+    async def _crear(self, peticion):
+        return 201, await self._del_usuario(self._sesion(peticion), crear_plan, self._json(peticion))
+
+    async def _plan(self, peticion, plan_id):
+        return 200, await self._del_usuario(self._sesion(peticion), obtener_plan, int(plan_id))
+
+    async def _finalizar_mes(self, peticion, plan_id):
+        return 200, await self._del_usuario(self._sesion(peticion), finalizar_mes, int(plan_id), self._json(peticion))
+
+    async def _historial(self, peticion, plan_id):
+        try:
+            limite = min(max(int(peticion.consulta.get("limite", FILAS_POR_PAGINA)), 1), MAX_FILAS_POR_PAGINA)
+        except ValueError:
+            raise ErrorHTTP(400, "limite debe ser un número")
+        return 200, await self._del_usuario(self._sesion(peticion), historial, int(plan_id), peticion.consulta.get("despues"), limite)
+
+    async def _proyeccion(self, peticion, plan_id):
+        return 200, await self._del_usuario(self._sesion(peticion), proyectar, int(plan_id))
+
+
+# ====== LÍNEA DE COMANDOS ======
+async def _principal(args):
+    enrutador = Enrutador(args.fragmentos, args.cantidad, args.por_usuario) if args.fragmentos else None
+    servidor = ServidorAPI(args.db, args.conexiones, enrutador)
+    puerto = await servidor.iniciar(args.host, args.puerto)
+    destino = f"fragmentos en {args.fragmentos}" if enrutador else args.db
+    # carga_api.py lee esta línea para saber el puerto cuando se pide --puerto 0
+    print(f"Escuchando en http://{args.host}:{puerto} ({args.conexiones} hilos, {destino})", flush=True)
+    try:
+        await servidor.servir()
+    finally:
+        servidor.cerrar()
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP con JSON del planificador de ahorros")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080, help="0 = uno libre cualquiera")
+    parser.add_argument("--conexiones", type=int, default=CONEXIONES, help="Conexiones a SQLite e hilos de trabajo")
+    parser.add_argument("--fragmentos", metavar="DIRECTORIO", help="Usuarios repartidos en fragmentos (en lugar de --db)")
+    parser.add_argument("--cantidad", type=int, default=CANTIDAD, help="Fragmentos para los usuarios nuevos")
+    parser.add_argument("--por-usuario", action="store_true", help="Un archivo por usuario")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_principal(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# simulacion.py
+# Simulación Monte Carlo del plan de ahorro. En lugar de suponer ingreso y gastos constantes,
+# cada campo sigue una distribución y además puede haber gastos imprevistos (choques).
+# Cada mes se intenta ahorrar el aporte sugerido (lo que falta / meses restantes); si lo
+# disponible no alcanza se ahorra menos, y si es negativo se saca del ahorro.
+# Las trayectorias se simulan por lotes vectorizados con NumPy y los lotes se reparten entre
+# procesos. Cada lote tiene su propia semilla derivada de la principal, así que el resultado
+# no depende de cuántos procesos se usen.
+#
+# Uso:
+#   python simulacion.py --meta 20000 --plazo 24 --ingreso normal:2000:200 --comida normal:400:60 \
+#       --transporte 150 --otros uniforme:100:300 --choque 0.05:600:200 --trayectorias 1000000 --semilla 7
+import argparse
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+TRAYECTORIAS_POR_LOTE = 50_000
+CASILLAS = 2000            # Casillas del histograma por mes para calcular percentiles
+PERCENTILES = (5, 25, 50, 75, 95)
+TRAYECTORIAS_PILOTO = 2000 # Corrida corta que fija el rango de los histogramas
+
+# Variación por defecto cuando se simula desde la ventana
+VARIACION_INGRESO = 0.10
+VARIACION_GASTOS = 0.15
+CHOQUE_PROBABILIDAD = 0.05  # Un imprevisto cada ~20 meses
+CHOQUE_FRACCION = 0.30      # del ingreso medio
+
+# tipo: "fija" (a), "normal" (media a, desvío b), "lognormal" (media a, desvío b), "uniforme" (a, b)
+Distribucion = namedtuple("Distribucion", ["tipo", "a", "b"])
+Choque = namedtuple("Choque", ["probabilidad", "media", "desvio"]) # Gasto imprevisto mensual
+ParametrosSimulacion = namedtuple("ParametrosSimulacion", [
+    "meta", "meses", "ahorrado", "ingreso", "comida", "transporte", "otros", "choques",
+])
+ResultadoSimulacion = namedtuple("ResultadoSimulacion", [
+    "trayectorias",
+    "probabilidad",   # Fracción de trayectorias que llegan a la meta al final del plazo
+    "bandas",         # dict percentil -> lista de saldos al final de cada mes
+    "saldo_medio",    # Saldo final promedio
+])
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("La simulación necesita el paquete 'numpy' (pip install numpy).")
+    return numpy
+
+
+# ====== DISTRIBUCIONES ======
+def leer_distribucion(texto):
+    # "1500", "normal:1500:200", "lognormal:1500:200" o "uniforme:1200:1800"
+    partes = [p.strip() for p in texto.split(":")]
+    if len(partes) == 1:
+        return Distribucion("fija", float(partes[0]), 0.0)
+    if len(partes) != 3 or partes[0] not in ("normal", "lognormal", "uniforme"):
+        raise ValueError(f"Distribución inválida: {texto!r}")
+    return Distribucion(partes[0], float(partes[1]), float(partes[2]))
+
+def leer_choque(texto):
+    # "probabilidad:media:desvío", p. ej. "0.05:600:200"
+    p, media, desvio = (float(x) for x in texto.split(":"))
+    if not 0 <= p <= 1:
+        raise ValueError("La probabilidad del choque debe estar entre 0 y 1")
+    return Choque(p, media, desvio)
+
+def _muestrear(rng, dist, forma):
+    np = _numpy()
+    if dist.tipo == "fija":
+        return np.full(forma, dist.a)
+    if dist.tipo == "normal":
+        return rng.normal(dist.a, dist.b, forma)
+    if dist.tipo == "uniforme":
+        return rng.uniform(dist.a, dist.b, forma)
+    # lognormal parametrizada por media y desvío de la variable (no del logaritmo)
+    if dist.a <= 0:
+        return np.zeros(forma)
+    sigma2 = np.log(1 + (dist.b / dist.a) ** 2)
+    return rng.lognormal(np.log(dist.a) - sigma2 / 2, np.sqrt(sigma2), forma)
+
+def desde_plan(meta, plazo, ingreso, comida, transporte, otros, ahorrado, mes_actual=1,
+               variacion_ingreso=VARIACION_INGRESO, variacion_gastos=VARIACION_GASTOS,
+               probabilidad_choque=CHOQUE_PROBABILIDAD):
+    # Parámetros por defecto alrededor de los valores del plan, para los meses que le quedan
+    gasto = lambda v: Distribucion("lognormal", v, v * variacion_gastos) if v > 0 else Distribucion("fija", 0.0, 0.0)
+    choques = (Choque(probabilidad_choque, ingreso * CHOQUE_FRACCION, ingreso * CHOQUE_FRACCION / 2),) if ingreso > 0 else ()
+    return ParametrosSimulacion(
+        meta, max(plazo - mes_actual + 1, 0), ahorrado,
+        Distribucion("normal", ingreso, ingreso * variacion_ingreso),
+        gasto(comida), gasto(transporte), gasto(otros), choques,
+    )
+
+
+# ====== LOTE (corre en los procesos del pool) ======
+def _simular_saldos(params, semilla, n):
+    # Devuelve una matriz (n, meses) con el saldo al cierre de cada mes
+    np = _numpy()
+    rng = np.random.default_rng(semilla)
+    meses = params.meses
+    saldos = np.empty((n, meses), dtype=np.float64)
+    saldo = np.full(n, float(params.ahorrado))
+    for t in range(meses):
+        disponible = (_muestrear(rng, params.ingreso, n) - _muestrear(rng, params.comida, n)
+                      - _muestrear(rng, params.transporte, n) - _muestrear(rng, params.otros, n))
+        for choque in params.choques:
+            ocurre = rng.random(n) < choque.probabilidad
+            disponible -= np.where(ocurre, np.maximum(rng.normal(choque.media, choque.desvio, n), 0.0), 0.0)
+        objetivo = np.maximum(params.meta - saldo, 0.0) / (meses - t)
+        saldo = saldo + np.minimum(objetivo, disponible)
+        saldos[:, t] = saldo
+    return saldos
+
+def _simular_lote(params, semilla, n, bordes):
+    # Resultado fusionable entre lotes: alcanzados, suma del saldo final e histograma por mes
+    np = _numpy()
+    saldos = _simular_saldos(params, semilla, n)
+    lo, hi = bordes
+    ancho = (hi - lo) / CASILLAS or 1.0
+    casilla = np.clip(((saldos - lo) / ancho).astype(np.int64), 0, CASILLAS - 1)
+    casilla += np.arange(params.meses, dtype=np.int64) * CASILLAS
+    histograma = np.bincount(casilla.ravel(), minlength=params.meses * CASILLAS).reshape(params.meses, CASILLAS)
+    final = saldos[:, -1]
+    return int((final >= params.meta).sum()), float(final.sum()), histograma
+
+
+# ====== SIMULACIÓN ======
+def _percentiles_de_histograma(histograma, bordes, n):
+    np = _numpy()
+    lo, hi = bordes
+    centros = lo + (np.arange(CASILLAS) + 0.5) * (hi - lo) / CASILLAS
+    acumulado = np.cumsum(histograma, axis=1)
+    bandas = {}
+    for p in PERCENTILES:
+        objetivo = p / 100 * n
+        indices = (acumulado < objetivo).sum(axis=1)
+        bandas[p] = centros[np.minimum(indices, CASILLAS - 1)].tolist()
+    return bandas
+
+def simular(params, trayectorias=100_000, semilla=None, procesos=None,
+            tamano_lote=TRAYECTORIAS_POR_LOTE, progreso=None, cancelado=None):
+    np = _numpy()
+    if params.meses <= 0:
+        alcanzado = 1.0 if params.ahorrado >= params.meta else 0.0
+        return ResultadoSimulacion(0, alcanzado, {p: [] for p in PERCENTILES}, float(params.ahorrado))
+
+    raiz = np.random.SeedSequence(semilla)
+    semilla_piloto, semilla_lotes = raiz.spawn(2)
+    # Rango de los histogramas a partir de una corrida corta, con margen para las colas
+    piloto = _simular_saldos(params, semilla_piloto, TRAYECTORIAS_PILOTO)
+    margen = (piloto.max() - piloto.min()) * 0.5 or 1.0
+    bordes = (float(piloto.min() - margen), float(piloto.max() + margen))
+
+    tamanos = [tamano_lote] * (trayectorias // tamano_lote)
+    if trayectorias % tamano_lote:
+        tamanos.append(trayectorias % tamano_lote)
+    semillas = semilla_lotes.spawn(len(tamanos))
+
+    alcanzados, suma = 0, 0.0
+    histograma = np.zeros((params.meses, CASILLAS), dtype=np.int64)
+    hechos = 0
+
+    def acumular(resultado, n):
+        nonlocal alcanzados, suma, histograma, hechos
+        a, s, h = resultado
+        alcanzados += a
+        suma += s
+        histograma += h
+        hechos += n
+        if progreso:
+            progreso(hechos, trayectorias)
+
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1 or len(tamanos) == 1:
+        for n, s in zip(tamanos, semillas):
+            if cancelado and cancelado():
+                break
+            acumular(_simular_lote(params, s, n, bordes), n)
+    else:
+        # "spawn": los procesos no heredan los hilos de Qt del proceso principal
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(procesos, len(tamanos)), mp_context=contexto) as pool:
+            futuros = {pool.submit(_simular_lote, params, s, n, bordes): n for n, s in zip(tamanos, semillas)}
+            for futuro in as_completed(futuros):
+                if cancelado and cancelado():
+                    for f in futuros:
+                        f.cancel()
+                    break
+                acumular(futuro.result(), futuros[futuro])
+
+    if hechos == 0:
+        return ResultadoSimulacion(0, 0.0, {p: [] for p in PERCENTILES}, 0.0)
+    return ResultadoSimulacion(hechos, alcanzados / hechos, _percentiles_de_histograma(histograma, bordes, hechos), suma / hechos)
+
+
+# ====== LÍNEA DE COMANDOS ======
+def main():
+    parser = argparse.ArgumentParser(description="Simulación Monte Carlo de un plan de ahorro")
+    parser.add_argument("--meta", type=float, required=True)
+    parser.add_argument("--plazo", type=int, required=True, help="Meses que quedan del plan")
+    parser.add_argument("--ahorrado", type=float, default=0.0)
+    for campo in ("ingreso", "comida", "transporte", "otros"):
+        parser.add_argument(f"--{campo}", default="0", help="Número fijo o normal|lognormal|uniforme:a:b")
+    parser.add_argument("--choque", action="append", default=[], help="probabilidad:media:desvío (se puede repetir)")
+    parser.add_argument("--trayectorias", type=int, default=100_000)
+    parser.add_argument("--semilla", type=int)
+    parser.add_argument("--procesos", type=int)
+    args = parser.parse_args()
+
+    params = ParametrosSimulacion(
+        args.meta, args.plazo, args.ahorrado,
+        leer_distribucion(args.ingreso), leer_distribucion(args.comida),
+        leer_distribucion(args.transporte), leer_distribucion(args.otros),
+        tuple(leer_choque(c) for c in args.choque),
+    )
+    r = simular(params, args.trayectorias, args.semilla, args.procesos)
+    print(f"{r.trayectorias} trayectorias: probabilidad de llegar a la meta {r.probabilidad * 100:.1f}%, "
+          f"saldo final medio ${r.saldo_medio:,.2f}")
+    print("Saldo al final del plazo por percentil:")
+    for p in PERCENTILES:
+        print(f"  p{p:<3d} ${r.bandas[p][-1]:,.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# tareas.py
+# Tareas en segundo plano sobre QThreadPool para que la E/S (SQLite y archivos)
+# no congele la ventana. Los resultados vuelven al hilo de la GUI mediante señales.
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtWidgets import QProgressDialog
+
+import trazas
+
+
+class TareaCancelada(Exception):
+    pass
+
+
+class SenalesTarea(QObject):
+    terminado = pyqtSignal(object)
+    error = pyqtSignal(str)
+    progreso = pyqtSignal(int)   # 0 - 100
+    cancelado = pyqtSignal()
+
+
+class Tarea(QRunnable):
+    """Ejecuta funcion(tarea, *args, **kwargs) en el pool de hilos de Qt."""
+
+    def __init__(self, funcion, *args, **kwargs):
+        super().__init__()
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.senales = SenalesTarea() # Se crea en el hilo de la GUI: sus slots corren allí
+        self._cancelada = False
+        # Las consultas del hilo de trabajo se atribuyen a quien lanzó la tarea
+        self.sitio = trazas.sitio_actual() if trazas.ACTIVO else None
+
+    # ====== DESDE EL HILO DE TRABAJO ======
+    def informar_progreso(self, porcentaje):
+        self.senales.progreso.emit(int(porcentaje))
+
+    def comprobar_cancelacion(self):
+        # Las funciones largas lo llaman entre bloques de trabajo
+        if self._cancelada:
+            raise TareaCancelada()
+
+    @property
+    def cancelada(self):
+        return self._cancelada
+
+    def run(self):
+        try:
+            if self.sitio:
+                with trazas.sitio(self.sitio):
+                    resultado = self.funcion(self, *self.args, **self.kwargs)
+            else:
+                resultado = self.funcion(self, *self.args, **self.kwargs)
+        except TareaCancelada:
+            self.senales.cancelado.emit()
+        except Exception as e:
+            self.senales.error.emit(str(e))
+        else:
+            if self._cancelada:
+                self.senales.cancelado.emit()
+            else:
+                self.senales.terminado.emit(resultado)
+
+    # ====== DESDE LA GUI ======
+    def cancelar(self):
+        self._cancelada = True
+
+
+_activas = set() # Referencias vivas mientras el pool ejecuta las tareas
+
+def ejecutar(funcion, *args, al_terminar=None, al_error=None, al_progreso=None, al_cancelar=None, **kwargs):
+    tarea = Tarea(funcion, *args, **kwargs)
+    if al_terminar:
+        tarea.senales.terminado.connect(al_terminar)
+    if al_error:
+        tarea.senales.error.connect(al_error)
+    if al_progreso:
+        tarea.senales.progreso.connect(al_progreso)
+    if al_cancelar:
+        tarea.senales.cancelado.connect(al_cancelar)
+    # La referencia se suelta en el hilo de la GUI, después de entregar el resultado
+    soltar = lambda *_: _activas.discard(tarea)
+    tarea.senales.terminado.connect(soltar)
+    tarea.senales.error.connect(soltar)
+    tarea.senales.cancelado.connect(soltar)
+    _activas.add(tarea)
+    QThreadPool.globalInstance().start(tarea)
+    return tarea
+
+def detener_todas():
+    # Al salir: pide cancelar lo que esté corriendo y espera a que los hilos terminen
+    for tarea in list(_activas):
+        tarea.cancelar()
+    QThreadPool.globalInstance().waitForDone()
+
+def ejecutar_con_progreso(parent, titulo, funcion, *args, al_terminar=None, al_error=None, al_cancelar=None, **kwargs):
+    # Igual que ejecutar() pero muestra un QProgressDialog con botón de cancelar
+    dialogo = QProgressDialog(titulo, "Cancelar", 0, 100, parent)
+    dialogo.setWindowTitle(titulo)
+    dialogo.setMinimumDuration(300) # Las tareas cortas terminan sin mostrar el diálogo
+
+    def cerrar_y(callback):
+        def slot(*a):
+            dialogo.reset()
+            dialogo.deleteLater()
+            if callback:
+                callback(*a)
+        return slot
+
+    tarea = ejecutar(funcion, *args,
+                     al_terminar=cerrar_y(al_terminar), al_error=cerrar_y(al_error),
+                     al_progreso=dialogo.setValue, al_cancelar=cerrar_y(al_cancelar), **kwargs)
+    dialogo.canceled.connect(tarea.cancelar)
+    return tarea
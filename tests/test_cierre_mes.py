@@ -0,0 +1,60 @@
+# Pruebas del cierre de mes por lotes con planes que otra sesión modifica a la vez
+from base_datos import ConexionDB
+import cierre_mes
+
+
+def _base(ruta):
+    db = ConexionDB(ruta)
+    with db.transaccion():
+        usuario = db.ejecutar("INSERT INTO usuarios (nombre, contrasena) VALUES ('ana', 'x')").lastrowid
+        ids = [db.ejecutar("INSERT INTO planes_ahorro (usuario_id, meta, plazo, ingreso, comida, transporte, otros, "
+                           "ahorrado, mes_actual) VALUES (?, 120000, 12, 50000, 0, 0, 0, 0, 1)", (usuario,)).lastrowid
+               for _ in range(4)]
+    return db, ids
+
+def _plan(db, plan_id):
+    return db.uno("SELECT meta, ahorrado, mes_actual, version FROM planes_ahorro WHERE id=?", (plan_id,))
+
+def _meses(db, plan_id):
+    return db.todos("SELECT mes, monto FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes", (plan_id,))
+
+
+def test_reintenta_solo_los_planes_en_conflicto(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "ahorros.db")
+    db, (quieto, editado, cerrado, siempre) = _base(ruta)
+    otra = ConexionDB(ruta)  # La "ventana" abierta durante el cierre
+    llamadas = []
+    original = cierre_mes._aplicar_bloque
+
+    def con_ventana(db, cambios, *args):
+        llamadas.append(sorted(c[0] for c in cambios))
+        with otra.transaccion():
+            if len(llamadas) == 1:
+                # Cambia la meta de un plan y cierra ella misma el mes de otro
+                otra.ejecutar("UPDATE planes_ahorro SET meta=240000, version=version+1 WHERE id=?", (editado,))
+                otra.ejecutar("INSERT INTO ahorros_mensuales (plan_id, mes, monto, fecha, acumulado) "
+                              "VALUES (?, 1, 5000, '2026-10-01', 5000)", (cerrado,))
+                otra.ejecutar("UPDATE planes_ahorro SET ahorrado=5000, mes_actual=2, version=version+1 WHERE id=?",
+                              (cerrado,))
+            # Este plan cambia en cada intento
+            otra.ejecutar("UPDATE planes_ahorro SET version=version+1 WHERE id=?", (siempre,))
+        return original(db, cambios, *args)
+
+    monkeypatch.setattr(cierre_mes, "_aplicar_bloque", con_ventana)
+    resumen = cierre_mes.cerrar_mes("2026-10", ruta, fecha="2026-10-01")
+
+    # Solo se vuelven a intentar los planes en conflicto, y un número acotado de veces
+    assert llamadas[0] == sorted([quieto, editado, cerrado, siempre])
+    assert llamadas[1] == sorted([editado, siempre])
+    assert llamadas[2:] == [[siempre]] * (cierre_mes.REINTENTOS_CONFLICTO - 1)
+    assert resumen["procesados"] == 2
+    assert resumen["en_conflicto"] == 1 and resumen["ids_en_conflicto"] == [siempre]
+
+    assert _meses(db, quieto) == [(1, 10000)]
+    # Cerrado con la meta nueva que dejó la ventana
+    assert _plan(db, editado)[:3] == (240000, 20000, 2) and _meses(db, editado) == [(1, 20000)]
+    # El mes que cerró la ventana no se duplica
+    assert _plan(db, cerrado)[1:3] == (5000, 2) and _meses(db, cerrado) == [(1, 5000)]
+    assert _plan(db, siempre)[1:3] == (0, 1) and _meses(db, siempre) == []
+    otra.cerrar()
+    db.cerrar()
@@ -0,0 +1,71 @@
+# Pruebas de exportador.py e importador.py: pesos exactos al centavo en ambos sentidos
+import csv
+import sqlite3
+
+from base_datos import ConexionDB
+from dinero import texto
+import exportador
+import importador
+
+# Montos que un float por / 100.0 no escribe con dos decimales exactos (o con el signo bien)
+MONTOS = [1, 5, 10, 99, 100, 1005, 123456789012, 29, 57, 115]
+
+
+def _base(ruta, con_meses=True):
+    db = ConexionDB(ruta)
+    with db.transaccion():
+        usuario = db.ejecutar("INSERT INTO usuarios (nombre, contrasena) VALUES ('ana', 'x')").lastrowid
+        plan = db.ejecutar("INSERT INTO planes_ahorro (usuario_id, meta, plazo, ingreso, comida, transporte, otros, "
+                           "ahorrado, mes_actual) VALUES (?, 1000000007, 12, 50005, 1, 10, -1205, 0, 1)",
+                           (usuario,)).lastrowid
+        vacio = db.ejecutar("INSERT INTO planes_ahorro (usuario_id, meta, plazo, ahorrado) VALUES (?, 100, 3, 0)",
+                            (usuario,)).lastrowid
+        if con_meses:
+            acumulado = 0
+            for mes, monto in enumerate(MONTOS, 1):
+                acumulado += monto
+                db.ejecutar("INSERT INTO ahorros_mensuales (plan_id, mes, monto, fecha, acumulado) "
+                            "VALUES (?, ?, ?, '2026-10-01', ?)", (plan, mes, monto, acumulado))
+    return db, plan, vacio
+
+def _meses(db, plan_id):
+    return db.todos("SELECT mes, monto, acumulado FROM ahorros_mensuales WHERE plan_id=? ORDER BY mes", (plan_id,))
+
+
+def test_pesos_exactos_en_sql():
+    # El formato en SQL da lo mismo que dinero.texto, negativos incluidos
+    conn = sqlite3.connect(":memory:")
+    sql = f"SELECT {exportador._pesos(':c')}"
+    assert conn.execute(sql, {"c": None}).fetchone()[0] is None
+    for cent in [0, 1, 5, 99, 100, 1005, -1, -5, -99, -100, -1205, 123456789012, -123456789012]:
+        assert conn.execute(sql, {"c": cent}).fetchone()[0] == texto(cent)
+
+
+def test_csv_ida_y_vuelta(tmp_path):
+    origen, plan, vacio = _base(str(tmp_path / "origen.db"))
+    salida = str(tmp_path / "planes.csv")
+    assert exportador.exportar(salida, ruta_db=origen.ruta) == len(MONTOS) + 1
+
+    with open(salida, newline="", encoding="utf-8") as f:
+        filas = list(csv.DictReader(f))
+    assert [f["monto"] for f in filas[:len(MONTOS)]] == [texto(m) for m in MONTOS]
+    primera = filas[0]
+    assert (primera["meta"], primera["ingreso"], primera["comida"], primera["otros"]) == \
+        ("10000000.07", "500.05", "0.01", "-12.05")
+    assert filas[-1]["plan_id"] == str(vacio) and filas[-1]["mes"] == "" and filas[-1]["monto"] == ""
+
+    destino, _, _ = _base(str(tmp_path / "destino.db"), con_meses=False)
+    assert importador.importar(salida, destino.ruta) == (len(MONTOS), 1)
+    assert _meses(destino, plan) == _meses(origen, plan)
+    assert destino.uno("SELECT ahorrado FROM planes_ahorro WHERE id=?", (plan,))[0] == sum(MONTOS)
+
+
+def test_ndjson_ida_y_vuelta(tmp_path):
+    origen, plan, _ = _base(str(tmp_path / "origen.db"))
+    salida = str(tmp_path / "planes.ndjson.gz")
+    exportador.exportar(salida, ruta_db=origen.ruta)
+
+    destino, _, _ = _base(str(tmp_path / "destino.db"), con_meses=False)
+    importador.importar(salida, destino.ruta)
+    assert _meses(destino, plan) == _meses(origen, plan)
+
@@ -0,0 +1,73 @@
+# Pruebas del motor de cálculo (python -m pytest tests)
+import random
+
+from dinero import Dinero
+import motor_ahorro
+import proyeccion
+
+
+def _planes(cantidad, semilla=7):
+    # Planes en centavos que pasan por los cuatro estados de calcular
+    rnd = random.Random(semilla)
+    planes = []
+    for _ in range(cantidad):
+        meta = rnd.choice([0, rnd.randrange(1, 10**9)])
+        plazo = rnd.choice([0, -1, rnd.randrange(1, 481)])
+        ingreso = rnd.randrange(0, 10**7)
+        gastos = [rnd.randrange(0, 4 * 10**6) for _ in range(3)]
+        ahorrado = rnd.choice([0, meta, meta + 1, rnd.randrange(0, max(meta, 1))])
+        planes.append((meta, plazo, ingreso, *gastos, ahorrado))
+    return planes
+
+def _uno(fila, supuestos=None):
+    meta, plazo, ingreso, comida, transporte, otros, ahorrado = fila
+    return motor_ahorro.calcular(Dinero(meta), plazo, Dinero(ingreso), Dinero(comida), Dinero(transporte),
+                                 Dinero(otros), Dinero(ahorrado), supuestos)
+
+
+def test_sin_supuestos_igual_que_none():
+    for fila in _planes(2000):
+        assert _uno(fila, proyeccion.SIN_SUPUESTOS) == _uno(fila, None)
+        meta, plazo, _, _, _, _, ahorrado = fila
+        for mes in (1, max(plazo, 1)):
+            assert (motor_ahorro.aporte_sugerido_mes(Dinero(meta), Dinero(ahorrado), plazo, mes, proyeccion.SIN_SUPUESTOS)
+                    == motor_ahorro.aporte_sugerido_mes(Dinero(meta), Dinero(ahorrado), plazo, mes, None))
+
+def test_sin_supuestos_en_centavos_exactos():
+    # 100.00 en 3 meses: 33.33 por mes (centavos enteros, no el float de proyeccion)
+    r = motor_ahorro.calcular(Dinero(10000), 3, Dinero(50000), Dinero(0), Dinero(0), Dinero(0), Dinero(0),
+                              proyeccion.SIN_SUPUESTOS)
+    assert r.aporte_necesario == Dinero(3333)
+
+def _comparar_lote(planes, supuestos, por_plan):
+    lote = motor_ahorro.calcular_lote(planes, supuestos)
+    for i, fila in enumerate(planes):
+        r = _uno(fila, por_plan[i])
+        assert lote.estado[i] == r.estado
+        assert lote.disponible[i] == r.disponible.centavos
+        assert lote.faltante[i] == r.faltante.centavos
+        assert lote.aporte_necesario[i] == r.aporte_necesario.centavos
+        assert lote.progreso[i] == r.progreso
+        assert bool(lote.alcanzable[i]) == r.alcanzable
+
+def test_lote_igual_que_calcular():
+    planes = _planes(5000)
+    _comparar_lote(planes, None, [None] * len(planes))
+    _comparar_lote(planes, proyeccion.SIN_SUPUESTOS, [None] * len(planes))
+
+def test_lote_con_supuestos():
+    planes = _planes(5000, semilla=11)
+    s = proyeccion.Supuestos(0.06, 0.04, True)
+    _comparar_lote(planes, s, [s] * len(planes))
+    # Uno por plan, como proyeccion.supuestos_de(plan) para cada fila
+    opciones = [None, proyeccion.SIN_SUPUESTOS, s, proyeccion.Supuestos(0.1, 0.0, False),
+                proyeccion.Supuestos(0.0, 0.05, False), proyeccion.Supuestos(0.0, 0.0, True)]
+    rnd = random.Random(3)
+    por_plan = [rnd.choice(opciones) for _ in planes]
+    _comparar_lote(planes, por_plan, por_plan)
+
+def test_lote_vacio_y_generador():
+    assert len(motor_ahorro.calcular_lote([]).estado) == 0
+    planes = _planes(10)
+    lote = motor_ahorro.calcular_lote(iter(planes))
+    assert list(lote.faltante) == [f[0] - f[6] for f in planes]
@@ -0,0 +1,44 @@
+# Sitio de llamada de las trazas cuando las consultas pasan por CachePlan
+import datetime
+import os
+
+import pytest
+
+from base_datos import ConexionDB
+from cache_plan import CachePlan
+from dinero import Dinero
+import trazas
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(trazas, "_trazador", None)
+    monkeypatch.setattr(trazas, "ACTIVO", False)
+    trazas.activar(log_lentas=os.path.join(tmp_path, "lentas.log"), umbral_ms=10**6)
+    conexion = ConexionDB(os.path.join(tmp_path, "ahorros.db"))
+    yield conexion
+    conexion.cerrar()
+
+def _sitios(db, accion):
+    # Sitios nuevos que aparecen en las trazas al ejecutar accion()
+    antes = {s["sitio"]: s["consultas"] for s in db.trazador.por_sitio()}
+    accion()
+    return {s["sitio"] for s in db.trazador.por_sitio() if s["consultas"] != antes.get(s["sitio"])}
+
+def test_sitio_es_quien_usa_la_cache(db):
+    with db.transaccion():
+        usuario_id = db.ejecutar("INSERT INTO usuarios (nombre, contrasena) VALUES ('ana', 'x')").lastrowid
+    plan_id = CachePlan(db).crear(usuario_id, 1000, 12, 500, 0, 0, 0, 0, datetime.date.today().isoformat()).id
+
+    def finalizar_mes():
+        cache = CachePlan(db)
+        cache.cargar(plan_id)
+        cache.registrar_aporte(Dinero(10000), datetime.date.today().isoformat())
+
+    def actualizar_grafico():
+        cache = CachePlan(db)
+        cache.cargar(plan_id)
+        cache.acumulados()
+
+    assert _sitios(db, finalizar_mes) == {"finalizar_mes (test_trazas.py)"}
+    assert _sitios(db, actualizar_grafico) == {"actualizar_grafico (test_trazas.py)"}
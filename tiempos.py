@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# tiempos.py
+# Registro de las fases de arranque (imports, base de datos, login, ventana...).
+# Con la variable de entorno AHORROS_TIEMPOS=1 el informe se imprime en stderr.
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+INICIO = time.perf_counter()
+ACTIVO = bool(os.environ.get("AHORROS_TIEMPOS"))
+
+_fases = [] # (nombre, segundos)
+_impreso = False
+
+def registrar_fase(nombre, segundos):
+    _fases.append((nombre, segundos))
+
+@contextmanager
+def fase(nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_fase(nombre, time.perf_counter() - inicio)
+
+def fases():
+    return list(_fases)
+
+def informe():
+    lineas = ["Tiempos de arranque:"]
+    for nombre, segundos in _fases:
+        lineas.append(f"  {nombre:<24} {segundos * 1000:9.1f} ms")
+    lineas.append(f"  {'total desde inicio':<24} {(time.perf_counter() - INICIO) * 1000:9.1f} ms")
+    return "\n".join(lineas)
+
+def imprimir_informe():
+    # Una sola vez por proceso: es el informe del arranque, no de cada carga posterior
+    global _impreso
+    if ACTIVO and not _impreso:
+        _impreso = True
+        print(informe(), file=sys.stderr)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# trazas.py
+# Trazas de todas las consultas SQL que pasan por base_datos.ConexionDB.
+# Por cada sentencia guarda el texto, la forma de los parámetros, las filas y el tiempo, agrupados
+# por sitio de llamada (el método de la ventana que la originó: finalizar_mes, actualizar_grafico...).
+# Las que superan el umbral van a un log de consultas lentas, opcionalmente con su EXPLAIN QUERY PLAN.
+#
+# Se activa con variables de entorno, sin tocar el código:
+#   AHORROS_TRAZAS=1                 activa las trazas
+#   AHORROS_LENTAS_MS=50             umbral del log de lentas (por defecto 100 ms)
+#   AHORROS_LOG_LENTAS=lentas.log    archivo del log (por defecto consultas_lentas.log)
+#   AHORROS_EXPLAIN=1                añade el plan de cada consulta lenta al log
+#   AHORROS_TRAZAS_JSON=trazas.json  guarda el resumen por sitio al salir
+import datetime
+import json
+import os
+import sys
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+ACTIVO = bool(os.environ.get("AHORROS_TRAZAS"))
+UMBRAL_MS = float(os.environ.get("AHORROS_LENTAS_MS", "100"))
+LOG_LENTAS = os.environ.get("AHORROS_LOG_LENTAS", "consultas_lentas.log")
+EXPLAIN = bool(os.environ.get("AHORROS_EXPLAIN"))
+INFORME_JSON = os.environ.get("AHORROS_TRAZAS_JSON")
+
+MUESTRAS_POR_CLAVE = 2000 # Últimos tiempos guardados por (sitio, sql) para los percentiles
+
+# Módulos que se saltan al buscar el sitio de llamada. Los envoltorios de datos (caché del plan,
+# saldos, historial) también: el sitio es la función de la ventana que los usó, no el envoltorio
+_ENVOLTORIOS = {"cache_plan.py", "modelo_historial.py", "saldos.py"}
+_INFRAESTRUCTURA = {"base_datos.py", "trazas.py", "tareas.py", "contextlib.py", "threading.py"} | _ENVOLTORIOS
+
+_local = threading.local()
+
+
+# ====== SITIO DE LLAMADA ======
+@contextmanager
+def sitio(nombre):
+    # Fija explícitamente el sitio de las consultas del bloque (en este hilo)
+    previo = getattr(_local, "sitio", None)
+    _local.sitio = nombre
+    try:
+        yield
+    finally:
+        _local.sitio = previo
+
+def sitio_actual():
+    # El sitio explícito si lo hay; si no, la primera función fuera de la infraestructura
+    nombre = getattr(_local, "sitio", None)
+    if nombre:
+        return nombre
+    frame = sys._getframe(1)
+    envoltorio = None # Si nadie fuera de la infraestructura llamó (p. ej. fetchMore desde Qt), el envoltorio
+    while frame is not None:
+        archivo = os.path.basename(frame.f_code.co_filename)
+        if archivo not in _INFRAESTRUCTURA:
+            return f"{frame.f_code.co_name} ({archivo})"
+        if envoltorio is None and archivo in _ENVOLTORIOS:
+            envoltorio = f"{frame.f_code.co_name} ({archivo})"
+        frame = frame.f_back
+    return envoltorio or "?"
+
+def _es_lote(params):
+    # executemany recibe un iterable de filas en lugar de una fila
+    if isinstance(params, (tuple, list, dict)):
+        return isinstance(params, list) and bool(params) and isinstance(params[0], (tuple, list, dict))
+    return params is not None
+
+def forma_parametros(params):
+    # Solo los tipos, nunca los valores (pueden ser datos del usuario)
+    if params is None:
+        return "()"
+    if _es_lote(params):
+        return f"<lote de {len(params)} filas>" if isinstance(params, list) else f"<{type(params).__name__}>"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in params) + ")"
+
+
+# ====== TRAZADOR ======
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    i = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[i]
+
+def _una_linea(sql):
+    return " ".join(sql.split())
+
+
+class Trazador:
+    """Acumula tiempos por (sitio, sql) y escribe las consultas lentas a un log."""
+
+    def __init__(self, umbral_ms=UMBRAL_MS, log_lentas=LOG_LENTAS, explain=EXPLAIN):
+        self.umbral_ms = umbral_ms
+        self.log_lentas = log_lentas
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._datos = {} # (sitio, sql) -> {"n", "total", "filas", "formas", "muestras"}
+
+    def registrar(self, conn, sql, params, filas, segundos):
+        # Lo llama ConexionDB con su bloqueo tomado, justo después de ejecutar la sentencia
+        lugar = sitio_actual()
+        ms = segundos * 1000
+        forma = forma_parametros(params)
+        with self._lock:
+            d = self._datos.get((lugar, sql))
+            if d is None:
+                d = self._datos[(lugar, sql)] = {"n": 0, "total": 0.0, "filas": 0, "formas": set(),
+                                                  "muestras": deque(maxlen=MUESTRAS_POR_CLAVE)}
+            d["n"] += 1
+            d["total"] += ms
+            d["filas"] += filas if filas and filas > 0 else 0
+            d["formas"].add(forma)
+            d["muestras"].append(ms)
+        if ms >= self.umbral_ms and self.log_lentas:
+            self._escribir_lenta(conn, lugar, sql, params, forma, filas, ms)
+
+    def _escribir_lenta(self, conn, lugar, sql, params, forma, filas, ms):
+        lineas = [f"{datetime.datetime.now().isoformat(timespec='milliseconds')} {ms:.1f} ms "
+                  f"sitio={lugar} filas={filas if filas is not None else '?'} params={forma}",
+                  f"  {_una_linea(sql)}"]
+        if self.explain:
+            lineas.extend(f"  plan: {p}" for p in explicar(conn, sql, params))
+        with self._lock, open(self.log_lentas, "a", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+
+    # ====== RESUMEN ======
+    def informe(self):
+        # Lista de dicts por (sitio, sql) ordenada por tiempo total
+        with self._lock:
+            copia = [(k, dict(d, muestras=sorted(d["muestras"]))) for k, d in self._datos.items()]
+        filas = []
+        for (lugar, sql), d in copia:
+            m = d["muestras"]
+            filas.append({
+                "sitio": lugar, "sql": _una_linea(sql), "veces": d["n"],
+                "ms_total": d["total"], "ms_p50": _percentil(m, 50), "ms_p95": _percentil(m, 95),
+                "ms_p99": _percentil(m, 99), "ms_max": m[-1] if m else 0.0,
+                "filas_promedio": d["filas"] / d["n"], "params": sorted(d["formas"]),
+            })
+        filas.sort(key=lambda f: f["ms_total"], reverse=True)
+        return filas
+
+    def por_sitio(self):
+        # Totales por sitio: lo que cuesta en SQL cada botón
+        sitios = {}
+        for f in self.informe():
+            s = sitios.setdefault(f["sitio"], {"sitio": f["sitio"], "consultas": 0, "ms_total": 0.0})
+            s["consultas"] += f["veces"]
+            s["ms_total"] += f["ms_total"]
+        return sorted(sitios.values(), key=lambda s: s["ms_total"], reverse=True)
+
+    def imprimir_informe(self, archivo=sys.stderr, limite=20):
+        print("Consultas SQL por sitio:", file=archivo)
+        for s in self.por_sitio():
+            print(f"  {s['sitio']:40s} {s['consultas']:7d} consultas {s['ms_total']:10.1f} ms", file=archivo)
+        print("Sentencias más costosas (p50 / p95 / p99 / max en ms):", file=archivo)
+        for f in self.informe()[:limite]:
+            print(f"  {f['ms_total']:9.1f} ms  x{f['veces']:<6d} {f['ms_p50']:.2f} / {f['ms_p95']:.2f} / "
+                  f"{f['ms_p99']:.2f} / {f['ms_max']:.2f}  [{f['sitio']}] {f['sql'][:100]}", file=archivo)
+
+    def guardar_informe(self, ruta):
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({"por_sitio": self.por_sitio(), "sentencias": self.informe()}, f, indent=2, ensure_ascii=False)
+
+
+# ====== EXPLAIN ======
+def explicar(conn, sql, params=()):
+    # Devuelve las líneas de EXPLAIN QUERY PLAN (no ejecuta la sentencia)
+    if _es_lote(params):
+        return ["(executemany: sin plan)"]
+    try:
+        filas = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except Exception as e:
+        return [f"(sin plan: {e})"]
+    return [fila[3] for fila in filas]
+
+
+# ====== TRAZADOR GLOBAL ======
+_trazador = None
+
+def trazador():
+    # El trazador de la sesión si las trazas están activas; si no, None
+    global _trazador
+    if _trazador is None and ACTIVO:
+        _trazador = Trazador()
+    return _trazador
+
+def activar(**opciones):
+    # Para activar las trazas desde código (p. ej. el benchmark) en lugar de por entorno
+    global _trazador, ACTIVO
+    ACTIVO = True
+    _trazador = Trazador(**opciones)
+    return _trazador
+
+def volcar():
+    # Al salir de la aplicación: resumen en stderr y, si se pidió, en JSON
+    if _trazador is None:
+        return
+    _trazador.imprimir_informe()
+    if INFORME_JSON:
+        _trazador.guardar_informe(INFORME_JSON)